@@ -1,8 +1,21 @@
 #!/usr/bin/env python3
+"""
+CLI entrypoint for the agent pipeline.
+
+Modes:
+- one-shot (default): reads a single JSON payload from stdin and prints one JSON result.
+- worker (--worker): long-lived process that reads newline-delimited JSON requests
+  from stdin (or from a Unix socket with --socket) and streams one JSON line back per
+  request as soon as it completes. Requests may carry an "id" that is echoed back.
+  With --socket, --prefork N forks N warm processes sharing the listening socket.
+"""
 import sys
 import json
 import os
 import asyncio
+import argparse
+import signal
+import socket
 from dotenv import load_dotenv
 
 # Ensure local imports work when called as a script
@@ -12,31 +25,207 @@ if CURRENT_DIR not in sys.path:
 
 load_dotenv()
 
-def main():
+
+def _get_worker_concurrency() -> int:
     try:
-        raw = sys.stdin.read()
-        payload = json.loads(raw or "{}")
+        return max(1, int(os.getenv("AGENT_WORKER_CONCURRENCY", "8")))
+    except Exception:
+        return 8
 
-        try:
-            from app.pipeline import run_pipeline
-            result = asyncio.run(run_pipeline(payload))
-        except Exception as inner_err:
-            # If pipeline import/exec fails, return minimal echo so caller can still parse
-            response_text = f"No se pudo procesar el objetivo (error interno). Detalle: pipeline_error: {inner_err}"
-            print(json.dumps({
-                "received": payload,
-                "response": response_text,
-                "error": f"pipeline_error: {inner_err}"
-            }, ensure_ascii=False))
-            return
-
-        # Ensure 'response' is present even in CLI fallback path
-        output = {
+
+async def _process_payload(payload: dict) -> dict:
+    """
+    Runs the pipeline for one payload and builds the CLI output contract
+    ('received', 'result'/'error' and always 'response').
+    """
+    try:
+        from app.pipeline import run_pipeline
+        result = await run_pipeline(payload)
+    except Exception as inner_err:
+        # If pipeline import/exec fails, return minimal echo so caller can still parse
+        response_text = f"No se pudo procesar el objetivo (error interno). Detalle: pipeline_error: {inner_err}"
+        return {
             "received": payload,
-            "result": result
+            "response": response_text,
+            "error": f"pipeline_error: {inner_err}"
         }
-        if isinstance(result, dict) and "response" in result:
-            output["response"] = result.get("response")
+
+    # Ensure 'response' is present even in CLI fallback path
+    output = {
+        "received": payload,
+        "result": result
+    }
+    if isinstance(result, dict) and "response" in result:
+        output["response"] = result.get("response")
+    return output
+
+
+async def _handle_line(line: bytes, semaphore: asyncio.Semaphore) -> dict:
+    try:
+        payload = json.loads(line.decode("utf-8"))
+    except Exception as e:
+        return {"error": f"invalid_json: {e}", "response": ""}
+    if not isinstance(payload, dict):
+        return {"error": "invalid_payload: expected a JSON object", "response": ""}
+    request_id = payload.pop("id", None)
+    async with semaphore:
+        output = await _process_payload(payload)
+    if request_id is not None:
+        output["id"] = request_id
+    return output
+
+
+async def _serve_stream(reader: asyncio.StreamReader, write_line, semaphore: asyncio.Semaphore) -> None:
+    """
+    Reads NDJSON requests until EOF, runs them concurrently and writes each
+    response line as soon as its request finishes (not in input order).
+    """
+    pending = set()
+
+    async def run_one(line: bytes):
+        output = await _handle_line(line, semaphore)
+        await write_line(json.dumps(output, ensure_ascii=False))
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        task = asyncio.create_task(run_one(line))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _serve_stdio(out_stream) -> None:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2 ** 24)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    write_lock = asyncio.Lock()
+
+    async def write_line(text: str):
+        async with write_lock:
+            out_stream.write(text + "\n")
+            out_stream.flush()
+
+    await _serve_stream(reader, write_line, asyncio.Semaphore(_get_worker_concurrency()))
+
+
+async def _serve_socket(sock: socket.socket) -> None:
+    semaphore = asyncio.Semaphore(_get_worker_concurrency())
+
+    async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+
+        async def write_line(text: str):
+            async with write_lock:
+                writer.write((text + "\n").encode("utf-8"))
+                await writer.drain()
+
+        try:
+            await _serve_stream(reader, write_line, semaphore)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            print(f"[WORKER] Client connection error: {e}", file=sys.stderr)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(handle_client, sock=sock, limit=2 ** 24)
+    async with server:
+        await server.serve_forever()
+
+
+def _preload_pipeline() -> None:
+    """Pay import and graph compilation cost once, before serving (and before forking)."""
+    try:
+        from app.pipeline import get_app
+        get_app()
+    except Exception as e:
+        print(f"[WORKER] Pipeline preload failed: {e}", file=sys.stderr)
+
+
+def _bind_unix_socket(path: str) -> socket.socket:
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(128)
+    sock.setblocking(False)
+    return sock
+
+
+def _run_prefork(sock: socket.socket, workers: int) -> None:
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                asyncio.run(_serve_socket(sock))
+            except KeyboardInterrupt:
+                pass
+            os._exit(0)
+        children.append(pid)
+    print(f"[WORKER] Prefork pool started with {len(children)} process(es)", file=sys.stderr)
+
+    def _terminate(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _terminate)
+    signal.signal(signal.SIGINT, _terminate)
+    for child in children:
+        try:
+            os.waitpid(child, 0)
+        except ChildProcessError:
+            pass
+
+
+def run_worker(socket_path: str = None, prefork: int = 1) -> None:
+    # Responses own stdout; pipeline logs go to stderr so the NDJSON stream stays clean
+    out_stream = sys.stdout
+    sys.stdout = sys.stderr
+    _preload_pipeline()
+
+    if not socket_path:
+        asyncio.run(_serve_stdio(out_stream))
+        return
+
+    sock = _bind_unix_socket(socket_path)
+    print(f"[WORKER] Listening on {socket_path}", file=sys.stderr)
+    try:
+        if prefork > 1:
+            _run_prefork(sock, prefork)
+        else:
+            asyncio.run(_serve_socket(sock))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the agent pipeline from the command line.")
+    parser.add_argument("--worker", action="store_true", help="Serve NDJSON requests until EOF instead of a single payload")
+    parser.add_argument("--socket", help="Unix socket path to listen on (worker mode only)")
+    parser.add_argument("--prefork", type=int, default=1, help="Number of forked worker processes (requires --socket)")
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(socket_path=args.socket, prefork=max(1, args.prefork))
+        return
+
+    try:
+        raw = sys.stdin.read()
+        payload = json.loads(raw or "{}")
+        output = asyncio.run(_process_payload(payload))
         print(json.dumps(output, ensure_ascii=False))
     except Exception as e:
         print(f"error: {e}", file=sys.stderr)
@@ -44,5 +233,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from .config import get_batch_max_concurrency
+from .pipeline import RAG_TIERS, resolve_latency_tier, run_pipeline
+
+
+def group_payloads(payloads: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], List[int]]]:
+    """
+    Groups identical requests (same objective, skills and latency tier) so each distinct
+    request runs the pipeline once. Returns (payload, indices) pairs in first-seen order.
+    Payloads with different request_ids are never grouped: each id is its own checkpoint
+    thread, and a retry of it has to resume that run, not another item's.
+    """
+    groups: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+    for index, payload in enumerate(payloads):
+        key = json.dumps(
+            {
+                "objective": (payload.get("objective") or "").strip(),
+                "skills": payload.get("skills") or [],
+                "latency_tier": payload.get("latency_tier"),
+                "request_id": payload.get("request_id") or "",
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        if key not in groups:
+            groups[key] = (payload, [])
+        groups[key][1].append(index)
+    return list(groups.values())
+
+
+def _embed_objectives(objectives: List[Optional[str]]) -> List[Optional[List[float]]]:
+    """One batched embedding call for every RAG query in the batch; None entries (no RAG) are skipped."""
+    vectors: List[Optional[List[float]]] = [None] * len(objectives)
+    positions = [i for i, objective in enumerate(objectives) if objective is not None]
+    if not positions or not os.getenv("VECTOR_DB_URL"):
+        return vectors
+    try:
+        from .tools.embeddings import embed_queries
+        embedded = embed_queries([objectives[i] for i in positions])
+    except Exception as e:
+        print(f"[BATCH] Batched embedding failed, nodes will embed individually: {e}")
+        return vectors
+    for i, vector in zip(positions, embedded):
+        vectors[i] = vector
+    return vectors
+
+
+async def run_batch(
+    payloads: List[Dict[str, Any]],
+    max_concurrency: Optional[int] = None,
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Runs the pipeline for a batch of requests and yields (index, result) as each
+    item completes. Identical requests share one pipeline run, the RAG queries of
+    the tiers that run RAG are embedded up front in a single call, and at most `max_concurrency` pipelines
+    (and therefore LLM stages) run at the same time.
+    """
+    groups = group_payloads(payloads)
+    limit = max_concurrency or get_batch_max_concurrency()
+    print(f"[BATCH] {len(payloads)} item(s) -> {len(groups)} distinct request(s), concurrency={limit}")
+
+    # Fast-tier requests never reach the RAG node: nothing to embed for them
+    objectives = [
+        (payload.get("objective") or "") if resolve_latency_tier(payload.get("latency_tier")) in RAG_TIERS else None
+        for payload, _ in groups
+    ]
+    vectors = await asyncio.to_thread(_embed_objectives, objectives)
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run_group(payload: Dict[str, Any], vector: Optional[List[float]], indices: List[int]):
+        async with semaphore:
+            try:
+                result = await run_pipeline({**payload, "query_embedding": vector})
+            except Exception as e:
+                print(f"[BATCH] Pipeline failed for items {indices}: {e}")
+                result = {"status": "error", "response": ""}
+        return indices, result
+
+    tasks = [
+        asyncio.create_task(run_group(payload, vector, indices))
+        for (payload, indices), vector in zip(groups, vectors)
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            indices, result = await finished
+            for index in indices:
+                yield index, result
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from .config import (
+    get_cache_path,
+    get_cache_max_entries,
+    get_cache_ttl_seconds,
+    get_google_model_name,
+)
+from .llm import invoke_with_timeout
+
+
+class SharedCache:
+    """
+    Process-safe key/value cache backed by a SQLite file in WAL mode.
+    Every uvicorn worker (or forked agent worker) opens the same file, so an entry
+    written by one process is visible to all the others on their next lookup.
+    Entries expire after a TTL and the table is kept under `max_entries` by evicting
+    the least recently used rows. Hits/misses are counted per namespace (node).
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl_seconds: float = 86400.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not be shared across fork(); reopen in each process
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries(last_access)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_stats ("
+            " namespace TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+
+    def _record(self, conn: sqlite3.Connection, namespace: str, hit: bool) -> None:
+        column = "hits" if hit else "misses"
+        conn.execute(
+            f"INSERT INTO cache_stats(namespace, {column}) VALUES (?, 1) "
+            f"ON CONFLICT(namespace) DO UPDATE SET {column} = {column} + 1",
+            (namespace,),
+        )
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key))
+            self._record(conn, namespace, row is not None)
+        return row[0] if row is not None else None
+
+    def set(self, namespace: str, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries(key, namespace, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, value, now + self.ttl_seconds, now),
+            )
+            self._writes += 1
+            # Eviction scans the table, so amortize it over several writes
+            if self._writes % 32 == 1:
+                self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN "
+                "(SELECT key FROM cache_entries ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            (entries,) = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+            rows = conn.execute("SELECT namespace, hits, misses FROM cache_stats ORDER BY namespace").fetchall()
+        nodes = {}
+        for namespace, hits, misses in rows:
+            total = hits + misses
+            nodes[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+            }
+        return {"path": self.path, "entries": entries, "max_entries": self.max_entries, "nodes": nodes}
+
+
+_shared_cache: Optional[SharedCache] = None
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """
+    Returns the process-wide SharedCache configured by AGENT_CACHE_PATH,
+    or None if the shared cache is disabled.
+    """
+    global _shared_cache
+    path = get_cache_path()
+    if not path:
+        return None
+    if _shared_cache is None or _shared_cache.path != path:
+        _shared_cache = SharedCache(path, get_cache_max_entries(), get_cache_ttl_seconds())
+    return _shared_cache
+
+
+def make_cache_key(model: str, node: str, content: str) -> str:
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{model}:{node}:{digest}"
+
+
+async def cached_ainvoke(node: str, prompt, chain, variables: Dict[str, Any], model: Optional[str] = None) -> str:
+    """
+    Invokes `chain` (prompt | llm | parser) memoizing the output in the shared cache
+    under (model, node, hash of the rendered prompt). Empty outputs are not cached.
+    `model` is the one the chain's LLM was built with (GOOGLE_MODEL if omitted).
+    Raises asyncio.TimeoutError after LLM_TIMEOUT_SECONDS so callers fall back.
+    """
+    model = model or get_google_model_name()
+    cache = get_shared_cache()
+    if cache is None:
+        return await invoke_with_timeout(chain, variables, node, model)
+
+    try:
+        rendered = prompt.format(**variables)
+        key = make_cache_key(model, node, rendered)
+        # SQLite may wait on another process's write lock (busy_timeout): keep it off the loop
+        cached = await asyncio.to_thread(cache.get, node, key)
+    except Exception as e:
+        print(f"[CACHE] Lookup failed for node={node}: {e}")
+        return await invoke_with_timeout(chain, variables, node, model)
+    if cached is not None:
+        print(f"[CACHE] Hit for node={node}")
+        return cached
+
+    result = await invoke_with_timeout(chain, variables, node, model)
+    if result:
+        try:
+            await asyncio.to_thread(cache.set, node, key, result)
+        except Exception as e:
+            print(f"[CACHE] Store failed for node={node}: {e}")
+    return result
+
+
+class CachedEmbeddings:
+    """
+    Wraps a LangChain embeddings object, memoizing vectors in the shared cache
+    under (model, "embeddings", hash of the text).
+    """
+
+    namespace = "embeddings"
+
+    def __init__(self, embeddings, cache: SharedCache, model: str):
+        self._embeddings = embeddings
+        self._cache = cache
+        self._model = model
+
+    def __getattr__(self, name):
+        return getattr(self._embeddings, name)
+
+    def _key(self, text: str, task: str) -> str:
+        # Query and document embeddings use different task types, so key them apart
+        return make_cache_key(self._model, self.namespace, f"{task}:{text}")
+
+    def embed_documents(self, texts):
+        vectors = [None] * len(texts)
+        missing = []
+        for i, text in enumerate(texts):
+            cached = self._cache.get(self.namespace, self._key(text, "document"))
+            if cached is not None:
+                vectors[i] = json.loads(cached)
+            else:
+                missing.append(i)
+        if missing:
+            computed = self._embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+                self._cache.set(self.namespace, self._key(texts[i], "document"), json.dumps(vector))
+        return vectors
+
+    def embed_query(self, text):
+        cached = self._cache.get(self.namespace, self._key(text, "query"))
+        if cached is not None:
+            return json.loads(cached)
+        vector = self._embeddings.embed_query(text)
+        self._cache.set(self.namespace, self._key(text, "query"), json.dumps(vector))
+        return vector
+
+    def embed_queries(self, texts):
+        from .tools.embeddings import embed_queries_batched
+
+        vectors = [None] * len(texts)
+        missing = []
+        for i, text in enumerate(texts):
+            cached = self._cache.get(self.namespace, self._key(text, "query"))
+            if cached is not None:
+                vectors[i] = json.loads(cached)
+            else:
+                missing.append(i)
+        if missing:
+            computed = embed_queries_batched(self._embeddings, [texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+                self._cache.set(self.namespace, self._key(texts[i], "query"), json.dumps(vector))
+        return vectors
+
+    async def aembed_documents(self, texts):
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text):
+        return await asyncio.to_thread(self.embed_query, text)
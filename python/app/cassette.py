@@ -0,0 +1,250 @@
+"""
+Record/replay of Gemini chat and embedding calls (LLM_CASSETTE_MODE).
+
+- record: calls go to Gemini as usual and every prompt, response (text, finish
+  reason, token usage) or vector is appended with its observed latency to the
+  JSONL cassette at LLM_CASSETTE_PATH.
+- replay: no network and no API key; responses come from the cassette. A prompt
+  recorded several times is served in recorded order, cycling. Each answer waits
+  the recorded latency times LLM_CASSETTE_LATENCY_SCALE (0 answers immediately).
+  Unknown prompts raise CassetteMiss, so nodes take their fallbacks, as when Gemini fails.
+
+Chat entries are keyed by model + rendered messages. On replay, a prompt recorded
+under another model (e.g. after a tier change) is served when there is no exact match.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from .config import get_cassette_mode, get_cassette_path, get_cassette_latency_scale
+
+MODES = ("record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """The replayed call was never recorded."""
+
+
+def _digest(*parts: Any) -> str:
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Append-only JSONL of recorded calls, indexed by key (and model-free key) for replay."""
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._loose: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        if mode == "replay":
+            self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            print(f"[CASSETTE] {self.path} not found; every call will miss")
+            return
+        count = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                self._entries.setdefault(entry["key"], []).append(entry)
+                if entry.get("loose_key"):
+                    self._loose.setdefault(entry["loose_key"], []).append(entry)
+                count += 1
+        print(f"[CASSETTE] Loaded {count} recorded call(s) from {self.path}")
+
+    def lookup(self, key: str, loose_key: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            for index, k in ((self._entries, key), (self._loose, loose_key)):
+                entries = index.get(k) if k else None
+                if entries:
+                    position = self._cursor.get(k, 0)
+                    self._cursor[k] = position + 1
+                    return entries[position % len(entries)]
+        raise CassetteMiss(key)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Cassette for the configured mode/path, or None when LLM_CASSETTE_MODE is off."""
+    global _cassette
+    mode = get_cassette_mode()
+    if mode not in MODES:
+        return None
+    path = get_cassette_path()
+    with _cassette_lock:
+        if _cassette is None or _cassette.path != path or _cassette.mode != mode:
+            _cassette = Cassette(path, mode)
+        return _cassette
+
+
+def _replay_delay(entry: Dict[str, Any]) -> float:
+    return entry.get("latency_ms", 0.0) / 1000 * get_cassette_latency_scale()
+
+
+def _serialize_messages(messages: List[BaseMessage]) -> List[Tuple[str, Any]]:
+    return [(m.type, m.content) for m in messages]
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Chat model that records `inner` (record mode) or answers from the cassette
+    (replay mode, `inner` is None). Stop sequences are forwarded when recording.
+    """
+
+    model_name: str
+    inner: Optional[Any] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def _keys(self, messages: List[BaseMessage]) -> Tuple[str, str]:
+        serialized = _serialize_messages(messages)
+        return _digest("chat", self.model_name, serialized), _digest("chat", serialized)
+
+    @staticmethod
+    def _result(entry: Dict[str, Any]) -> ChatResult:
+        response = entry["response"]
+        message = AIMessage(
+            content=response.get("content", ""),
+            response_metadata=response.get("response_metadata") or {},
+            usage_metadata=response.get("usage_metadata"),
+        )
+        finish_reason = (response.get("response_metadata") or {}).get("finish_reason")
+        return ChatResult(generations=[
+            ChatGeneration(message=message, generation_info={"finish_reason": finish_reason} if finish_reason else None)
+        ])
+
+    def _record(self, messages: List[BaseMessage], message: AIMessage, seconds: float) -> None:
+        key, loose_key = self._keys(messages)
+        get_cassette().append({
+            "kind": "chat",
+            "key": key,
+            "loose_key": loose_key,
+            "model": self.model_name,
+            "request": _serialize_messages(messages),
+            "response": {
+                "content": message.content,
+                "response_metadata": {
+                    k: v for k, v in (message.response_metadata or {}).items() if k == "finish_reason"
+                },
+                "usage_metadata": dict(message.usage_metadata) if message.usage_metadata else None,
+            },
+            "latency_ms": round(seconds * 1000, 1),
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.inner is None:
+            entry = get_cassette().lookup(*self._keys(messages))
+            time.sleep(_replay_delay(entry))
+            return self._result(entry)
+        started = time.perf_counter()
+        message = self.inner.invoke(messages, stop=stop, **kwargs)
+        self._record(messages, message, time.perf_counter() - started)
+        return self._result({"response": {
+            "content": message.content,
+            "response_metadata": message.response_metadata,
+            "usage_metadata": message.usage_metadata,
+        }})
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.inner is None:
+            entry = get_cassette().lookup(*self._keys(messages))
+            await asyncio.sleep(_replay_delay(entry))
+            return self._result(entry)
+        started = time.perf_counter()
+        message = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+        self._record(messages, message, time.perf_counter() - started)
+        return self._result({"response": {
+            "content": message.content,
+            "response_metadata": message.response_metadata,
+            "usage_metadata": message.usage_metadata,
+        }})
+
+
+class CassetteEmbeddings(Embeddings):
+    """
+    Embeddings that record `inner` or replay from the cassette, one entry per text
+    (a batch's latency is split evenly across its texts and summed back on replay).
+    """
+
+    def __init__(self, model: str, inner: Optional[Embeddings] = None):
+        self.model = model
+        self.inner = inner
+
+    def _key(self, text: str, task: str) -> str:
+        return _digest("embedding", self.model, task, text)
+
+    def _replay(self, texts: List[str], task: str) -> List[List[float]]:
+        cassette = get_cassette()
+        entries = [cassette.lookup(self._key(text, task)) for text in texts]
+        time.sleep(sum(_replay_delay(entry) for entry in entries))
+        return [entry["vector"] for entry in entries]
+
+    def _record(self, texts: List[str], task: str, vectors: List[List[float]], seconds: float) -> None:
+        cassette = get_cassette()
+        per_text = seconds * 1000 / max(1, len(texts))
+        for text, vector in zip(texts, vectors):
+            cassette.append({
+                "kind": "embedding",
+                "key": self._key(text, task),
+                "model": self.model,
+                "task": task,
+                "request": text,
+                "vector": list(vector),
+                "latency_ms": round(per_text, 1),
+            })
+
+    def embed_documents(self, texts: List[str], task_type: Optional[str] = None, **kwargs) -> List[List[float]]:
+        # embed_queries_batched asks for RETRIEVAL_QUERY vectors through embed_documents
+        task = "query" if task_type == "RETRIEVAL_QUERY" else "document"
+        if self.inner is None:
+            return self._replay(texts, task)
+        started = time.perf_counter()
+        if task_type:
+            vectors = self.inner.embed_documents(texts, task_type=task_type, **kwargs)
+        else:
+            vectors = self.inner.embed_documents(texts, **kwargs)
+        self._record(texts, task, vectors, time.perf_counter() - started)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.inner is None:
+            return self._replay([text], "query")[0]
+        started = time.perf_counter()
+        vector = self.inner.embed_query(text)
+        self._record([text], "query", [vector], time.perf_counter() - started)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.to_thread(self.embed_query, text)
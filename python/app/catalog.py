@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+from .config import get_catalog_path, get_corpus_paths
+from .technologies import detect_technologies, display_name
+
+CATALOG_SCHEMA = 1
+
+# Skill tiers: whether the user already has skills related to the technology
+TIER_BEGINNER = "beginner"
+TIER_RELATED = "related"
+
+
+def corpus_fingerprint(paths: List[str] = None) -> str:
+    """
+    Stable hash of the RAG corpus source files. Bundles built against a
+    different fingerprint are considered stale.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(paths or get_corpus_paths()):
+        digest.update(path.encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()[:16]
+
+
+def normalize_deadline(deadline: str) -> str:
+    return " ".join((deadline or "").lower().split())
+
+
+def skill_tier(skills: List[Dict[str, Any]], technology: str) -> str:
+    for skill in skills or []:
+        if not isinstance(skill, dict):
+            continue
+        text = " ".join([skill.get("name") or ""] + list(skill.get("categories") or []))
+        if technology in detect_technologies(text):
+            return TIER_RELATED
+    return TIER_BEGINNER
+
+
+def bundle_key(technology: str, deadline: str, tier: str) -> str:
+    return f"{technology}|{normalize_deadline(deadline)}|{tier}"
+
+
+def tier_sample_skills(technology: str, tier: str) -> List[Dict[str, Any]]:
+    """Representative skills used when precomputing a bundle for a tier."""
+    if tier == TIER_RELATED:
+        return [{"name": display_name(technology), "proficiency": "Básico", "categories": []}]
+    return []
+
+
+def load_catalog(path: str = None) -> Optional[Dict[str, Any]]:
+    path = path or get_catalog_path()
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[CATALOG] Could not read catalog {path!r}: {e}")
+        return None
+
+
+def save_catalog(catalog: Dict[str, Any], path: str = None) -> None:
+    path = path or get_catalog_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+    # Atomic swap so running workers never read a half-written catalog
+    os.replace(tmp_path, path)
+
+
+def new_catalog(previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "schema": CATALOG_SCHEMA,
+        "version": ((previous or {}).get("version") or 0) + 1,
+        "corpus_fingerprint": corpus_fingerprint(),
+        "created_at": time.time(),
+        "bundles": {},
+    }
+
+
+def invalidate_catalog(path: str = None) -> bool:
+    """
+    Drops every bundle and bumps the catalog version. Call this whenever the RAG
+    corpus is re-indexed. Returns True if a catalog existed.
+    """
+    path = path or get_catalog_path()
+    catalog = load_catalog(path)
+    if catalog is None:
+        return False
+    save_catalog(new_catalog(catalog), path)
+    _loaded.clear()
+    print(f"[CATALOG] Invalidated catalog {path!r}")
+    return True
+
+
+# Parsed catalog per process, reloaded when the file changes on disk
+_loaded: Dict[str, Any] = {}
+
+
+def _current_catalog() -> Optional[Dict[str, Any]]:
+    path = get_catalog_path()
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    signature = (path, stat.st_mtime_ns, stat.st_size)
+    if _loaded.get("signature") != signature:
+        catalog = load_catalog(path)
+        fresh = bool(catalog) and catalog.get("corpus_fingerprint") == corpus_fingerprint()
+        if catalog and not fresh:
+            print("[CATALOG] Catalog was built for a different corpus; ignoring it")
+        _loaded.clear()
+        _loaded.update({"signature": signature, "catalog": catalog if fresh else None})
+    return _loaded.get("catalog")
+
+
+def lookup_bundle(objective: str, deadline: str, skills: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Returns a precomputed bundle (smart_objective, roadmap, final_assignment) for
+    objectives about exactly one catalogued technology, or None.
+    """
+    catalog = _current_catalog()
+    if not catalog:
+        return None
+    technologies = detect_technologies(objective)
+    if len(technologies) != 1:
+        return None
+    technology = technologies[0]
+    key = bundle_key(technology, deadline, skill_tier(skills, technology))
+    bundle = catalog.get("bundles", {}).get(key)
+    if bundle:
+        print(f"[CATALOG] Hit for {key} (catalog v{catalog.get('version')})")
+    return bundle
+
+
+def personalize_bundle(
+    bundle: Dict[str, Any], objective: str, skills: List[Dict[str, Any]], tier: str = "full"
+) -> Dict[str, str]:
+    """
+    Light, LLM-free personalization of a catalog bundle: echoes the user's own
+    objective and the related skills the roadmap builds on. Only the full latency
+    tier gets the final assignment, as when the graph runs.
+    """
+    smart = (bundle.get("smart_objective") or "").strip()
+    extra = [f"📝 _Tu objetivo:_ {objective.strip()}"] if objective and objective.strip() else []
+    technology = bundle.get("technology") or ""
+    related = [
+        s.get("name") for s in skills or []
+        if isinstance(s, dict) and s.get("name") and technology in detect_technologies(s.get("name"))
+    ]
+    if related:
+        extra.append(f"💡 _Partes de:_ {', '.join(related)}")
+    if extra:
+        smart = smart + "\n\n" + "\n".join(extra)
+    return {
+        "smart_objective": smart,
+        "roadmap": bundle.get("roadmap") or "",
+        "final_assignment": (bundle.get("final_assignment") or "") if tier == "full" else "",
+    }
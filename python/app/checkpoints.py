@@ -0,0 +1,276 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    WRITES_IDX_MAP,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from .config import get_checkpoint_backend, get_checkpoint_path, get_checkpoint_ttl_seconds
+
+# Minimum time between two garbage-collection passes
+GC_INTERVAL_SECONDS = 60.0
+
+
+class TTLMemorySaver(InMemorySaver):
+    """In-process checkpointer that remembers when each thread was last written, for TTL GC."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._touched: Dict[str, float] = {}
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        self._touched[config["configurable"]["thread_id"]] = time.time()
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._touched.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+    def gc(self, ttl_seconds: float) -> int:
+        cutoff = time.time() - ttl_seconds
+        # Copied first: GC runs in a worker thread while the loop keeps writing checkpoints
+        expired = [thread_id for thread_id, touched in list(self._touched.items()) if touched <= cutoff]
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+        return len(expired)
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """
+    Checkpointer backed by a local SQLite file (WAL mode), so a retry handled by another
+    worker process on the same host can resume the run. Each checkpoint is stored whole
+    (channel values included): pipeline states are small and runs have a handful of steps.
+    """
+
+    def __init__(self, path: str, *, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not be shared across fork(); reopen in each process
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+            " parent_checkpoint_id TEXT, type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_writes ("
+            " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+            " task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL, type TEXT, value BLOB,"
+            " task_path TEXT NOT NULL DEFAULT '',"
+            " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_checkpoints_created ON checkpoints(created_at)")
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+
+    def _row_to_tuple(self, conn: sqlite3.Connection, row: Tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM checkpoint_writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, v))) for task_id, channel, t, v in writes],
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id,
+                }}
+                if parent_id
+                else None
+            ),
+        )
+
+    def get_tuple(self, config) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            conn = self._connect()
+            if checkpoint_id := get_checkpoint_id(config):
+                row = conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._row_to_tuple(conn, row) if row else None
+
+    def list(self, config, *, filter: Optional[Dict[str, Any]] = None, before=None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,"
+            " metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if "checkpoint_ns" in config["configurable"]:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            conn = self._connect()
+            tuples = [self._row_to_tuple(conn, row) for row in conn.execute(query, params).fetchall()]
+        count = 0
+        for item in tuples:
+            if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            yield item
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+    def put(self, config, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO checkpoints(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,"
+                " type, checkpoint, metadata_type, metadata, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                    type_, data, metadata_type, metadata_data, time.time(),
+                ),
+            )
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(self, config, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self.serde.dumps_typed(value)
+            rows.append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id,
+                WRITES_IDX_MAP.get(channel, idx), channel, type_, data, task_path,
+            ))
+        # Special channels (errors, interrupts; negative idx) replace earlier writes, regular ones are kept
+        columns = "thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path"
+        with self._lock:
+            conn = self._connect()
+            for verb, batch in (
+                ("INSERT OR REPLACE", [r for r in rows if r[4] < 0]),
+                ("INSERT OR IGNORE", [r for r in rows if r[4] >= 0]),
+            ):
+                if batch:
+                    conn.executemany(
+                        f"{verb} INTO checkpoint_writes({columns}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch
+                    )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM checkpoint_writes WHERE thread_id = ?", (thread_id,))
+
+    def gc(self, ttl_seconds: float) -> int:
+        """Deletes every thread whose newest checkpoint is older than the TTL."""
+        cutoff = time.time() - ttl_seconds
+        with self._lock:
+            conn = self._connect()
+            expired = [row[0] for row in conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) <= ?", (cutoff,)
+            ).fetchall()]
+            for thread_id in expired:
+                conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                conn.execute("DELETE FROM checkpoint_writes WHERE thread_id = ?", (thread_id,))
+        return len(expired)
+
+    # SQLite may wait up to its busy timeout on another worker's write lock: run it off the event loop
+    async def aget_tuple(self, config) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_checkpointer: Dict[str, Any] = {}
+_last_gc = 0.0
+
+
+def get_checkpointer():
+    """
+    Returns the process-wide checkpointer selected by CHECKPOINT_BACKEND
+    ("memory", "sqlite" or "none"), or None when checkpointing is disabled.
+    """
+    backend = get_checkpoint_backend()
+    if backend not in ("memory", "sqlite"):
+        return None
+    key = f"{backend}:{get_checkpoint_path() if backend == 'sqlite' else ''}"
+    if key not in _checkpointer:
+        _checkpointer.clear()
+        _checkpointer[key] = SqliteCheckpointSaver(get_checkpoint_path()) if backend == "sqlite" else TTLMemorySaver()
+    return _checkpointer[key]
+
+
+def maybe_gc_checkpoints(force: bool = False) -> int:
+    """Drops threads older than CHECKPOINT_TTL_SECONDS, at most once per GC_INTERVAL_SECONDS."""
+    global _last_gc
+    saver = get_checkpointer()
+    now = time.time()
+    if saver is None or (not force and now - _last_gc < GC_INTERVAL_SECONDS):
+        return 0
+    _last_gc = now
+    try:
+        removed = saver.gc(get_checkpoint_ttl_seconds())
+    except Exception as e:
+        print(f"[CHECKPOINT] GC failed: {e}")
+        return 0
+    if removed:
+        print(f"[CHECKPOINT] GC removed {removed} expired run(s)")
+    return removed
@@ -0,0 +1,207 @@
+"""
+Circuit breakers per external dependency: one per LLM model ("llm:<model>"), the
+embeddings API ("embeddings") and the vector database ("vector_db").
+
+A breaker looks at the calls of the last BREAKER_WINDOW_SECONDS. With at least
+BREAKER_MIN_CALLS calls, it opens when the failure rate (errors and timeouts)
+reaches BREAKER_FAILURE_RATE. It also opens when the share of calls slower than
+BREAKER_SLOW_CALL_MS reaches BREAKER_SLOW_CALL_RATE. While open, calls are rejected
+at once with CircuitOpenError, so nodes take their fallback paths without waiting
+for the dependency to time out. After BREAKER_OPEN_SECONDS, one probe call goes
+through (half-open): a success closes the breaker and a failure opens it again.
+snapshot() is exported by GET /breakers/stats.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from .config import (
+    get_breaker_enabled,
+    get_breaker_window_seconds,
+    get_breaker_min_calls,
+    get_breaker_failure_rate,
+    get_breaker_slow_call_ms,
+    get_breaker_slow_call_rate,
+    get_breaker_open_seconds,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """The dependency's breaker is open: the call was not made."""
+
+    def __init__(self, name: str):
+        super().__init__(f"circuit open: {name}")
+        self.name = name
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        # (monotonic timestamp, failed, slow)
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self.last_opened_at: Optional[float] = None
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - get_breaker_window_seconds()
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _open(self, now: float, reason: str) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self.opened += 1
+        self.last_opened_at = time.time()
+        print(f"[BREAKER] {self.name} opened ({reason}); failing fast for {get_breaker_open_seconds():.0f} s")
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (does not take the half-open probe)."""
+        if not get_breaker_enabled():
+            return False
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self._opened_at < get_breaker_open_seconds()
+            return self.state == HALF_OPEN and self._probe_in_flight
+
+    def check(self) -> None:
+        """Raises CircuitOpenError unless a call may go through now (taking the probe slot when half-open)."""
+        if not get_breaker_enabled():
+            return
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= get_breaker_open_seconds():
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+                print(f"[BREAKER] {self.name} half-open, probing")
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(self.name)
+
+    def release(self) -> None:
+        """A call that went through ended without a verdict on the dependency (cancelled, cassette miss)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record(self, seconds: float, error: Optional[BaseException] = None) -> None:
+        """Outcome of a call that went through; timeouts are errors."""
+        if not get_breaker_enabled():
+            return
+        now = time.monotonic()
+        slow_ms = get_breaker_slow_call_ms()
+        failed = error is not None
+        slow = bool(slow_ms) and seconds * 1000 >= slow_ms
+        with self._lock:
+            if failed:
+                self.last_error = f"{type(error).__name__}: {error}"[:200]
+            if self.state == HALF_OPEN:
+                if failed or slow:
+                    self._open(now, "probe failed" if failed else "probe slow")
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    self._probe_in_flight = False
+                    print(f"[BREAKER] {self.name} closed")
+                return
+            if self.state == OPEN:
+                return
+            self._calls.append((now, failed, slow))
+            self._trim(now)
+            calls = len(self._calls)
+            if calls < get_breaker_min_calls():
+                return
+            failures = sum(1 for _, f, _ in self._calls if f)
+            slow_calls = sum(1 for _, _, s in self._calls if s)
+            if failures / calls >= get_breaker_failure_rate():
+                self._open(now, f"{failures}/{calls} failed")
+            elif slow_ms and slow_calls / calls >= get_breaker_slow_call_rate():
+                self._open(now, f"{slow_calls}/{calls} over {slow_ms:.0f} ms")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._calls)
+            failures = sum(1 for _, f, _ in self._calls if f)
+            slow_calls = sum(1 for _, _, s in self._calls if s)
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "window_failure_rate": round(failures / calls, 3) if calls else None,
+                "window_slow_rate": round(slow_calls / calls, 3) if calls else None,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "last_opened_at": self.last_opened_at,
+                "last_error": self.last_error,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _registry_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def snapshot() -> Dict[str, Any]:
+    return {
+        "enabled": get_breaker_enabled(),
+        "breakers": {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())},
+    }
+
+
+class BreakerEmbeddings:
+    """Wraps an embeddings client so its calls go through the "embeddings" breaker."""
+
+    def __init__(self, embeddings):
+        self._embeddings = embeddings
+        self._breaker = get_breaker("embeddings")
+
+    def __getattr__(self, name):
+        return getattr(self._embeddings, name)
+
+    def _call(self, method: str, *args, **kwargs):
+        self._breaker.check()
+        started = time.perf_counter()
+        try:
+            result = getattr(self._embeddings, method)(*args, **kwargs)
+        except (LookupError, TypeError):
+            # Cassette miss or unsupported argument: nothing is wrong with the provider
+            self._breaker.release()
+            raise
+        except Exception as e:
+            self._breaker.record(time.perf_counter() - started, e)
+            raise
+        self._breaker.record(time.perf_counter() - started)
+        return result
+
+    def embed_documents(self, texts, **kwargs):
+        return self._call("embed_documents", texts, **kwargs)
+
+    def embed_query(self, text):
+        return self._call("embed_query", text)
+
+    async def aembed_documents(self, texts):
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text):
+        return await asyncio.to_thread(self.embed_query, text)
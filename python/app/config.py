@@ -1,4 +1,5 @@
 import os
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables once at startup
@@ -9,7 +10,430 @@ def get_google_model_name() -> str:
     return os.getenv("GOOGLE_MODEL", "gemini-2.5-flash")
 
 
+def get_google_lite_model_name() -> str:
+    """Faster tier, for the nodes listed in LLM_LITE_NODES and as the router's fallback tier."""
+    return os.getenv("GOOGLE_MODEL_LITE", "gemini-2.5-flash-lite")
+
+
+def get_lite_nodes() -> List[str]:
+    """Nodes opted into the lite tier (comma-separated LLM_LITE_NODES, e.g. "reviewer,smart_obj"); empty by default."""
+    raw = os.getenv("LLM_LITE_NODES", "")
+    return [n.strip().lower() for n in raw.split(",") if n.strip()]
+
+
+def get_node_model_override(node: str) -> str:
+    """Model pinned for one node (GOOGLE_MODEL_<NODE>, e.g. GOOGLE_MODEL_ROADMAP); empty uses the node's tier."""
+    return os.getenv(f"GOOGLE_MODEL_{node.upper()}", "").strip()
+
+
+def get_node_max_output_tokens(node: str, default: int) -> int:
+    """Output-token cap passed to the model for one node (LLM_MAX_OUTPUT_TOKENS_<NODE>); 0 removes the cap."""
+    try:
+        return max(0, int(os.getenv(f"LLM_MAX_OUTPUT_TOKENS_{node.upper()}", str(default))))
+    except Exception:
+        return default
+
+
+def get_roadmap_tokens_per_step() -> int:
+    """Roadmap output budget per step; the step count follows the deadline."""
+    try:
+        return max(32, int(os.getenv("ROADMAP_TOKENS_PER_STEP", "120")))
+    except Exception:
+        return 120
+
+
+def get_roadmap_mode() -> str:
+    """
+    "single" (default): one call writes the whole roadmap. "outline": a short call
+    plans the steps, then every step is written concurrently. "auto": outline only
+    for deadlines of at least ROADMAP_OUTLINE_MIN_DAYS (the long roadmaps).
+    """
+    mode = os.getenv("ROADMAP_MODE", "single").strip().lower()
+    return mode if mode in ("single", "outline", "auto") else "single"
+
+
+def get_roadmap_outline_min_days() -> int:
+    try:
+        return max(0, int(os.getenv("ROADMAP_OUTLINE_MIN_DAYS", "46")))
+    except Exception:
+        return 46
+
+
+def get_llm_output_token_headroom() -> Optional[int]:
+    """
+    Added to every output cap, for models that count thinking tokens against it (e.g.
+    gemini-2.5-flash). None when LLM_OUTPUT_TOKEN_HEADROOM is unset: llm.py then picks a per-model default.
+    """
+    raw = os.getenv("LLM_OUTPUT_TOKEN_HEADROOM", "").strip()
+    if not raw:
+        return None
+    try:
+        return max(0, int(raw))
+    except Exception:
+        return None
+
+
+def get_llm_router_p95_ms() -> float:
+    """Latency-aware routing: while a model's recent p95 exceeds this, its nodes move to a faster tier. 0 disables it."""
+    try:
+        return float(os.getenv("LLM_ROUTER_P95_MS", "0"))
+    except Exception:
+        return 0.0
+
+
+def get_llm_router_min_samples() -> int:
+    """Calls needed in the window before a model's p95 is trusted for routing."""
+    try:
+        return max(1, int(os.getenv("LLM_ROUTER_MIN_SAMPLES", "20")))
+    except Exception:
+        return 20
+
+
+def get_llm_latency_window_seconds() -> float:
+    """Age of the latency samples behind the p95; older samples expire so a demoted model gets retried."""
+    try:
+        return float(os.getenv("LLM_LATENCY_WINDOW_SECONDS", "300"))
+    except Exception:
+        return 300.0
+
+
+def get_prompt_context_cache() -> bool:
+    """Store the static system prompts as Gemini CachedContent resources (see prompt_cache.py)."""
+    return os.getenv("PROMPT_CONTEXT_CACHE", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_prompt_cache_ttl_seconds() -> float:
+    try:
+        return max(60.0, float(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600")))
+    except Exception:
+        return 3600.0
+
+
+def get_prompt_cache_min_tokens() -> int:
+    """Smallest system prompt worth caching; Gemini rejects cached contents under its model minimum."""
+    try:
+        return max(0, int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024")))
+    except Exception:
+        return 1024
+
+
+def get_cassette_mode() -> str:
+    """LLM/embeddings cassette: "record" saves every call to LLM_CASSETTE_PATH, "replay" serves them offline; empty is off."""
+    return os.getenv("LLM_CASSETTE_MODE", "").strip().lower()
+
+
+def get_cassette_path() -> str:
+    return os.getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl")
+
+
+def get_cassette_latency_scale() -> float:
+    """Replay waits recorded latency * scale: 1 reproduces it, 0 answers immediately."""
+    try:
+        return max(0.0, float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1")))
+    except Exception:
+        return 1.0
+
+
+def get_admin_token() -> str:
+    """Token required (X-Admin-Token header) by the /debug endpoints; empty disables them."""
+    return os.getenv("ADMIN_TOKEN", "").strip()
+
+
+def get_profile_max_seconds() -> float:
+    """Longest /debug/profile session."""
+    try:
+        return max(1.0, float(os.getenv("PROFILE_MAX_SECONDS", "60")))
+    except Exception:
+        return 60.0
+
+
+def get_profile_interval_ms() -> float:
+    """Default sampling interval of /debug/profile (10 ms minimum)."""
+    try:
+        return max(10.0, float(os.getenv("PROFILE_INTERVAL_MS", "10")))
+    except Exception:
+        return 10.0
+
+
+def get_loop_monitor() -> bool:
+    """Event-loop lag monitor in the server (see loop_monitor.py)."""
+    return os.getenv("LOOP_MONITOR", "1").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_loop_monitor_interval_ms() -> float:
+    try:
+        return max(10.0, float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100")))
+    except Exception:
+        return 100.0
+
+
+def get_loop_slow_callback_ms() -> float:
+    """A callback holding the event loop longer than this gets its stack recorded."""
+    try:
+        return max(10.0, float(os.getenv("LOOP_SLOW_CALLBACK_MS", "100")))
+    except Exception:
+        return 100.0
+
+
+def get_breaker_enabled() -> bool:
+    """Circuit breakers for the LLM models, embeddings and vector DB (see circuit_breaker.py)."""
+    return os.getenv("BREAKER_ENABLED", "1").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_breaker_window_seconds() -> float:
+    try:
+        return max(1.0, float(os.getenv("BREAKER_WINDOW_SECONDS", "60")))
+    except Exception:
+        return 60.0
+
+
+def get_breaker_min_calls() -> int:
+    """Calls in the window before a breaker may open."""
+    try:
+        return max(1, int(os.getenv("BREAKER_MIN_CALLS", "5")))
+    except Exception:
+        return 5
+
+
+def get_breaker_failure_rate() -> float:
+    try:
+        return min(1.0, max(0.01, float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))))
+    except Exception:
+        return 0.5
+
+
+def get_breaker_slow_call_ms() -> float:
+    """Calls at least this slow count as slow for the latency trip; 0 disables it."""
+    try:
+        return max(0.0, float(os.getenv("BREAKER_SLOW_CALL_MS", "20000")))
+    except Exception:
+        return 20000.0
+
+
+def get_breaker_slow_call_rate() -> float:
+    try:
+        return min(1.0, max(0.01, float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))))
+    except Exception:
+        return 0.8
+
+
+def get_breaker_open_seconds() -> float:
+    """How long an open breaker fails fast before letting a probe through."""
+    try:
+        return max(1.0, float(os.getenv("BREAKER_OPEN_SECONDS", "30")))
+    except Exception:
+        return 30.0
+
+
 def get_google_api_key() -> str:
     return os.getenv("GOOGLE_API_KEY", "")
 
 
+def get_llm_timeout_seconds() -> float:
+    """Per-call LLM timeout; on expiry nodes switch to their fallback. 0 disables it."""
+    try:
+        return float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    except Exception:
+        return 30.0
+
+
+def get_cache_path() -> str:
+    """Path of the shared SQLite cache file; empty disables the shared cache."""
+    return os.getenv("AGENT_CACHE_PATH", "")
+
+
+def get_cache_max_entries() -> int:
+    try:
+        return int(os.getenv("AGENT_CACHE_MAX_ENTRIES", "5000"))
+    except Exception:
+        return 5000
+
+
+def get_cache_ttl_seconds() -> float:
+    try:
+        return float(os.getenv("AGENT_CACHE_TTL_SECONDS", "86400"))
+    except Exception:
+        return 86400.0
+
+
+def get_batch_max_concurrency() -> int:
+    try:
+        return max(1, int(os.getenv("BATCH_MAX_CONCURRENCY", "4")))
+    except Exception:
+        return 4
+
+
+def get_corpus_paths() -> List[str]:
+    """Markdown files that make up the RAG corpus (comma-separated RAG_CORPUS_PATHS)."""
+    default = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "docker_learning_notes.md"))
+    raw = os.getenv("RAG_CORPUS_PATHS", default)
+    return [p.strip() for p in raw.split(",") if p.strip()]
+
+
+def get_catalog_path() -> str:
+    """Path of the precomputed roadmap catalog; empty disables catalog lookups."""
+    return os.getenv("ROADMAP_CATALOG_PATH", "")
+
+
+def get_trace_exporter() -> str:
+    """Where sampled spans go: "langsmith", "jsonl" (local file, no network) or "none"."""
+    return os.getenv("TRACE_EXPORTER", "langsmith").strip().lower()
+
+
+def get_trace_sample_rate() -> float:
+    """Fraction of requests (root spans) that are traced; children follow the root's decision."""
+    try:
+        return min(1.0, max(0.0, float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))))
+    except Exception:
+        return 1.0
+
+
+def get_trace_max_field_chars() -> int:
+    try:
+        return int(os.getenv("TRACE_MAX_FIELD_CHARS", "500"))
+    except Exception:
+        return 500
+
+
+def get_trace_redact_fields() -> List[str]:
+    raw = os.getenv("TRACE_REDACT_FIELDS", "context,roadmap,final_assignment,query_embedding,skills")
+    return [f.strip() for f in raw.split(",") if f.strip()]
+
+
+def get_trace_jsonl_path() -> str:
+    return os.getenv("TRACE_JSONL_PATH", "traces.jsonl")
+
+
+def get_checkpoint_backend() -> str:
+    """Where graph checkpoints live: "memory" (per process), "sqlite" (CHECKPOINT_PATH) or "none"."""
+    return os.getenv("CHECKPOINT_BACKEND", "memory").strip().lower()
+
+
+def get_checkpoint_path() -> str:
+    return os.getenv("CHECKPOINT_PATH", "agent_checkpoints.sqlite")
+
+
+def get_checkpoint_ttl_seconds() -> float:
+    """How long checkpoints of a run (finished or not) are kept for retries."""
+    try:
+        return float(os.getenv("CHECKPOINT_TTL_SECONDS", "3600"))
+    except Exception:
+        return 3600.0
+
+
+def get_vector_db_pool_size() -> int:
+    """Pooled Postgres connections per worker, shared by every collection."""
+    try:
+        return max(1, int(os.getenv("VECTOR_DB_POOL_SIZE", "5")))
+    except Exception:
+        return 5
+
+
+def get_vector_db_max_overflow() -> int:
+    try:
+        return max(0, int(os.getenv("VECTOR_DB_MAX_OVERFLOW", "5")))
+    except Exception:
+        return 5
+
+
+def get_warmup_ping() -> bool:
+    """Startup warm-up also sends one tiny call to Gemini, the embeddings API and Postgres."""
+    return os.getenv("WARMUP_PING", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_vector_index_method() -> str:
+    """ANN index built by build_index on the embedding column: "hnsw", "ivfflat" or "none"."""
+    return os.getenv("VECTOR_INDEX_METHOD", "hnsw").strip().lower()
+
+
+def get_hnsw_m() -> int:
+    try:
+        return int(os.getenv("VECTOR_HNSW_M", "16"))
+    except Exception:
+        return 16
+
+
+def get_hnsw_ef_construction() -> int:
+    try:
+        return int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "64"))
+    except Exception:
+        return 64
+
+
+def get_ivfflat_lists() -> int:
+    """IVFFlat list count; 0 picks it from the row count at build time."""
+    try:
+        return int(os.getenv("VECTOR_IVFFLAT_LISTS", "0"))
+    except Exception:
+        return 0
+
+
+def get_hnsw_ef_search() -> int:
+    """Default HNSW candidate list per query (higher = better recall, slower)."""
+    try:
+        return int(os.getenv("RAG_HNSW_EF_SEARCH", "40"))
+    except Exception:
+        return 40
+
+
+def get_ivfflat_probes() -> int:
+    """Default IVFFlat lists scanned per query (higher = better recall, slower)."""
+    try:
+        return int(os.getenv("RAG_IVFFLAT_PROBES", "10"))
+    except Exception:
+        return 10
+
+
+def get_hnsw_iterative_scan() -> str:
+    """pgvector >= 0.8 only: "relaxed_order" or "strict_order" keeps filtered HNSW scans from returning < k rows."""
+    return os.getenv("RAG_HNSW_ITERATIVE_SCAN", "").strip()
+
+
+def get_rag_quantization() -> str:
+    """Compressed index searched by RAG: "none" (full-precision index), "halfvec" or "binary"."""
+    return os.getenv("RAG_QUANTIZATION", "none").strip().lower()
+
+
+def get_rag_truncate_dims() -> int:
+    """Search on the first N embedding dimensions only; 0 keeps all of them."""
+    try:
+        return max(0, int(os.getenv("RAG_TRUNCATE_DIMS", "0")))
+    except Exception:
+        return 0
+
+
+def get_rag_rescore_factor() -> int:
+    """Candidates fetched per result (k * factor) before full-precision rescoring."""
+    try:
+        return int(os.getenv("RAG_RESCORE_FACTOR", "4"))
+    except Exception:
+        return 4
+
+
+def get_chunk_max_tokens() -> int:
+    """Token ceiling per indexed chunk (longer sections are split with overlap)."""
+    try:
+        return max(32, int(os.getenv("RAG_CHUNK_MAX_TOKENS", "200")))
+    except Exception:
+        return 200
+
+
+def get_chunk_overlap_tokens() -> int:
+    try:
+        return max(0, int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "30")))
+    except Exception:
+        return 30
+
+
+def get_default_latency_tier() -> str:
+    """Pipeline tier for requests that do not ask for one: "fast", "standard" or "full" (see pipeline.LATENCY_TIERS)."""
+    tier = os.getenv("PIPELINE_LATENCY_TIER", "full").strip().lower()
+    return tier if tier in ("fast", "standard", "full") else "full"
+
+
+def get_rag_top_k() -> int:
+    """Chunks retrieved per objective; chunks are section-sized, so a few are needed."""
+    try:
+        return max(1, int(os.getenv("RAG_TOP_K", "3")))
+    except Exception:
+        return 3
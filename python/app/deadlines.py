@@ -0,0 +1,102 @@
+import functools
+import re
+from typing import NamedTuple, Optional, Union
+
+
+class Duration(NamedTuple):
+    """Normalized deadline: total days plus the canonical Spanish label (e.g. "2 semanas")."""
+    days: int
+    label: str
+
+
+# unit -> (days per unit, singular, plural)
+_UNITS = {
+    "día": (1, "día", "días"),
+    "semana": (7, "semana", "semanas"),
+    "mes": (30, "mes", "meses"),
+    "año": (365, "año", "años"),
+}
+
+_UNIT_ALIASES = {
+    "día": "día", "días": "día", "dia": "día", "dias": "día", "day": "día", "days": "día",
+    "semana": "semana", "semanas": "semana", "week": "semana", "weeks": "semana",
+    "mes": "mes", "meses": "mes", "month": "mes", "months": "mes",
+    "año": "año", "años": "año", "ano": "año", "anos": "año", "year": "año", "years": "año",
+}
+
+_NUMBER_WORDS = {
+    "un": 1, "una": 1, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5,
+    "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10, "once": 11, "doce": 12,
+    "quince": 15, "veinte": 20, "treinta": 30,
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+}
+
+# Count as 1 only right after "en"/"in" ("in a month"): bare, they are the Spanish
+# preposition of idioms like "día a día" or "mes a mes"
+_ARTICLES = {"a", "an"}
+
+# One precompiled pattern: optional "en"/"in" prefix, a number (digits or word), a unit
+_DEADLINE_RE = re.compile(
+    r"(?<!\w)(?P<prefix>(?:en|in)\s+)?"
+    r"(?P<number>\d+|" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + r")\s*"
+    r"(?P<unit>" + "|".join(sorted(_UNIT_ALIASES, key=len, reverse=True)) + r")(?!\w)",
+    re.IGNORECASE,
+)
+
+DEFAULT_DEADLINE = Duration(30, "1 mes")
+
+
+def _label(value: int, unit: str) -> str:
+    _, singular, plural = _UNITS[unit]
+    return f"{value} {singular if value == 1 else plural}"
+
+
+def parse_deadline(text: str) -> Optional[Duration]:
+    """
+    Parses the first deadline expression in `text` ("en 2 semanas", "tres meses",
+    "1 año"...). Expressions introduced by "en" win over bare ones. Returns None if
+    there is no deadline.
+    """
+    if not text:
+        return None
+    first = None
+    for match in _DEADLINE_RE.finditer(text):
+        if match.group("number").lower() in _ARTICLES and not match.group("prefix"):
+            continue
+        if match.group("prefix"):
+            first = match
+            break
+        if first is None:
+            first = match
+    if first is None:
+        return None
+    number = first.group("number").lower()
+    value = int(number) if number.isdigit() else _NUMBER_WORDS[number]
+    if value <= 0:
+        return None
+    unit = _UNIT_ALIASES[first.group("unit").lower()]
+    return Duration(value * _UNITS[unit][0], _label(value, unit))
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_cached(text: str) -> Duration:
+    return parse_deadline(text) or DEFAULT_DEADLINE
+
+
+def as_duration(deadline: Union[str, Duration, None]) -> Duration:
+    """Accepts an already parsed Duration (returned as-is) or a deadline string."""
+    if isinstance(deadline, Duration):
+        return deadline
+    return _parse_cached(deadline or "")
+
+
+def format_days(days: int) -> str:
+    """Human label for a span of days, in the coarsest unit that reads naturally."""
+    days = max(1, int(days))
+    if days < 7:
+        return _label(days, "día")
+    if days < 28:
+        return _label(max(1, round(days / 7)), "semana")
+    if days < 360:
+        return _label(max(1, round(days / 30)), "mes")
+    return _label(max(1, round(days / 365)), "año")
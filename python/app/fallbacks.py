@@ -0,0 +1,33 @@
+"""
+Which pipeline stages answered with a fallback (LLM error, timeout, open breaker,
+empty output, failed search) instead of their real output.
+
+A pipeline node wraps its stage in track_fallbacks(); the stage's fallback paths
+call note_fallback(). The node then marks itself degraded in the graph state, so a
+checkpointed retry re-runs it instead of replaying the degraded result (see
+pipeline._invoke_checkpointed). Outside track_fallbacks() note_fallback() is a no-op.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+# One list per tracked stage; tasks and asyncio.to_thread workers started inside
+# it copy the context, and so share (and append to) the same list
+_used: ContextVar[Optional[List[str]]] = ContextVar("fallbacks_used", default=None)
+
+
+def note_fallback(stage: str) -> None:
+    used = _used.get()
+    if used is not None:
+        used.append(stage)
+
+
+@contextmanager
+def track_fallbacks() -> Iterator[List[str]]:
+    """Yields the list of fallbacks noted while the block runs."""
+    used: List[str] = []
+    token = _used.set(used)
+    try:
+        yield used
+    finally:
+        _used.reset(token)
@@ -1,24 +1,279 @@
-from typing import Optional
-from .config import get_google_model_name, get_google_api_key
+import asyncio
+import importlib
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+from .config import (
+    get_google_model_name,
+    get_google_lite_model_name,
+    get_lite_nodes,
+    get_google_api_key,
+    get_node_model_override,
+    get_llm_router_p95_ms,
+    get_llm_router_min_samples,
+    get_node_max_output_tokens,
+    get_roadmap_tokens_per_step,
+    get_llm_output_token_headroom,
+    get_cassette_mode,
+    get_prompt_context_cache,
+    get_llm_timeout_seconds,
+)
+from .llm_metrics import get_llm_metrics, usage_callback
+from .circuit_breaker import get_breaker
+from .tracing import langchain_tracing
 
+# Nodes that call the LLM. All use the standard tier (GOOGLE_MODEL) unless opted into
+# the lite tier with LLM_LITE_NODES (the short reviewer and smart_obj stages are the candidates)
+NODE_TIERS = {
+    "reviewer": "standard",
+    "smart_obj": "standard",
+    "roadmap": "standard",
+    "roadmap_outline": "standard",
+    "roadmap_step": "standard",
+    "final_assignment": "standard",
+}
 
-def build_chat_llm():
+
+def node_tier(node: str) -> str:
+    return "lite" if node in get_lite_nodes() else NODE_TIERS.get(node, "standard")
+
+
+# Default output budgets in tokens (LLM_MAX_OUTPUT_TOKENS_<NODE> overrides them).
+# The reviewer answers a one-line JSON; the final assignment is shown up to 1000 chars.
+# In ROADMAP_MODE=outline the outline is a JSON list of titles and days, and each
+# step is a description plus a links line.
+NODE_MAX_OUTPUT_TOKENS = {
+    "reviewer": 64,
+    "smart_obj": 256,
+    "roadmap_outline": 200,
+    "roadmap_step": 120,
+    "final_assignment": 400,
+}
+
+# Generation stops here: a second paragraph after the reviewer's JSON, or a final
+# project section the roadmap prompt forbids (it is produced by final_assignment)
+NODE_STOP_SEQUENCES = {
+    "reviewer": ["\n\n"],
+    "roadmap": ["Proyecto final", "Proyecto Final", "PROYECTO FINAL", "Trabajo final", "TRABAJO FINAL"],
+    # A step expansion ends where a next step would start
+    "roadmap_step": ["*📚"],
+}
+
+# Where each node's system prompt is built: (module in app.nodes, builder)
+NODE_PROMPTS = {
+    "reviewer": ("reviewer", "build_prompt"),
+    "smart_obj": ("smart_obj", "build_prompt"),
+    "roadmap": ("roadmap", "build_prompt"),
+    "roadmap_outline": ("roadmap", "build_outline_prompt"),
+    "roadmap_step": ("roadmap", "build_step_prompt"),
+    "final_assignment": ("final_assignment", "build_prompt"),
+}
+
+# (max deadline days, max roadmap steps), mirroring the step counts in the roadmap prompt
+_ROADMAP_STEPS = ((14, 3), (45, 4), (120, 6))
+_ROADMAP_MAX_STEPS = 8
+_ROADMAP_BASE_TOKENS = 150
+
+# Thinking models spend part of max_output_tokens on reasoning before the visible answer;
+# without room for it the node budgets above end in an empty MAX_TOKENS response
+_THINKING_MODEL_PREFIXES = ("gemini-2.5", "gemini-3")
+_THINKING_HEADROOM_TOKENS = 2048
+
+
+def tier_models() -> List[str]:
+    """Tier models ordered fastest first."""
+    return [get_google_lite_model_name(), get_google_model_name()]
+
+
+def configured_model(node: Optional[str] = None) -> str:
+    """Model configured for `node`: GOOGLE_MODEL_<NODE> if set, else its tier's model."""
+    if node:
+        override = get_node_model_override(node)
+        if override:
+            return override
+        if node_tier(node) == "lite":
+            return get_google_lite_model_name()
+    return get_google_model_name()
+
+
+def select_model(node: Optional[str] = None) -> str:
+    """
+    Model to call for `node`. With LLM_ROUTER_P95_MS set, a node whose model's recent
+    p95 is over the threshold moves to the next faster tier (down to the fastest).
+    Samples expire after LLM_LATENCY_WINDOW_SECONDS, so the configured model is tried
+    again once its slow calls age out.
+    """
+    model = configured_model(node)
+    threshold = get_llm_router_p95_ms()
+    if threshold <= 0:
+        return model
+    tiers = tier_models()
+    if model not in tiers:
+        return model
+    metrics = get_llm_metrics()
+    min_samples = get_llm_router_min_samples()
+    # Candidates from the configured model towards the fastest tier
+    candidates = list(reversed(tiers[:tiers.index(model) + 1]))
+    chosen = candidates[-1]
+    for candidate in candidates:
+        p95 = metrics.p95(candidate, min_samples)
+        if p95 is None or p95 <= threshold:
+            chosen = candidate
+            break
+    if chosen != model:
+        print(f"[LLM] Routing node={node} from {model} to {chosen} (p95 over {threshold:.0f} ms)")
+    return chosen
+
+
+def node_max_output_tokens(node: str) -> int:
+    return get_node_max_output_tokens(node, NODE_MAX_OUTPUT_TOKENS.get(node, 0))
+
+
+def output_token_headroom(model: str) -> int:
+    """LLM_OUTPUT_TOKEN_HEADROOM if set; else room for thinking on thinking models (flash-lite does not think by default)."""
+    configured = get_llm_output_token_headroom()
+    if configured is not None:
+        return configured
+    name = model.split("/")[-1]
+    if name.startswith(_THINKING_MODEL_PREFIXES) and "flash-lite" not in name:
+        return _THINKING_HEADROOM_TOKENS
+    return 0
+
+
+def roadmap_max_steps(deadline_days: int) -> int:
+    """Most roadmap steps the deadline allows."""
+    return next((n for days, n in _ROADMAP_STEPS if deadline_days <= days), _ROADMAP_MAX_STEPS)
+
+
+def roadmap_max_output_tokens(deadline_days: int) -> int:
+    """Roadmap budget: the number of steps the deadline allows times ROADMAP_TOKENS_PER_STEP."""
+    steps = roadmap_max_steps(deadline_days)
+    return get_node_max_output_tokens("roadmap", _ROADMAP_BASE_TOKENS + steps * get_roadmap_tokens_per_step())
+
+
+def context_cache_applies(node: Optional[str]) -> bool:
+    """
+    PROMPT_CONTEXT_CACHE is on and `node`'s system prompt reaches PROMPT_CACHE_MIN_TOKENS,
+    so it can be sent as a CachedContent reference. Otherwise the stock client is used.
+    """
+    if not node or node not in NODE_PROMPTS or not get_prompt_context_cache():
+        return False
+    module, builder = NODE_PROMPTS[node]
+    try:
+        prompt = getattr(importlib.import_module(f".nodes.{module}", __package__), builder)()
+        system = prompt.messages[0].prompt.template
+        from .prompt_cache import qualifies
+    except Exception:
+        return False
+    return qualifies(system)
+
+
+async def invoke_with_timeout(chain, variables: Dict[str, Any], node: str, model: str) -> str:
+    """
+    Runs the chain under LLM_TIMEOUT_SECONDS, recording its latency and outcome per model.
+    Raises CircuitOpenError without calling the model while its breaker is open.
+    """
+    breaker = get_breaker(f"llm:{model}")
+    breaker.check()
+    timeout = get_llm_timeout_seconds()
+    started = time.perf_counter()
+    outcome = "error"
+    error: Optional[BaseException] = None
+    try:
+        config = {"callbacks": [usage_callback(node)]}
+        # Not LangChain's own LangSmith run: it would export the whole prompt, unsampled and unredacted
+        with langchain_tracing(False):
+            if timeout and timeout > 0:
+                result = await asyncio.wait_for(chain.ainvoke(variables, config=config), timeout=timeout)
+            else:
+                result = await chain.ainvoke(variables, config=config)
+        outcome = "ok"
+        return result
+    except asyncio.TimeoutError as e:
+        outcome, error = "timeout", e
+        raise
+    except LookupError:
+        # Cassette miss: not a provider failure
+        outcome = "miss"
+        raise
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        get_llm_metrics().record(model, node, seconds, outcome)
+        if outcome in ("ok", "timeout") or error is not None:
+            breaker.record(seconds, error)
+        else:
+            breaker.release()
+
+
+class _NoLoop:
+    """Key for clients built outside an event loop (sync callers)."""
+
+
+_NO_LOOP = _NoLoop()
+# Clients are reused per event loop: Gemini's async (grpc.aio) channel belongs to the loop that opened it
+_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def build_chat_llm(model: Optional[str] = None, node: Optional[str] = None, max_output_tokens: Optional[int] = None):
     """
     Returns a LangChain chat model instance or None if not available/misconfigured.
+    `model` defaults to GOOGLE_MODEL; nodes pass select_model(<node>).
+    With `node`, the output is capped at its budget (unless `max_output_tokens` is
+    given) plus the model's thinking headroom (output_token_headroom), and generation ends at its stop sequences.
+    PROMPT_CONTEXT_CACHE=1 sends the system prompt as a provider cached-content reference
+    when it is big enough (context_cache_applies).
+    LLM_CASSETTE_MODE=record/replay wraps the model with the cassette (see cassette.py);
+    replay needs neither the API key nor network.
+    Instances are cached per event loop and configuration, so connections are reused.
     """
+    model = model or get_google_model_name()
+    if max_output_tokens is None and node:
+        max_output_tokens = node_max_output_tokens(node)
+    if max_output_tokens:
+        max_output_tokens += output_token_headroom(model)
+    stop = NODE_STOP_SEQUENCES.get(node) if node else None
+    key = (model, max_output_tokens or 0, tuple(stop or ()), get_cassette_mode(), context_cache_applies(node),
+           get_google_api_key())
     try:
-        from langchain_google_genai import ChatGoogleGenerativeAI
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = _NO_LOOP
+    clients = _clients.setdefault(loop, {})
+    if key not in clients:
+        llm = _new_chat_llm(model, max_output_tokens, key[3], key[4], key[5])
+        if llm is None:
+            return None
+        clients[key] = llm.bind(stop=stop) if stop else llm
+    return clients[key]
+
+
+def _new_chat_llm(model: str, max_output_tokens: Optional[int], mode: str, context_cache: bool, api_key: str):
+    if mode == "replay":
+        from .cassette import CassetteChatModel
+        return CassetteChatModel(model_name=model)
+
+    try:
+        if context_cache:
+            from .prompt_cache import GeminiChatModel as chat_model_class
+        else:
+            from langchain_google_genai import ChatGoogleGenerativeAI as chat_model_class
     except Exception:
         return None
 
-    api_key = get_google_api_key()
     if not api_key:
         return None
 
-    model = get_google_model_name()
+    limits = {"max_output_tokens": max_output_tokens} if max_output_tokens else {}
+    if context_cache:
+        limits["context_cache"] = True
     try:
-        return ChatGoogleGenerativeAI(model=model, api_key=api_key, temperature=0.2)
+        llm = chat_model_class(model=model, api_key=api_key, temperature=0.2, **limits)
     except Exception:
         return None
-
-
+    if mode == "record":
+        from .cassette import CassetteChatModel
+        llm = CassetteChatModel(model_name=model, inner=llm)
+    return llm
@@ -0,0 +1,198 @@
+"""
+In-process latency and usage metrics per LLM model.
+
+Every real model call (cache hits excluded) records its wall time, outcome and the
+node that made it. The recent p95 per model feeds the latency-aware router in
+llm.select_model; snapshot() is exported by GET /llm/stats.
+Per node, output tokens, generations cut by max_output_tokens and characters trimmed
+after generation show whether the output budgets match what is actually shown;
+cached vs. uncached input tokens show how much of the prompts the provider reused.
+"""
+import functools
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from .config import get_llm_latency_window_seconds
+
+# Samples kept per model, independent of the time window
+MAX_SAMPLES = 1000
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class _ModelStats:
+    __slots__ = ("calls", "outcomes", "nodes", "total_ms", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.outcomes: Counter = Counter()
+        self.nodes: Counter = Counter()
+        self.total_ms = 0.0
+        # (monotonic timestamp, latency ms)
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=MAX_SAMPLES)
+
+    def recent(self, window_seconds: float) -> List[float]:
+        if window_seconds <= 0:
+            return [ms for _, ms in self.samples]
+        cutoff = time.monotonic() - window_seconds
+        return [ms for ts, ms in self.samples if ts >= cutoff]
+
+
+class _NodeStats:
+    __slots__ = (
+        "generations", "input_tokens", "cached_input_tokens", "output_tokens", "finish_reasons", "trimmed", "trimmed_chars",
+    )
+
+    def __init__(self):
+        self.generations = 0
+        self.input_tokens = 0
+        self.cached_input_tokens = 0
+        self.output_tokens = 0
+        self.finish_reasons: Counter = Counter()
+        self.trimmed = 0
+        self.trimmed_chars = 0
+
+
+class LLMMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, _ModelStats] = {}
+        self._nodes: Dict[str, _NodeStats] = {}
+
+    def _node(self, node: str) -> _NodeStats:
+        stats = self._nodes.get(node)
+        if stats is None:
+            stats = self._nodes[node] = _NodeStats()
+        return stats
+
+    def record(self, model: str, node: str, seconds: float, outcome: str = "ok") -> None:
+        """`outcome` is "ok", "timeout" or "error"; timeouts count with their full wait."""
+        ms = seconds * 1000
+        with self._lock:
+            stats = self._models.get(model)
+            if stats is None:
+                stats = self._models[model] = _ModelStats()
+            stats.calls += 1
+            stats.outcomes[outcome] += 1
+            stats.nodes[node] += 1
+            stats.total_ms += ms
+            stats.samples.append((time.monotonic(), ms))
+
+    def record_generation(
+        self, node: str, input_tokens: int, output_tokens: int, finish_reason: str, cached_input_tokens: int = 0
+    ) -> None:
+        """`cached_input_tokens` is the part of `input_tokens` served from the provider's prompt cache."""
+        with self._lock:
+            stats = self._node(node)
+            stats.generations += 1
+            stats.input_tokens += input_tokens
+            stats.cached_input_tokens += cached_input_tokens
+            stats.output_tokens += output_tokens
+            stats.finish_reasons[finish_reason or "UNKNOWN"] += 1
+
+    def record_trim(self, node: str, chars: int) -> None:
+        """Characters of a generated output dropped before showing it (e.g. final_assignment's 1000-char cut)."""
+        if chars <= 0:
+            return
+        with self._lock:
+            stats = self._node(node)
+            stats.trimmed += 1
+            stats.trimmed_chars += chars
+
+    def p95(self, model: str, min_samples: int = 1) -> Optional[float]:
+        """Recent p95 latency (ms) of `model`, or None with fewer than `min_samples` calls in the window."""
+        window = get_llm_latency_window_seconds()
+        with self._lock:
+            stats = self._models.get(model)
+            recent = stats.recent(window) if stats else []
+        if len(recent) < max(1, min_samples):
+            return None
+        return _percentile(recent, 95)
+
+    def snapshot(self) -> Dict[str, Any]:
+        window = get_llm_latency_window_seconds()
+        models = {}
+        with self._lock:
+            for model, stats in self._models.items():
+                recent = stats.recent(window)
+                models[model] = {
+                    "calls": stats.calls,
+                    "outcomes": dict(stats.outcomes),
+                    "nodes": dict(stats.nodes),
+                    "avg_ms": round(stats.total_ms / stats.calls, 1) if stats.calls else None,
+                    "recent_calls": len(recent),
+                    "p50_ms": round(_percentile(recent, 50), 1) if recent else None,
+                    "p95_ms": round(_percentile(recent, 95), 1) if recent else None,
+                }
+            nodes = {
+                node: {
+                    "generations": stats.generations,
+                    "avg_output_tokens": round(stats.output_tokens / stats.generations, 1) if stats.generations else None,
+                    "input_tokens": stats.input_tokens,
+                    "cached_input_tokens": stats.cached_input_tokens,
+                    "uncached_input_tokens": stats.input_tokens - stats.cached_input_tokens,
+                    "cached_input_ratio": round(stats.cached_input_tokens / stats.input_tokens, 3) if stats.input_tokens else None,
+                    "output_tokens": stats.output_tokens,
+                    "finish_reasons": dict(stats.finish_reasons),
+                    "max_tokens_rate": round(stats.finish_reasons["MAX_TOKENS"] / stats.generations, 3) if stats.generations else None,
+                    "trimmed": stats.trimmed,
+                    "trimmed_chars": stats.trimmed_chars,
+                }
+                for node, stats in self._nodes.items()
+            }
+        return {"window_seconds": window, "models": models, "nodes": nodes}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._nodes.clear()
+
+
+@functools.lru_cache(maxsize=1)
+def _usage_callback_class():
+    """Built on first LLM call: importing langchain_core here would pull it into the server import."""
+    try:
+        from langchain_core.callbacks import BaseCallbackHandler
+    except Exception:  # langchain missing: nodes use their fallbacks and no usage is reported
+        BaseCallbackHandler = object
+
+    class UsageCallback(BaseCallbackHandler):
+        """Reads token usage and finish reason off each generation of a node's chain."""
+
+        def __init__(self, node: str):
+            self.node = node
+
+        def on_llm_end(self, response, **kwargs) -> None:
+            for generations in getattr(response, "generations", None) or []:
+                for generation in generations:
+                    info = generation.generation_info or {}
+                    message = getattr(generation, "message", None)
+                    usage = getattr(message, "usage_metadata", None) or {}
+                    finish_reason = str(info.get("finish_reason") or "")
+                    cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+                    _metrics.record_generation(
+                        self.node, usage.get("input_tokens", 0), usage.get("output_tokens", 0), finish_reason, cached
+                    )
+                    if finish_reason == "MAX_TOKENS":
+                        print(f"[LLM] node={self.node} hit max_output_tokens ({usage.get('output_tokens', 0)} visible tokens)")
+                        if not (generation.text or "").strip():
+                            print("[LLM] Empty output at the cap: thinking models count reasoning tokens, "
+                                  "raise LLM_OUTPUT_TOKEN_HEADROOM (the node falls back)")
+
+    return UsageCallback
+
+
+def usage_callback(node: str):
+    """Callback that reads token usage and finish reason off each generation of `node`'s chain."""
+    return _usage_callback_class()(node)
+
+
+_metrics = LLMMetrics()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    return _metrics
@@ -0,0 +1,174 @@
+"""
+Event-loop lag monitor (LOOP_MONITOR, on by default in the server).
+
+A heartbeat coroutine sleeps LOOP_MONITOR_INTERVAL_MS and records how late it woke
+up: that scheduling delay is what every concurrent request on the worker waits
+for, and it goes into a histogram. A watchdog thread checks the heartbeat. When
+the loop has not ticked for LOOP_SLOW_CALLBACK_MS past its interval, a callback is
+blocking it, so the watchdog captures the loop thread's stack right then, while
+the blocking code is still running. Stalls are grouped by the innermost app frame
+(the blocking call site) and logged, so new blocking calls in async nodes show up
+in GET /loop/stats without anyone looking for them.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+from .config import get_loop_monitor_interval_ms, get_loop_slow_callback_ms
+
+# Upper bounds (ms) of the lag histogram buckets; the last one is open
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+MAX_STALLS = 50
+MAX_DEPTH = 40
+RECENT_SAMPLES = 3000
+
+# The python/ package (app and server): frames outside it are library code
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _frame_label(frame) -> str:
+    path = frame.f_code.co_filename
+    path = os.path.relpath(path, _APP_DIR) if path.startswith(_APP_DIR) else os.path.basename(path)
+    return f"{path}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def _stack(frame) -> List[str]:
+    """Innermost-first frame labels."""
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    return stack
+
+
+def _culprit(frame) -> str:
+    """Innermost frame in this package: the call site that blocked the loop."""
+    innermost = frame
+    while frame is not None:
+        if frame.f_code.co_filename.startswith(_APP_DIR) and "loop_monitor" not in frame.f_code.co_filename:
+            return _frame_label(frame)
+        frame = frame.f_back
+    return _frame_label(innermost) if innermost is not None else "unknown"
+
+
+class LoopMonitor:
+    def __init__(self, interval_ms: float, slow_ms: float):
+        self.interval = interval_ms / 1000
+        self.slow = slow_ms / 1000
+        self._lock = threading.Lock()
+        self._buckets: Counter = Counter()
+        self._recent: Deque[float] = deque(maxlen=RECENT_SAMPLES)
+        self._ticks = 0
+        self._max_ms = 0.0
+        self._stalls: Deque[Dict[str, Any]] = deque(maxlen=MAX_STALLS)
+        self._culprits: Counter = Counter()
+        self._current: Optional[Dict[str, Any]] = None
+        self._last_tick = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Starts the heartbeat on the running loop and the watchdog thread."""
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(target=self._watchdog, name="loop-monitor", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+            self._record(max(0.0, now - expected) * 1000)
+
+    def _record(self, lag_ms: float) -> None:
+        bucket = next((b for b in LAG_BUCKETS_MS if lag_ms <= b), "inf")
+        with self._lock:
+            self._ticks += 1
+            self._buckets[bucket] += 1
+            self._recent.append(lag_ms)
+            self._max_ms = max(self._max_ms, lag_ms)
+            stall, self._current = self._current, None
+            if stall is not None:
+                stall["ms"] = round(lag_ms, 1)
+                self._stalls.append(stall)
+        if stall is not None:
+            print(f"[LOOP] Event loop blocked {lag_ms:.0f} ms at {stall['culprit']}")
+
+    def _watchdog(self) -> None:
+        check = max(0.005, self.slow / 4)
+        while not self._stop.wait(check):
+            late = time.monotonic() - self._last_tick - self.interval
+            if late < self.slow or self._current is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            culprit = _culprit(frame)
+            with self._lock:
+                if self._current is not None:
+                    continue
+                self._current = {"at": time.time(), "culprit": culprit, "stack": _stack(frame), "ms": None}
+                self._culprits[culprit] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = list(self._recent)
+            histogram = {f"le_{b}": self._buckets[b] for b in LAG_BUCKETS_MS}
+            histogram["le_inf"] = self._buckets["inf"]
+            return {
+                "enabled": True,
+                "interval_ms": round(self.interval * 1000, 1),
+                "slow_callback_ms": round(self.slow * 1000, 1),
+                "ticks": self._ticks,
+                "lag_histogram_ms": histogram,
+                "recent_lag_ms": {
+                    "samples": len(recent),
+                    "p50": round(_percentile(recent, 50), 1) if recent else None,
+                    "p99": round(_percentile(recent, 99), 1) if recent else None,
+                },
+                "max_lag_ms": round(self._max_ms, 1),
+                "blocking_call_sites": dict(self._culprits.most_common()),
+                "stalls": list(self._stalls),
+                "stalled_now": dict(self._current) if self._current else None,
+            }
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def start_loop_monitor() -> LoopMonitor:
+    """Starts (once) the monitor on the running loop."""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopMonitor(get_loop_monitor_interval_ms(), get_loop_slow_callback_ms())
+        _monitor.start()
+        print(f"[LOOP] Monitoring event-loop lag every {get_loop_monitor_interval_ms():.0f} ms, "
+              f"stacks over {get_loop_slow_callback_ms():.0f} ms")
+    return _monitor
+
+
+def stop_loop_monitor() -> None:
+    global _monitor
+    if _monitor is not None:
+        _monitor.stop()
+        _monitor = None
+
+
+def get_loop_monitor() -> Optional[LoopMonitor]:
+    return _monitor
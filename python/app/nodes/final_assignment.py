@@ -1,37 +1,57 @@
+import functools
 from typing import List, Dict, Any
 import re
-from ..llm import build_chat_llm
+from ..llm import build_chat_llm, select_model
+from ..cache import cached_ainvoke
+from ..fallbacks import note_fallback
+from ..llm_metrics import get_llm_metrics
 
 
-async def build_final_assignment(roadmap: str, skills: List[Dict[str, Any]]) -> str:
+async def build_final_assignment(roadmap: str, skills: List[Dict[str, Any]], skills_text: str = None) -> str:
     """
     Create a detailed final assignment that consolidates the knowledge from the roadmap.
     Assumes the user already knows the skills in `skills`; tasks may include those skills.
     Output should be concise (~1000 chars), point by point (Spanish, Slack markdown friendly),
     and MUST NOT exceed 1000 characters to avoid overwhelming the main roadmap.
+    `skills_text` is the pre-rendered skills snippet (see profiles.SkillProfile); rendered here if omitted.
     """
-    llm = build_chat_llm()
+    model = select_model("final_assignment")
+    llm = build_chat_llm(model, node="final_assignment")
     if llm is None:
         return _fallback_assignment(roadmap, skills)
 
     try:
-        from langchain_core.prompts import ChatPromptTemplate
         from langchain_core.output_parsers import StrOutputParser
+        prompt = build_prompt()
+    except Exception:
+        return _fallback_assignment(roadmap, skills)
+
+    if skills_text is None:
+        skills_text = _format_skills_lines(skills)
+
+    chain = prompt | llm | StrOutputParser()
+    try:
+        result = await cached_ainvoke("final_assignment", prompt, chain, {
+            "roadmap": (roadmap or "").strip(),
+            "skills": skills_text,
+        }, model=model)
+        text = (result or "").strip()
+        if not text:
+            print("[FINAL] Empty LLM output, using the fallback assignment")
+            return _fallback_assignment(roadmap, skills)
+        text = _normalize_slack_mrkdwn(text)
+        shown = _shorten(text, 1000)
+        # Whatever the output budget let through past the 1000-char cut
+        get_llm_metrics().record_trim("final_assignment", len(" ".join(text.split())) - len(shown.rstrip("…")))
+        return shown
     except Exception:
         return _fallback_assignment(roadmap, skills)
 
-    skills_lines = []
-    for s in skills or []:
-        if not isinstance(s, dict):
-            continue
-        name = s.get("name") or ""
-        prof = s.get("proficiency") or ""
-        cats = s.get("categories") or []
-        line = f"- {name}" + (f" ({prof})" if prof else "")
-        if cats:
-            line += f" - {', '.join(cats)}"
-        skills_lines.append(line)
-    skills_text = "\n".join(skills_lines) if skills_lines else "(sin skills registradas)"
+
+@functools.lru_cache(maxsize=1)
+def build_prompt():
+    """Static prompt template of this node, built once (also by the startup warm-up)."""
+    from langchain_core.prompts import ChatPromptTemplate
 
     system_msg = (
         "Eres un instructor técnico. A partir del ROADMAP, crea un TRABAJO FINAL conciso para practicar. "
@@ -41,31 +61,36 @@ async def build_final_assignment(roadmap: str, skills: List[Dict[str, Any]]) ->
         "- Español, formato simple para Slack.\n"
         "- 1 línea de objetivo + 3–5 pasos numerados '1.', '2.', '3.' en líneas separadas (cada paso: qué hacer y un criterio breve en UNA línea).\n"
         "- No repitas el roadmap; solo consolida y convierte en acciones.\n"
-        "- Sin títulos largos, sin bloques de código, sin listas extensas."
+        "- Sin títulos largos, sin bloques de código, sin listas extensas.\n"
+        "Devuelve SOLO el trabajo final, cumpliendo estrictamente con el máximo de 1000 caracteres y los pasos en líneas separadas."
     )
 
-    prompt = ChatPromptTemplate.from_messages([
+    # Variable content last, after the static system prompt
+    return ChatPromptTemplate.from_messages([
         ("system", system_msg),
         ("human",
-         "ROADMAP (resumen de lo aprendido):\n{roadmap}\n\n"
          "SKILLS DADAS POR SABIDAS (pueden usarse en las tareas):\n{skills}\n\n"
-         "Devuelve SOLO el trabajo final, cumpliendo estrictamente con el máximo de 1000 caracteres y los pasos en líneas separadas.")
+         "ROADMAP (resumen de lo aprendido):\n{roadmap}")
     ])
 
-    chain = prompt | llm | StrOutputParser()
-    try:
-        result = await chain.ainvoke({
-            "roadmap": (roadmap or "").strip(),
-            "skills": skills_text,
-        })
-        text = (result or "").strip()
-        text = _normalize_slack_mrkdwn(text)
-        return _shorten(text, 1000)
-    except Exception:
-        return _fallback_assignment(roadmap, skills)
+
+def _format_skills_lines(skills: List[Dict[str, Any]]) -> str:
+    skills_lines = []
+    for s in skills or []:
+        if not isinstance(s, dict):
+            continue
+        name = s.get("name") or ""
+        prof = s.get("proficiency") or ""
+        cats = s.get("categories") or []
+        line = f"- {name}" + (f" ({prof})" if prof else "")
+        if cats:
+            line += f" - {', '.join(cats)}"
+        skills_lines.append(line)
+    return "\n".join(skills_lines) if skills_lines else "(sin skills registradas)"
 
 
 def _fallback_assignment(roadmap: str, skills: List[Dict[str, Any]]) -> str:
+    note_fallback("final_assignment")
     base = "Objetivo: Proyecto integrador aplicando el roadmap.\n"
     steps = (
         "1. Módulo principal listo (pasa pruebas)\n"
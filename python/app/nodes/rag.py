@@ -1,7 +1,51 @@
+import asyncio
 import os
-from typing import List, Tuple
-from langchain_core.documents import Document
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
 from ..tools.semantic_search import search_docs
+from ..tools.db_vector_store import list_collections
+from ..fallbacks import note_fallback
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+# Shard for chunks that mention no catalogued technology (see scripts/build_index.py --shard-by)
+GENERAL_SHARD = "general"
+
+
+def shard_name(base: str, shard: str) -> str:
+    return f"{base}_{shard}"
+
+
+def _max_distance(max_distance: Optional[float]) -> float:
+    if max_distance is not None:
+        return max_distance
+    try:
+        return float(os.getenv("RAG_MAX_DISTANCE", "0.35"))
+    except Exception:
+        return 0.35
+
+
+def _build_context(results: List[Tuple["Document", float]], threshold: float) -> str:
+    """Keeps the chunks under the distance threshold and concatenates them, logging the top one."""
+    filtered: List[Tuple["Document", float]] = [
+        (doc, dist) for doc, dist in results if dist is not None and dist <= threshold
+    ]
+    if not filtered:
+        print(f"[RAG] No chunks under distance threshold {threshold}.")
+        return ""
+    print(f"[RAG] Found {len(filtered)} chunk(s) within distance <= {threshold}.")
+    top, top_dist = filtered[0]
+    try:
+        src = (top.metadata or {}).get("source")
+    except Exception:
+        src = None
+    if src:
+        print(f"[RAG] Top chunk source: {src}")
+    print(f"[RAG] Top chunk distance: {top_dist}")
+    preview = top.page_content[:300]
+    suffix = "..." if len(top.page_content) > 300 else ""
+    print(f"[RAG] Top chunk preview:\n{preview}{suffix}")
+    return "\n\n".join([doc.page_content for doc, dist in filtered])
 
 
 def retrieve_context(
@@ -9,44 +53,95 @@ def retrieve_context(
     collection_name: str = "docs",
     k: int = 5,
     max_distance: float = None,
+    embedding: Optional[List[float]] = None,
+    filter: Optional[Dict[str, Any]] = None,
 ) -> str:
     """
     Retrieve concatenated context for an objective from the vector store,
     filtering by a distance threshold (lower is better). Logs useful details.
+    A precomputed query `embedding` skips embedding the objective again;
+    `filter` restricts the search by chunk metadata (source/section).
     """
     if not objective:
         return ""
     try:
-        threshold = max_distance
-        if threshold is None:
-            try:
-                threshold = float(os.getenv("RAG_MAX_DISTANCE", "0.35"))
-            except Exception:
-                threshold = 0.35
+        threshold = _max_distance(max_distance)
         print(f"[RAG] Using collection={collection_name!r}, k={k}, max_distance={threshold}")
-        results: List[Tuple[Document, float]] = search_docs(objective, collection_name=collection_name, k=k)
-        filtered: List[Tuple[Document, float]] = [
-            (doc, dist) for doc, dist in results if dist is not None and dist <= threshold
-        ]
-        if not filtered:
-            print(f"[RAG] No chunks under distance threshold {threshold}.")
-            return ""
-        print(f"[RAG] Found {len(filtered)} chunk(s) within distance <= {threshold}.")
-        top, top_dist = filtered[0]
-        try:
-            src = (top.metadata or {}).get("source")
-        except Exception:
-            src = None
-        if src:
-            print(f"[RAG] Top chunk source: {src}")
-        print(f"[RAG] Top chunk distance: {top_dist}")
-        preview = top.page_content[:300]
-        suffix = "..." if len(top.page_content) > 300 else ""
-        print(f"[RAG] Top chunk preview:\n{preview}{suffix}")
-        context = "\n\n".join([doc.page_content for doc, dist in filtered])
-        return context
+        results: List[Tuple["Document", float]] = search_docs(
+            objective, collection_name=collection_name, k=k, embedding=embedding, filter=filter
+        )
+        return _build_context(results, threshold)
     except Exception as e:
         print(f"[RAG] Error in retrieve_context: {e}")
+        note_fallback("rag")
         return ""
 
 
+def route_collections(technologies: List[str], base: str = "docs") -> List[str]:
+    """
+    Collections to search for an objective: the technology shards that exist for
+    the detected technologies, else the general shard, else the unsharded `base`.
+    """
+    existing = list_collections()
+    if existing is None:
+        return [base]
+    shards = [shard_name(base, t) for t in technologies if shard_name(base, t) in existing]
+    if shards:
+        return shards
+    fallback = [name for name in (shard_name(base, GENERAL_SHARD), base) if name in existing]
+    return fallback or [base]
+
+
+async def retrieve_context_sharded(
+    objective: str,
+    collections: List[str],
+    k: int = 5,
+    max_distance: float = None,
+    embedding: Optional[List[float]] = None,
+) -> str:
+    """
+    Searches several collections (shards) concurrently with one query embedding and
+    merges the hits by distance before applying the threshold and `k`.
+    Returns "" at once while the vector DB breaker is open.
+    """
+    if not objective:
+        return ""
+    from ..circuit_breaker import get_breaker
+    if get_breaker("vector_db").is_open():
+        # Do not embed the query for a search that would be rejected
+        print("[RAG] Vector DB circuit open, using empty context")
+        note_fallback("rag")
+        return ""
+    if len(collections) == 1:
+        return await asyncio.to_thread(
+            retrieve_context, objective, collections[0], k, max_distance, embedding
+        )
+    try:
+        threshold = _max_distance(max_distance)
+        print(f"[RAG] Using collections={collections}, k={k}, max_distance={threshold}")
+        if embedding is None:
+            from ..tools.embeddings import get_embeddings
+            # Embed once instead of once per shard
+            embedding = await asyncio.to_thread(get_embeddings().embed_query, objective)
+        per_shard = await asyncio.gather(
+            *(asyncio.to_thread(search_docs, objective, name, k, embedding) for name in collections),
+            return_exceptions=True,
+        )
+        merged: List[Tuple["Document", float]] = []
+        seen = set()
+        for name, results in zip(collections, per_shard):
+            if isinstance(results, BaseException):
+                print(f"[RAG] Search failed on {name!r}: {results}")
+                note_fallback("rag")
+                continue
+            for doc, dist in results:
+                # Multi-technology chunks are indexed in every matching shard
+                if doc.page_content not in seen:
+                    seen.add(doc.page_content)
+                    merged.append((doc, dist))
+        merged.sort(key=lambda item: item[1] if item[1] is not None else float("inf"))
+        return _build_context(merged[:k], threshold)
+    except Exception as e:
+        print(f"[RAG] Error in retrieve_context_sharded: {e}")
+        note_fallback("rag")
+        return ""
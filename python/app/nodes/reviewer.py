@@ -1,33 +1,77 @@
+import functools
 from typing import Tuple
 import json
-from ..llm import build_chat_llm
+import re
+from ..llm import build_chat_llm, select_model
+from ..deadlines import Duration, DEFAULT_DEADLINE, parse_deadline
+from ..cache import cached_ainvoke
+from ..fallbacks import note_fallback
 
 
-async def review_objective(objective: str) -> Tuple[bool, str]:
+async def review_objective(objective: str) -> Tuple[bool, Duration]:
     """
     LLM-driven check: Ask the model if the objective is a relevant technical learning goal
     and extract the deadline/timeframe if specified.
     Returns: (is_valid, deadline)
     - is_valid: True if valid technical objective, False otherwise
-    - deadline: Extracted deadline (e.g., "2 semanas", "1 mes", "3 meses") or "1 mes" as default
+    - deadline: Parsed Duration (days + canonical label like "2 semanas"); "1 mes" by default
     """
     if not objective or len(objective.strip()) < 3:
-        return False, "1 mes"
+        return False, DEFAULT_DEADLINE
 
-    llm = build_chat_llm()
+    model = select_model("reviewer")
+    llm = build_chat_llm(model, node="reviewer")
     if llm is None:
+        note_fallback("reviewer")
         is_valid = _is_technical_fallback(objective)
-        deadline = _extract_simple_deadline(objective)
+        deadline = _extract_deadline(objective)
         return is_valid, deadline
 
     try:
-        from langchain_core.prompts import ChatPromptTemplate
         from langchain_core.output_parsers import StrOutputParser
+        prompt = build_prompt()
     except Exception:
+        note_fallback("reviewer")
         is_valid = _is_technical_fallback(objective)
-        deadline = _extract_simple_deadline(objective)
+        deadline = _extract_deadline(objective)
         return is_valid, deadline
 
+    chain = prompt | llm | StrOutputParser()
+    try:
+        result = await cached_ainvoke("reviewer", prompt, chain, {"objective": objective}, model=model)
+        print(f"[REVIEWER] LLM Response: {result}")
+        if not (result or "").strip():
+            # Nothing to judge (e.g. the output cap spent on thinking): same as an LLM failure
+            raise ValueError("empty LLM output")
+        
+        # Try to parse JSON response
+        parsed = _parse_review_response(result)
+        print(f"[REVIEWER] Parsed: {parsed}")
+        
+        if parsed:
+            is_valid = parsed.get("valid", "INVALID").upper() == "VALID"
+            # Normalize whatever the model wrote; fall back to the objective text
+            deadline = parse_deadline(str(parsed.get("deadline") or "")) or _extract_deadline(objective)
+            print(f"[REVIEWER] is_valid={is_valid}, deadline={deadline.label} ({deadline.days} días)")
+            return is_valid, deadline
+        
+        # Si no se pudo parsear, rechazar por seguridad
+        print("[REVIEWER] Failed to parse JSON, rejecting by default")
+        return False, DEFAULT_DEADLINE
+    except Exception as e:
+        print(f"[REVIEWER] Exception: {e}")
+        note_fallback("reviewer")
+        is_valid = _is_technical_fallback(objective)
+        deadline = _extract_deadline(objective)
+        print(f"[REVIEWER] Fallback: is_valid={is_valid}, deadline={deadline.label}")
+        return is_valid, deadline
+
+
+@functools.lru_cache(maxsize=1)
+def build_prompt():
+    """Static prompt template of this node, built once (also by the startup warm-up)."""
+    from langchain_core.prompts import ChatPromptTemplate
+
     system_msg = (
         "Eres un filtro MUY ESTRICTO de objetivos técnicos. Solo acepta objetivos de PROGRAMACIÓN y TECNOLOGÍA.\n\n"
         "ACEPTA SOLO (VALID) si menciona EXPLÍCITAMENTE:\n"
@@ -54,42 +98,17 @@ async def review_objective(objective: str) -> Tuple[bool, str]:
         '• "python en 2 semanas" → {{"valid": "VALID", "deadline": "2 semanas"}}\n'
         '• "mejorar comunicación" → {{"valid": "INVALID", "deadline": "1 mes"}}\n'
         '• "diseño gráfico" → {{"valid": "INVALID", "deadline": "1 mes"}}\n'
-        '• "ser mejor líder" → {{"valid": "INVALID", "deadline": "1 mes"}}'
+        '• "ser mejor líder" → {{"valid": "INVALID", "deadline": "1 mes"}}\n\n'
+        "Para el mensaje del usuario: ¿es un objetivo técnico válido de programación/tecnología?\n"
+        "Responde SOLO con JSON (sin explicaciones)."
     )
 
-    prompt = ChatPromptTemplate.from_messages([
+    # Static system prompt first (byte-identical across requests, cacheable); the objective goes last
+    return ChatPromptTemplate.from_messages([
         ("system", system_msg),
-        ("human",
-         "Mensaje: '{objective}'\n\n"
-         "¿Es un objetivo técnico válido de programación/tecnología?\n"
-         "Responde SOLO con JSON (sin explicaciones):")
+        ("human", "Mensaje: '{objective}'")
     ])
 
-    chain = prompt | llm | StrOutputParser()
-    try:
-        result = await chain.ainvoke({"objective": objective})
-        print(f"[REVIEWER] LLM Response: {result}")
-        
-        # Try to parse JSON response
-        parsed = _parse_review_response(result)
-        print(f"[REVIEWER] Parsed: {parsed}")
-        
-        if parsed:
-            is_valid = parsed.get("valid", "INVALID").upper() == "VALID"
-            deadline = parsed.get("deadline", "1 mes").strip()
-            print(f"[REVIEWER] is_valid={is_valid}, deadline={deadline}")
-            return is_valid, deadline
-        
-        # Si no se pudo parsear, rechazar por seguridad
-        print("[REVIEWER] Failed to parse JSON, rejecting by default")
-        return False, "1 mes"
-    except Exception as e:
-        print(f"[REVIEWER] Exception: {e}")
-        is_valid = _is_technical_fallback(objective)
-        deadline = _extract_simple_deadline(objective)
-        print(f"[REVIEWER] Fallback: is_valid={is_valid}, deadline={deadline}")
-        return is_valid, deadline
-
 
 def _is_technical_fallback(text: str) -> bool:
     """
@@ -153,7 +172,6 @@ def _parse_review_response(text: str) -> dict:
         pass
     
     # Estrategia 2: Buscar JSON con regex
-    import re
     try:
         # Buscar el primer objeto JSON válido
         match = re.search(r'\{[^{}]*\}', text)
@@ -193,39 +211,7 @@ def _parse_review_response(text: str) -> dict:
     return None
 
 
-def _extract_simple_deadline(text: str) -> str:
-    """Simple regex-based deadline extraction as fallback"""
-    import re
-    text_lower = text.lower()
-    
-    # Mapeo de palabras numéricas a números
-    word_to_num = {
-        'una': '1', 'un': '1', 'uno': '1',
-        'dos': '2', 'tres': '3', 'cuatro': '4', 'cinco': '5',
-        'seis': '6', 'siete': '7', 'ocho': '8', 'nueve': '9',
-        'diez': '10', 'doce': '12'
-    }
-    
-    # Reemplazar palabras por números
-    for word, num in word_to_num.items():
-        text_lower = text_lower.replace(f'en {word} ', f'en {num} ')
-        text_lower = text_lower.replace(f'{word} ', f'{num} ')
-    
-    # Patterns for common deadline expressions
-    patterns = [
-        (r'en (\d+)\s*(semana|semanas)', lambda m: f"{m.group(1)} {'semana' if m.group(1) == '1' else 'semanas'}"),
-        (r'en (\d+)\s*(mes|meses)', lambda m: f"{m.group(1)} {'mes' if m.group(1) == '1' else 'meses'}"),
-        (r'en (\d+)\s*(año|años)', lambda m: f"{m.group(1)} {'año' if m.group(1) == '1' else 'años'}"),
-        (r'(\d+)\s*(semana|semanas)', lambda m: f"{m.group(1)} {'semana' if m.group(1) == '1' else 'semanas'}"),
-        (r'(\d+)\s*(mes|meses)', lambda m: f"{m.group(1)} {'mes' if m.group(1) == '1' else 'meses'}"),
-        (r'(\d+)\s*(año|años)', lambda m: f"{m.group(1)} {'año' if m.group(1) == '1' else 'años'}"),
-    ]
-    
-    for pattern, formatter in patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            return formatter(match)
-    
-    return "1 mes"
-
+def _extract_deadline(text: str) -> Duration:
+    """Deadline mentioned in the objective, or the default "1 mes"."""
+    return parse_deadline(text) or DEFAULT_DEADLINE
 
@@ -1,32 +1,99 @@
+import asyncio
+import functools
 import json
-from typing import List, Dict, Any
-from ..llm import build_chat_llm
+import re
+from typing import List, Dict, Any, Optional, Tuple, Union
+from ..llm import build_chat_llm, select_model, roadmap_max_output_tokens, roadmap_max_steps
+from ..cache import cached_ainvoke
+from ..fallbacks import note_fallback
+from ..config import get_roadmap_mode, get_roadmap_outline_min_days
+from ..offline_roadmap import LINK_RE, build_offline_roadmap, generic_roadmap
+from ..deadlines import Duration, as_duration, format_days
 
+# Fast latency tier: short roadmap, budgeted like a deadline of up to two weeks
+COMPACT_MAX_STEPS = 3
+_COMPACT_BUDGET_DAYS = 14
+_COMPACT_HINT = f"\n📏 VERSIÓN COMPACTA: máximo {COMPACT_MAX_STEPS} pasos, descripciones de una sola línea"
 
-async def build_roadmap(smart_objective: str, context: str, skills: List[Dict[str, Any]] = None, deadline: str = "1 mes") -> str:
+
+async def build_roadmap(
+    smart_objective: str,
+    context: str,
+    skills: List[Dict[str, Any]] = None,
+    deadline: Union[str, Duration] = "1 mes",
+    skills_text: str = None,
+    compact: bool = False,
+) -> str:
     """
     Build a concise, clear learning roadmap in Spanish with timeline.
     Takes into account user's current skills to personalize the roadmap.
-    Adjusts depth and number of steps based on the deadline.
+    Adjusts depth and number of steps based on the deadline; the output-token cap scales with it too.
     Use provided context when helpful but do not limit to it.
     Each step must include:
     - Concept
     - Description
     - Timeline (estimated time to complete)
     - Useful links
+    `skills_text` is the pre-rendered skills snippet (see profiles.SkillProfile); rendered here if omitted.
+    `deadline` may be the Duration parsed by the reviewer or a raw string.
+    With ROADMAP_MODE=outline/auto the steps are planned first and written concurrently
+    (see _build_outlined_roadmap); a failed outline falls back to the single call.
+    `compact` (fast latency tier) asks for at most COMPACT_MAX_STEPS one-line steps in a single call.
     """
-    llm = build_chat_llm()
+    deadline = as_duration(deadline)
+    if not compact and _use_outline(deadline):
+        if skills_text is None:
+            skills_text = _format_skills(skills)
+        roadmap = await _build_outlined_roadmap(smart_objective, context, skills_text, deadline)
+        if roadmap:
+            return roadmap
+
+    model = select_model("roadmap")
+    # The compact budget is the one of the shortest deadlines (COMPACT_MAX_STEPS steps)
+    budget_days = min(deadline.days, _COMPACT_BUDGET_DAYS) if compact else deadline.days
+    llm = build_chat_llm(model, node="roadmap", max_output_tokens=roadmap_max_output_tokens(budget_days))
     if llm is None:
         return _fallback_roadmap(smart_objective, context, skills, deadline)
 
     try:
-        from langchain_core.prompts import ChatPromptTemplate
         from langchain_core.output_parsers import StrOutputParser
+        prompt = build_prompt()
     except Exception:
         return _fallback_roadmap(smart_objective, context, skills, deadline)
 
     # Formatear las skills del usuario
-    skills_text = _format_skills(skills)
+    if skills_text is None:
+        skills_text = _format_skills(skills)
+
+    chain = prompt | llm | StrOutputParser()
+    try:
+        # Preparar el contexto con énfasis
+        context_text = (context or "").strip()
+        if not context_text:
+            context_text = "(No hay contexto disponible - usa recursos conocidos de calidad)"
+        
+        result = await cached_ainvoke("roadmap", prompt, chain, {
+            "smart": (smart_objective or "").strip(),
+            "context": context_text,
+            "skills": skills_text,
+            "deadline": deadline.label,
+            # In the human message, so the system prompt stays identical (cacheable)
+            "format_hint": _COMPACT_HINT if compact else "",
+        }, model=model)
+        roadmap = (result or "").strip()
+        if not roadmap:
+            # Empty generation (e.g. the output cap spent on thinking): not worth showing nothing
+            print("[ROADMAP] Empty LLM output, using the fallback roadmap")
+            return _fallback_roadmap(smart_objective, context, skills, deadline)
+        return roadmap
+    except Exception:
+        return _fallback_roadmap(smart_objective, context, skills, deadline)
+
+
+@functools.lru_cache(maxsize=1)
+def build_prompt():
+    """Static prompt template of this node, built once (also by the startup warm-up)."""
+    from langchain_core.prompts import ChatPromptTemplate
 
     system_msg = (
         "Eres un coach técnico experto. PRIORIZA Y USA EL CONTEXTO PROPORCIONADO como base principal del roadmap. "
@@ -74,42 +141,224 @@ async def build_roadmap(smart_objective: str, context: str, skills: List[Dict[st
         "- No propongas 'proyecto final', 'trabajo final' ni 'proyecto integrador'\n"
         "- No incluyas entregables ni evaluación final\n"
         "- El roadmap debe ser SOLO una secuencia de CONCEPTOS a aprender\n\n"
-        "Devuelve solo el roadmap formateado, sin texto adicional."
+        "Devuelve solo el roadmap formateado, sin texto adicional.\n\n"
+        "INSTRUCCIONES para el mensaje del usuario (plazo, skills, contexto y objetivo SMART):\n"
+        "1. PRIORIZA el contexto: extrae conceptos y links de ahí\n"
+        "2. ADAPTA al nivel del usuario según sus skills\n"
+        "3. AJUSTA la profundidad al plazo disponible\n"
+        "4. USA los links del contexto en tu roadmap"
     )
 
-    prompt = ChatPromptTemplate.from_messages([
+    # Static system prompt first (byte-identical across requests, cacheable); variable
+    # content goes last, least specific first: deadline, skills, context, objective
+    return ChatPromptTemplate.from_messages([
         ("system", system_msg),
         ("human",
-         "OBJETIVO SMART:\n{smart}\n\n"
+         "⏰ PLAZO DISPONIBLE: {deadline}{format_hint}\n\n"
+         "👤 SKILLS ACTUALES DEL USUARIO (PERSONALIZA SEGÚN ESTO):\n{skills}\n\n"
          "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
          "📚 CONTEXTO CURADO (PRIORIDAD ALTA - USA ESTA INFORMACIÓN):\n{context}\n"
          "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-         "👤 SKILLS ACTUALES DEL USUARIO (PERSONALIZA SEGÚN ESTO):\n{skills}\n\n"
-         "⏰ PLAZO DISPONIBLE: {deadline}\n\n"
-         "INSTRUCCIONES:\n"
-         "1. PRIORIZA el contexto: extrae conceptos y links de ahí\n"
-         "2. ADAPTA al nivel del usuario según sus skills\n"
-         "3. AJUSTA la profundidad al plazo disponible\n"
-         "4. USA los links del contexto en tu roadmap\n\n"
-         "Construye el roadmap ahora:")
+         "OBJETIVO SMART:\n{smart}")
     ])
 
-    chain = prompt | llm | StrOutputParser()
+
+def _use_outline(deadline: Duration) -> bool:
+    mode = get_roadmap_mode()
+    return mode == "outline" or (mode == "auto" and deadline.days >= get_roadmap_outline_min_days())
+
+
+async def _build_outlined_roadmap(
+    smart_objective: str,
+    context: str,
+    skills_text: str,
+    deadline: Duration,
+) -> Optional[str]:
+    """
+    Two-phase roadmap: a short call plans the steps (titles and days), then each
+    step's description and links are written concurrently, so a long roadmap takes
+    about the outline plus its slowest step instead of one call for the whole text.
+    Steps are assembled in the same Slack format as the single-call roadmap.
+    Returns None if the outline cannot be produced; a failed step is filled from the context.
+    """
+    variables = {
+        "smart": (smart_objective or "").strip(),
+        "context": (context or "").strip() or "(No hay contexto disponible - usa recursos conocidos de calidad)",
+        "skills": skills_text,
+        "deadline": deadline.label,
+    }
     try:
-        # Preparar el contexto con énfasis
-        context_text = (context or "").strip()
-        if not context_text:
-            context_text = "(No hay contexto disponible - usa recursos conocidos de calidad)"
-        
-        result = await chain.ainvoke({
-            "smart": (smart_objective or "").strip(),
-            "context": context_text,
-            "skills": skills_text,
-            "deadline": deadline,
-        })
-        return (result or "").strip()
+        from langchain_core.output_parsers import StrOutputParser
+        outline_prompt = build_outline_prompt()
+        step_prompt = build_step_prompt()
     except Exception:
-        return _fallback_roadmap(smart_objective, context, skills, deadline)
+        return None
+
+    model = select_model("roadmap_outline")
+    llm = build_chat_llm(model, node="roadmap_outline")
+    if llm is None:
+        return None
+    try:
+        raw = await cached_ainvoke("roadmap_outline", outline_prompt, outline_prompt | llm | StrOutputParser(), {
+            **variables,
+            "days": deadline.days,
+            "max_steps": roadmap_max_steps(deadline.days),
+        }, model=model)
+    except Exception as e:
+        print(f"[ROADMAP] Outline failed, using a single call: {e}")
+        return None
+    outline = _parse_outline(raw, deadline)
+    if not outline:
+        print("[ROADMAP] Outline unparseable, using a single call")
+        return None
+
+    step_model = select_model("roadmap_step")
+    step_llm = build_chat_llm(step_model, node="roadmap_step")
+    if step_llm is None:
+        return None
+    chain = step_prompt | step_llm | StrOutputParser()
+    outline_text = "\n".join(f"{i}. {title}" for i, (title, _) in enumerate(outline, 1))
+    context_links = list(dict.fromkeys(LINK_RE.findall(context or "")))
+
+    async def expand(number: int, title: str) -> str:
+        try:
+            return await cached_ainvoke("roadmap_step", step_prompt, chain, {
+                **variables,
+                "outline": outline_text,
+                "number": number,
+                "title": title,
+            }, model=step_model)
+        except Exception as e:
+            print(f"[ROADMAP] Step {number} expansion failed: {e}")
+            return ""
+
+    expansions = await asyncio.gather(*(expand(i, title) for i, (title, _) in enumerate(outline, 1)))
+    steps = []
+    for i, ((title, days), expansion) in enumerate(zip(outline, expansions), 1):
+        description, links = _parse_step(expansion)
+        if not description:
+            note_fallback("roadmap_step")
+            description = f"Repasa los conceptos clave de «{title}» y practica cada punto."
+        if not links:
+            links = context_links[(i - 1) % len(context_links)] if context_links else "Documentación oficial"
+        steps.append(
+            f"*📚 {i}. {title}*\n"
+            f"{description}\n"
+            f"⏱️ _Tiempo:_ {format_days(days)}\n"
+            f"🔗 _Links:_ {links}"
+        )
+    print(f"[ROADMAP] Outlined roadmap: {len(steps)} steps expanded concurrently")
+    return "\n\n".join(steps)
+
+
+def _parse_outline(text: str, deadline: Duration) -> List[Tuple[str, int]]:
+    """
+    [(title, days)] from the outline JSON, capped at the steps the deadline allows.
+    Days are scaled down when they add up to more than the deadline; missing ones share the rest.
+    """
+    match = re.search(r"\[.*\]", text or "", re.DOTALL)
+    try:
+        items = json.loads(match.group(0)) if match else []
+    except Exception:
+        return []
+    steps = []
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        title = str(item.get("titulo") or item.get("title") or "").strip().strip("*").strip()
+        if not title:
+            continue
+        try:
+            days = max(0, int(float(item.get("dias") or item.get("days") or 0)))
+        except Exception:
+            days = 0
+        steps.append((title[0].upper() + title[1:], days))
+    steps = steps[:roadmap_max_steps(deadline.days)]
+    if not steps:
+        return []
+    planned = sum(days for _, days in steps)
+    missing = [i for i, (_, days) in enumerate(steps) if days == 0]
+    if missing:
+        spare = max(len(missing), deadline.days - planned)
+        steps = [(t, d or spare // len(missing)) for t, d in steps]
+        planned = sum(days for _, days in steps)
+    if planned > deadline.days:
+        steps = [(t, max(1, round(d * deadline.days / planned))) for t, d in steps]
+    return steps
+
+
+def _parse_step(text: str) -> Tuple[str, str]:
+    """(description, links) from a step expansion; header or time lines the model repeats are dropped."""
+    description, links = [], ""
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("*📚") or line.startswith("⏱️"):
+            continue
+        if "Links:" in line:
+            links = line.split("Links:", 1)[1].strip(" _*")
+            continue
+        description.append(line)
+    if not links:
+        links = ", ".join(dict.fromkeys(LINK_RE.findall(text or "")))
+    return " ".join(description[:2]), links
+
+
+@functools.lru_cache(maxsize=1)
+def build_outline_prompt():
+    """Static prompt of the outline phase (ROADMAP_MODE=outline): step titles and days only."""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    system_msg = (
+        "Eres un coach técnico experto. Planifica un roadmap de aprendizaje: devuelve SOLO la lista de pasos "
+        "(título del concepto y días), sin descripciones ni links.\n\n"
+        "- PRIORIZA los conceptos del contexto proporcionado\n"
+        "- Si el usuario tiene skills relacionadas, salta fundamentos básicos\n"
+        "- Plazo corto (1-2 semanas): 2-3 pasos; medio (1 mes): 3-4; largo (2-3 meses): 4-6; muy largo (6+ meses): 6-8\n"
+        "- La suma de días NO debe exceder el plazo total\n"
+        "- No propongas 'proyecto final', 'trabajo final' ni 'proyecto integrador'\n\n"
+        "Responde SOLO con un JSON, sin texto adicional:\n"
+        '[{{"titulo": "Fundamentos de React", "dias": 7}}, {{"titulo": "Hooks y estado", "dias": 10}}]'
+    )
+    return ChatPromptTemplate.from_messages([
+        ("system", system_msg),
+        ("human",
+         "⏰ PLAZO DISPONIBLE: {deadline} ({days} días, máximo {max_steps} pasos)\n\n"
+         "👤 SKILLS ACTUALES DEL USUARIO:\n{skills}\n\n"
+         "📚 CONTEXTO CURADO:\n{context}\n\n"
+         "OBJETIVO SMART:\n{smart}")
+    ])
+
+
+@functools.lru_cache(maxsize=1)
+def build_step_prompt():
+    """Static prompt of the step expansion (ROADMAP_MODE=outline): one step's description and links."""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    system_msg = (
+        "Eres un coach técnico experto. Escribe UN paso de un roadmap de aprendizaje ya planificado.\n\n"
+        "FORMATO DE SALIDA (markdown de Slack), EXACTAMENTE dos líneas:\n"
+        "[Descripción breve y accionable - máximo 2 líneas, sin repetir el título]\n"
+        "🔗 _Links:_ [enlaces relevantes]\n\n"
+        "Ejemplo:\n"
+        "Aprende componentes, props y state para construir interfaces interactivas.\n"
+        "🔗 _Links:_ https://react.dev/learn\n\n"
+        "- Personaliza según las skills del usuario (ej: 'Dado tu conocimiento en X...')\n"
+        "- Cubre SOLO este paso; los demás pasos del plan los escribe otra persona\n"
+        "- PRIORIDAD 1: usa los links/URLs del contexto; PRIORIDAD 2: recursos conocidos relevantes\n"
+        "- Usa *texto* (UN solo asterisco) para negrita y _texto_ para cursiva\n"
+        "- No escribas el título, el tiempo ni otros pasos"
+    )
+    # Shared request content first, so the steps of one roadmap share the prompt prefix
+    return ChatPromptTemplate.from_messages([
+        ("system", system_msg),
+        ("human",
+         "⏰ PLAZO DISPONIBLE: {deadline}\n\n"
+         "👤 SKILLS ACTUALES DEL USUARIO:\n{skills}\n\n"
+         "📚 CONTEXTO CURADO:\n{context}\n\n"
+         "OBJETIVO SMART:\n{smart}\n\n"
+         "PLAN COMPLETO:\n{outline}\n\n"
+         "ESCRIBE EL PASO {number}: {title}")
+    ])
 
 
 def _format_skills(skills: List[Dict[str, Any]] = None) -> str:
@@ -138,90 +387,21 @@ def _format_skills(skills: List[Dict[str, Any]] = None) -> str:
     return "\n".join(formatted)
 
 
-def _fallback_roadmap(smart_objective: str, context: str, skills: List[Dict[str, Any]] = None, deadline: str = "1 mes") -> str:
-    # Concept-only roadmap (no proyecto/trabajo final)
-    deadline_lower = (deadline or "").lower()
-    if "semana" in deadline_lower and not "mes" in deadline_lower:
-        # Plazo corto: 2 pasos (conceptos)
-        return (
-            f"*📚 1. Fundamentos y arquitectura*\n"
-            f"Conceptos base, CLI y flujo general para entender el tema.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.5)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/get-started/\n\n"
-            f"*📚 2. Imágenes y contenedores*\n"
-            f"Creación de Dockerfiles, build, run, logs y lifecycle.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.5)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/engine/reference/builder/"
-        )
-    elif "6 mes" in deadline_lower or "año" in deadline_lower:
-        # Plazo largo: 5 pasos (conceptos)
-        return (
-            f"*📚 1. Fundamentos y arquitectura*\n"
-            f"CLI, imágenes vs contenedores, capas y registro.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.15)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/get-started/\n\n"
-            f"*📚 2. Dockerfiles avanzados*\n"
-            f"Capas, caching, multi-stage builds y optimización de tamaño.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.25)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/build/building/multi-stage/\n\n"
-            f"*📚 3. Redes y Compose*\n"
-            f"Servicios, redes bridge, dependencias y orquestación local.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.25)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/compose/\n\n"
-            f"*📚 4. Volúmenes y persistencia*\n"
-            f"Montajes, permisos y estrategias de datos.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.2)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/storage/volumes/\n\n"
-            f"*📚 5. Seguridad y mejores prácticas*\n"
-            f"Usuarios no-root, escaneo, límites de recursos y CI.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.15)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/develop/security-best-practices/"
-        )
-    else:
-        # Plazo medio (1-3 meses): 3 pasos (conceptos)
-        return (
-            f"*📚 1. Fundamentos e imágenes*\n"
-            f"CLI básica, Dockerfiles, build y gestión de imágenes.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.35)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/get-started/\n\n"
-            f"*📚 2. Contenedores, redes y Compose*\n"
-            f"Run/exec/logs, redes y definición de servicios con Compose.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.4)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/compose/\n\n"
-            f"*📚 3. Volúmenes y seguridad*\n"
-            f"Persistencia de datos y prácticas de seguridad esenciales.\n"
-            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, 0.25)}\n"
-            f"🔗 _Links:_ https://docs.docker.com/storage/volumes/"
-        )
+def _fallback_roadmap(
+    smart_objective: str,
+    context: str,
+    skills: List[Dict[str, Any]] = None,
+    deadline: Union[str, Duration] = "1 mes",
+) -> str:
+    """
+    LLM-free roadmap (no proyecto/trabajo final): steps and links come from the corpus
+    sections about the technology in the objective/context; generic concepts otherwise.
+    """
+    note_fallback("roadmap")
+    text = f"{smart_objective or ''}\n{context or ''}"
+    return build_offline_roadmap(text, deadline) or generic_roadmap(text, deadline)
 
 
-def _calculate_step_time(total_deadline: str, percentage: float) -> str:
+def _calculate_step_time(total_deadline: Union[str, Duration], percentage: float) -> str:
     """Calculate step time based on total deadline and percentage"""
-    import re
-    deadline_lower = total_deadline.lower()
-    
-    # Extract number and unit
-    match = re.search(r'(\d+)\s*(semana|mes|año)', deadline_lower)
-    if not match:
-        return "1 semana"
-    
-    number = int(match.group(1))
-    unit = match.group(2)
-    
-    # Calculate step time
-    step_value = int(number * percentage)
-    if step_value < 1:
-        step_value = 1
-    
-    # Return formatted time
-    if unit == "semana" or unit == "semanas":
-        return f"{step_value} {'semana' if step_value == 1 else 'semanas'}"
-    elif unit == "mes" or unit == "meses":
-        return f"{step_value} {'mes' if step_value == 1 else 'meses'}"
-    else:  # año
-        if step_value >= 12:
-            months = step_value
-            return f"{months} meses"
-        return f"{step_value} {'mes' if step_value == 1 else 'meses'}"
-
-
+    return format_days(round(as_duration(total_deadline).days * percentage))
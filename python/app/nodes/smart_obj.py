@@ -1,24 +1,53 @@
+import functools
 import json
-from ..llm import build_chat_llm
+from ..llm import build_chat_llm, select_model
+from ..cache import cached_ainvoke
+from ..fallbacks import note_fallback
 
 
-async def to_smart_objective(objective: str, skills: list, deadline: str = "1 mes") -> str:
+async def to_smart_objective(objective: str, skills: list, deadline: str = "1 mes", skills_text: str = None) -> str:
     """
     Transform the raw user objective into a concise SMART objective in Spanish.
     SMART = Específico, Medible, Alcanzable, Relevante, con Tiempo definido.
     If LLM is not available, return a basic templated SMART objective.
+    `skills_text` is the pre-rendered skills snippet (see profiles.SkillProfile); rendered here if omitted.
     """
-    llm = build_chat_llm()
+    model = select_model("smart_obj")
+    llm = build_chat_llm(model, node="smart_obj")
     if llm is None:
         return _fallback_smart(objective, deadline)
 
     try:
-        from langchain_core.prompts import ChatPromptTemplate
         from langchain_core.output_parsers import StrOutputParser
+        prompt = build_prompt()
     except Exception:
         return _fallback_smart(objective, deadline)
 
-    prompt = ChatPromptTemplate.from_messages([
+    if skills_text is None:
+        skills_text = _format_skills_brief(skills)
+
+    chain = prompt | llm | StrOutputParser()
+    try:
+        result = await cached_ainvoke("smart_obj", prompt, chain, {
+            "objective": objective or "",
+            "skills": skills_text,
+            "deadline": deadline,
+        }, model=model)
+        smart = (result or "").strip()
+        if not smart:
+            print("[SMART] Empty LLM output, using the fallback SMART objective")
+            return _fallback_smart(objective, deadline)
+        return smart
+    except Exception:
+        return _fallback_smart(objective, deadline)
+
+
+@functools.lru_cache(maxsize=1)
+def build_prompt():
+    """Static prompt template of this node, built once (also by the startup warm-up)."""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages([
         ("system",
          "Eres un experto en planificación de objetivos. Convierte el objetivo del usuario "
          "en un objetivo SMART en español con formato enriquecido para Slack. Sigue estas pautas:\n"
@@ -37,14 +66,16 @@ async def to_smart_objective(objective: str, skills: list, deadline: str = "1 me
          "- Usa emojis Unicode directos (🎯 ✨ 💪) NO códigos como :emoji:\n"
          "- Máximo 3-4 líneas de texto, muy conciso\n"
          "- Haz el objetivo directo e inspirador, SIN explicaciones extensas\n\n"
-         "Devuelve SOLO el objetivo SMART (2-3 oraciones máximo), sin listas ni detalles."),
+         "Devuelve SOLO el objetivo SMART (2-3 oraciones máximo) con formato enriquecido, sin listas ni detalles."),
+        # Variable content last, after the static system prompt
         ("human",
-         "Objetivo original:\n{objective}\n\n"
-         "Skills (contexto opcional):\n{skills}\n\n"
          "Plazo disponible:\n{deadline}\n\n"
-         "Devuelve el objetivo SMART con formato enriquecido.")
+         "Skills (contexto opcional):\n{skills}\n\n"
+         "Objetivo original:\n{objective}")
     ])
 
+
+def _format_skills_brief(skills: list) -> str:
     skills_brief = []
     for s in skills or []:
         if isinstance(s, dict):
@@ -53,20 +84,11 @@ async def to_smart_objective(objective: str, skills: list, deadline: str = "1 me
                 "proficiency": s.get("proficiency"),
                 "categories": s.get("categories"),
             })
-
-    chain = prompt | llm | StrOutputParser()
-    try:
-        result = await chain.ainvoke({
-            "objective": objective or "",
-            "skills": json.dumps(skills_brief, ensure_ascii=False),
-            "deadline": deadline,
-        })
-        return (result or "").strip()
-    except Exception:
-        return _fallback_smart(objective, deadline)
+    return json.dumps(skills_brief, ensure_ascii=False)
 
 
 def _fallback_smart(objective: str, deadline: str = "1 mes") -> str:
+    note_fallback("smart_obj")
     text = (objective or "").strip()
     if not text:
         text = "Aprender un tema técnico relevante"
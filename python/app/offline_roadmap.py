@@ -0,0 +1,207 @@
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+from .config import get_corpus_paths
+from .technologies import detect_technologies, display_name
+from .deadlines import Duration, as_duration
+
+HEADER_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+LINK_RE = re.compile(r"https?://[^\s)>\]\"'`]+")
+MARKDOWN_NOISE_RE = re.compile(r"[*_`>#]+")
+
+
+class CorpusSection:
+    __slots__ = ("title", "text", "links", "technologies", "order", "source")
+
+    def __init__(self, title: str, text: str, links: List[str], technologies: List[str], order: int, source: str):
+        self.title = title
+        self.text = text
+        self.links = links
+        self.technologies = technologies
+        self.order = order
+        self.source = source
+
+
+def _split_sections(path: str, markdown_text: str, start_order: int) -> List[CorpusSection]:
+    """
+    Splits one markdown document into header-delimited sections (any level, ignoring
+    headers inside code fences). Sections take the technologies of the document title,
+    so incidental mentions (e.g. `FROM python` in Docker notes) do not count; untitled
+    or multi-topic documents fall back to what each section mentions.
+    """
+    raw_sections: List[Tuple[str, List[str]]] = []
+    title, lines, in_fence = "", [], False
+    for line in markdown_text.splitlines():
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADER_RE.match(line)
+        if match:
+            raw_sections.append((title, lines))
+            title, lines = match.group(2).strip(), []
+        else:
+            lines.append(line)
+    raw_sections.append((title, lines))
+
+    doc_title = next((t for t, _ in raw_sections if t), "")
+    doc_technologies = detect_technologies(doc_title)
+    sections = []
+    for title, body in raw_sections:
+        text = "\n".join(body).strip()
+        if not title or not text:
+            continue
+        technologies = doc_technologies or detect_technologies(f"{title}\n{text}")
+        links = list(dict.fromkeys(link.rstrip(".,;:") for link in LINK_RE.findall(text)))
+        sections.append(CorpusSection(title, text, links, technologies, start_order + len(sections), path))
+    return sections
+
+
+_corpus_cache: Dict[str, Any] = {}
+
+
+def load_corpus_sections(paths: List[str] = None) -> List[CorpusSection]:
+    """
+    Parsed sections of the RAG corpus source files, cached per process and
+    re-parsed only when a file changes on disk.
+    """
+    paths = paths or get_corpus_paths()
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    signature = tuple(signature)
+    if _corpus_cache.get("signature") == signature:
+        return _corpus_cache["sections"]
+
+    sections: List[CorpusSection] = []
+    for path, mtime, _ in signature:
+        if mtime is None:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                sections.extend(_split_sections(path, f.read(), len(sections)))
+        except Exception as e:
+            print(f"[OFFLINE] Could not read corpus file {path!r}: {e}")
+    _corpus_cache.update({"signature": signature, "sections": sections})
+    return sections
+
+
+def target_step_count(deadline: Union[str, Duration]) -> int:
+    """Same step ranges the roadmap prompt asks the LLM for."""
+    days = as_duration(deadline).days
+    if days <= 14:
+        return 2
+    if days <= 31:
+        return 3
+    if days <= 150:
+        return 4
+    return 6
+
+
+def _describe(section: CorpusSection, max_len: int = 140) -> str:
+    """First meaningful line of the section, stripped of markdown. Lines with links are skipped (they go to Links)."""
+    in_fence = False
+    for line in section.text.splitlines():
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence or LINK_RE.search(line):
+            continue
+        cleaned = MARKDOWN_NOISE_RE.sub("", line).strip(" -•→:").strip()
+        if len(cleaned) >= 12:
+            cleaned = cleaned[0].upper() + cleaned[1:]
+            return cleaned if len(cleaned) <= max_len else cleaned[:max_len - 1].rstrip() + "…"
+    return f"Repasa las notas de «{section.title}» y practica cada punto."
+
+
+def select_sections(technologies: List[str], count: int, sections: List[CorpusSection] = None) -> List[CorpusSection]:
+    """
+    Picks up to `count` sections about the matched technologies, preferring the
+    primary technology, then sections with more content; returns them in document order.
+    """
+    sections = load_corpus_sections() if sections is None else sections
+    if not technologies:
+        return []
+    primary = technologies[0]
+    matching = [s for s in sections if any(t in s.technologies for t in technologies)]
+    ranked = sorted(
+        matching,
+        key=lambda s: (primary not in s.technologies, -len(s.text), s.order),
+    )
+    return sorted(ranked[:count], key=lambda s: s.order)
+
+
+def _share_links(chosen: List[CorpusSection], pool: List[str], per_step: int = 2) -> List[List[str]]:
+    """
+    Each step keeps its own links; steps without links get the remaining corpus
+    links for the technology, spread round-robin so every step has at least one.
+    """
+    used = {link for s in chosen for link in s.links[:per_step]}
+    spare = [link for link in pool if link not in used]
+    assigned = []
+    cursor = 0
+    for section in chosen:
+        links = section.links[:per_step]
+        if not links and spare:
+            links = [spare[cursor % len(spare)]]
+            cursor += 1
+        assigned.append(links)
+    return assigned
+
+
+def build_offline_roadmap(text: str, deadline: Union[str, Duration] = "1 mes") -> Optional[str]:
+    """
+    Deterministic, LLM-free roadmap built from the indexed corpus for the
+    technologies mentioned in `text` (objective/SMART objective/context).
+    Returns None if the corpus has nothing about those technologies.
+    """
+    from .nodes.roadmap import _calculate_step_time
+
+    started = time.perf_counter()
+    technologies = detect_technologies(text)
+    sections = load_corpus_sections()
+    chosen = select_sections(technologies, target_step_count(deadline), sections)
+    if not chosen:
+        return None
+
+    pool = [link for s in sections if any(t in s.technologies for t in technologies) for link in s.links]
+    links_per_step = _share_links(chosen, list(dict.fromkeys(pool)))
+    share = 1.0 / len(chosen)
+
+    steps = []
+    for i, (section, links) in enumerate(zip(chosen, links_per_step), 1):
+        title = section.title[0].upper() + section.title[1:]
+        steps.append(
+            f"*📚 {i}. {title}*\n"
+            f"{_describe(section)}\n"
+            f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, share)}\n"
+            f"🔗 _Links:_ {', '.join(links) if links else 'Documentación oficial'}"
+        )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"[OFFLINE] Built {len(steps)}-step roadmap for {technologies} in {elapsed_ms:.1f} ms")
+    return "\n\n".join(steps)
+
+
+def generic_roadmap(text: str, deadline: Union[str, Duration] = "1 mes") -> str:
+    """Last-resort concept roadmap when the corpus does not cover the technology."""
+    from .nodes.roadmap import _calculate_step_time
+
+    technologies = detect_technologies(text)
+    topic = display_name(technologies[0]) if technologies else "el tema"
+    steps = [
+        ("Fundamentos", f"Conceptos base, instalación y primeras pruebas con {topic}."),
+        ("Práctica guiada", f"Ejercicios pequeños aplicando las piezas centrales de {topic}."),
+        ("Buenas prácticas", f"Patrones recomendados, errores comunes y herramientas del ecosistema de {topic}."),
+    ][:target_step_count(deadline)]
+    share = 1.0 / len(steps)
+    return "\n\n".join(
+        f"*📚 {i}. {title} de {topic}*\n"
+        f"{description}\n"
+        f"⏱️ _Tiempo:_ {_calculate_step_time(deadline, share)}\n"
+        f"🔗 _Links:_ Documentación oficial de {topic}"
+        for i, (title, description) in enumerate(steps, 1)
+    )
@@ -1,12 +1,34 @@
-from typing import Dict, Any, TypedDict, List, Literal
-import os
+from typing import Dict, Any, TypedDict, List, Literal, Optional
+import asyncio
+import functools
+import time
 from .nodes.reviewer import review_objective
 from .nodes.smart_obj import to_smart_objective
-from .nodes.rag import retrieve_context
+from .nodes.rag import route_collections, retrieve_context_sharded
 from .nodes.roadmap import build_roadmap
 from .nodes.final_assignment import build_final_assignment
-from langgraph.graph import StateGraph, START, END
-from langsmith import traceable
+from .catalog import lookup_bundle, personalize_bundle
+from .profiles import build_profile, get_profile_by_fingerprint
+from .deadlines import Duration, DEFAULT_DEADLINE
+from .technologies import detect_technologies
+from .tracing import langchain_tracing, traceable
+from .config import get_rag_top_k, get_default_latency_tier
+from .pipeline_metrics import get_pipeline_metrics
+from .fallbacks import note_fallback, track_fallbacks
+
+# Graph variant per latency tier (AgentRequest.latency_tier):
+# - fast: reviewer, catalog, SMART objective and a compact roadmap; no RAG, no final assignment
+# - standard: full roadmap with RAG context; no final assignment
+# - full: every node
+LATENCY_TIERS = ("fast", "standard", "full")
+# Tiers whose graph has the RAG node (and so uses a query embedding)
+RAG_TIERS = ("standard", "full")
+
+
+def resolve_latency_tier(tier: Optional[str]) -> str:
+    """The requested tier, PIPELINE_LATENCY_TIER when none was given; unknown tiers run in full."""
+    tier = tier or get_default_latency_tier()
+    return tier if tier in LATENCY_TIERS else "full"
 
 
 class AgentState(TypedDict):
@@ -15,10 +37,39 @@ class AgentState(TypedDict):
     is_valid: bool
     status: str
     deadline: str  # Plazo para alcanzar el objetivo (ej: "1 mes", "2 semanas", "3 meses")
+    deadline_days: int  # Mismo plazo en días, parseado una sola vez en el reviewer
     smart_objective: str
     context: str
     roadmap: str
     final_assignment: str
+    query_embedding: Optional[List[float]]  # Embedding del objetivo precalculado (ej: en /agent/batch)
+    catalog_hit: bool
+    skills_fingerprint: str  # Huella estable del perfil de skills (ver profiles.SkillProfile)
+    technologies: List[str]  # Tecnologías detectadas en el objetivo; eligen los shards del RAG
+    latency_tier: str  # Variante del grafo que ejecuta este request (ver LATENCY_TIERS)
+    degraded: List[str]  # Nodos que respondieron con un fallback; un reintento checkpointed los vuelve a ejecutar
+
+def _skills_text(state: AgentState, kind: str) -> str:
+    """Pre-rendered skills snippet for a node, shared by every request with the same profile."""
+    profile = get_profile_by_fingerprint(state.get("skills_fingerprint") or "")
+    if profile is None:
+        profile = build_profile(state.get("skills", []))
+    return profile.render(kind)
+
+
+def _degraded(state: AgentState, node: str, fallbacks: List[str]) -> List[str]:
+    """The state's degraded nodes, with `node` listed only if its stage used a fallback this time."""
+    degraded = [name for name in state.get("degraded") or [] if name != node]
+    return degraded + [node] if fallbacks else degraded
+
+
+def _deadline(state: AgentState) -> Duration:
+    """The Duration parsed by the reviewer, rebuilt from state without re-parsing."""
+    return Duration(
+        state.get("deadline_days") or DEFAULT_DEADLINE.days,
+        state.get("deadline") or DEFAULT_DEADLINE.label,
+    )
+
 
 @traceable
 async def reviewer_node(state: AgentState) -> AgentState:
@@ -33,27 +84,65 @@ async def reviewer_node(state: AgentState) -> AgentState:
     objective = state.get("objective", "")
     print(f"📝 Input: {len(objective)} chars | Preview: '{objective[:80]}...'")
     
-    is_valid, deadline = await review_objective(objective)
+    with track_fallbacks() as fallbacks:
+        is_valid, deadline = await review_objective(objective)
+    degraded = _degraded(state, "reviewer", fallbacks)
     
     if not is_valid:
         print(f"❌ Status: REJECTED")
-        print(f"⏰ Deadline detected: {deadline}")
+        print(f"⏰ Deadline detected: {deadline.label}")
         print(f"➡️  Next: END (invalid objective)")
         return {
             **state,
             "is_valid": False,
             "status": "invalid_objective",
-            "deadline": deadline,
+            "deadline": deadline.label,
+            "deadline_days": deadline.days,
+            "degraded": degraded,
         }
     
+    technologies = detect_technologies(objective)
     print(f"✅ Status: ACCEPTED")
-    print(f"⏰ Deadline: {deadline}")
-    print(f"➡️  Next: SMART OBJECTIVE NODE")
+    print(f"⏰ Deadline: {deadline.label} ({deadline.days} días)")
+    print(f"🏷️  Technologies: {technologies or '-'}")
+    print(f"➡️  Next: CATALOG LOOKUP")
     return {
         **state,
         "is_valid": True,
         "status": "ok",
-        "deadline": deadline,
+        "deadline": deadline.label,
+        "deadline_days": deadline.days,
+        "technologies": technologies,
+        "degraded": degraded,
+    }
+
+
+@traceable
+async def catalog_node(state: AgentState) -> AgentState:
+    """
+    Serves a precomputed bundle (SMART objective, roadmap, final assignment) for common
+    technology/deadline pairs, lightly personalized. On a miss the pipeline continues as usual.
+    """
+    objective = state.get("objective", "")
+    skills = state.get("skills", [])
+    deadline = state.get("deadline", "1 mes")
+    tier = state.get("latency_tier", "full")
+
+    bundle = lookup_bundle(objective, deadline, skills)
+    if not bundle:
+        return {
+            **state,
+            "catalog_hit": False,
+        }
+
+    print("\n" + "="*60)
+    print("📇 CATALOG HIT (precomputed roadmap)")
+    print("="*60)
+    print(f"➡️  Next: END (skipping LLM stages)")
+    return {
+        **state,
+        **personalize_bundle(bundle, objective, skills, tier),
+        "catalog_hit": True,
     }
 
 
@@ -74,14 +163,18 @@ async def to_smart_obj_node(state: AgentState) -> AgentState:
     print(f"⏰ Deadline: {deadline}")
     print(f"🔄 Generating SMART objective...")
     
-    smart_text = await to_smart_objective(objective, skills, deadline)
+    with track_fallbacks() as fallbacks:
+        smart_text = await to_smart_objective(
+            objective, skills, deadline, skills_text=_skills_text(state, "smart")
+        )
     
     print(f"✅ Generated: {len(smart_text)} chars")
-    print(f"➡️  Next: RAG NODE")
+    print(f"➡️  Next: {'ROADMAP BUILDER NODE' if state.get('latency_tier') == 'fast' else 'RAG NODE'}")
     
     return {
         **state,
         "smart_objective": smart_text,
+        "degraded": _degraded(state, "to_smart_obj", fallbacks),
     }
 
 
@@ -97,22 +190,29 @@ async def rag_node(state: AgentState) -> AgentState:
     
     objective = state.get("objective", "") or ""
     print(f"🔎 Query: '{objective[:80]}...'")
-    print(f"🗄️  Collection: docs | k=1")
     
-    try:
-        context = retrieve_context(objective, collection_name="docs", k=1)
-        context_length = len(context) if context else 0
-        print(f"✅ Retrieved: {context_length} chars of context")
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        context = ""
-        print(f"⚠️  Using empty context (fallback)")
+    with track_fallbacks() as fallbacks:
+        try:
+            collections = await asyncio.to_thread(route_collections, state.get("technologies") or [], "docs")
+            k = get_rag_top_k()
+            print(f"🗄️  Collections: {', '.join(collections)} | k={k}")
+            context = await retrieve_context_sharded(
+                objective, collections, k=k, embedding=state.get("query_embedding")
+            )
+            context_length = len(context) if context else 0
+            print(f"✅ Retrieved: {context_length} chars of context")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            context = ""
+            note_fallback("rag")
+            print(f"⚠️  Using empty context (fallback)")
     
     print(f"➡️  Next: ROADMAP BUILDER NODE")
     
     return {
         **state,
         "context": context,
+        "degraded": _degraded(state, "rag", fallbacks),
     }
 
 
@@ -121,6 +221,18 @@ async def roadmap_builder_node(state: AgentState) -> AgentState:
     """
     Generates a short roadmap based on the SMART objective, optional context, user skills, and deadline.
     """
+    return await _roadmap_builder(state, compact=False)
+
+
+@traceable
+async def compact_roadmap_builder_node(state: AgentState) -> AgentState:
+    """
+    Roadmap of the fast tier: at most a few one-line steps from a single LLM call, without RAG context.
+    """
+    return await _roadmap_builder(state, compact=True)
+
+
+async def _roadmap_builder(state: AgentState, compact: bool) -> AgentState:
     print("\n" + "="*60)
     print("🗺️  [STEP 4/4] ROADMAP BUILDER NODE")
     print("="*60)
@@ -128,22 +240,26 @@ async def roadmap_builder_node(state: AgentState) -> AgentState:
     smart = state.get("smart_objective", "") or ""
     ctx = state.get("context", "") or ""
     skills = state.get("skills", [])
-    deadline = state.get("deadline", "1 mes")
+    deadline = _deadline(state)
     
     print(f"📋 Skills: {len(skills)}")
     print(f"📝 SMART objective: {len(smart)} chars")
     print(f"📚 Context: {len(ctx)} chars")
-    print(f"⏰ Deadline: {deadline}")
+    print(f"⏰ Deadline: {deadline.label}")
     print(f"🔄 Building roadmap...")
     
-    roadmap = await build_roadmap(smart, ctx, skills, deadline)
+    with track_fallbacks() as fallbacks:
+        roadmap = await build_roadmap(
+            smart, ctx, skills, deadline, skills_text=_skills_text(state, "roadmap"), compact=compact
+        )
     
     print(f"✅ Generated: {len(roadmap)} chars")
-    print(f"➡️  Next: FINAL ASSIGNMENT NODE")
+    print(f"➡️  Next: {'FINAL ASSIGNMENT NODE' if state.get('latency_tier', 'full') == 'full' else 'END'}")
     
     return {
         **state,
         "roadmap": roadmap or "",
+        "degraded": _degraded(state, "roadmap_builder", fallbacks),
     }
 
 
@@ -159,76 +275,210 @@ async def final_assignment_node(state: AgentState) -> AgentState:
     print("🧪  [FINAL] FINAL ASSIGNMENT NODE")
     print("="*60)
     print(f"📚 Roadmap length: {len(roadmap)} chars | Skills: {len(skills)}")
-    assignment = await build_final_assignment(roadmap, skills)
+    with track_fallbacks() as fallbacks:
+        assignment = await build_final_assignment(
+            roadmap, skills, skills_text=_skills_text(state, "final_assignment")
+        )
     print(f"✅ Final assignment: {len(assignment)} chars")
     return {
         **state,
         "final_assignment": assignment or "",
+        "degraded": _degraded(state, "final_assignment_task", fallbacks),
     }
 
 
 @traceable
-def should_to_smart_obj(state: AgentState) -> Literal["to_smart_obj", "end"]:
+def should_to_smart_obj(state: AgentState) -> Literal["catalog", "end"]:
     """
-    After reviewer_node, if valid -> go to to_smart_obj, else -> end.
+    After reviewer_node, if valid -> look up the catalog (then to_smart_obj), else -> end.
     """
     if state.get("is_valid", False):
-        return "to_smart_obj"
+        return "catalog"
     return "end"
 
 
-workflow = StateGraph(AgentState)
+@traceable
+def should_generate(state: AgentState) -> Literal["to_smart_obj", "end"]:
+    """
+    After catalog_node, on a catalog hit -> end, else -> to_smart_obj.
+    """
+    if state.get("catalog_hit", False):
+        return "end"
+    return "to_smart_obj"
+
+
+@functools.lru_cache(maxsize=2 * len(LATENCY_TIERS))
+def get_app(checkpointed: bool = False, tier: str = "full"):
+    """
+    Builds and compiles the LangGraph workflow of a latency tier on first use.
+    Kept out of module import so importing the pipeline stays cheap; the server
+    compiles every tier from its lifespan hook before accepting traffic.
+    With `checkpointed`, the graph saves its state after every node (see
+    app.checkpoints) so a retried request resumes instead of starting over.
+    """
+    from langgraph.graph import StateGraph, START, END
 
-workflow.add_node("reviewer", reviewer_node)
-workflow.add_node("to_smart_obj", to_smart_obj_node)
-workflow.add_node("rag", rag_node)
-workflow.add_node("roadmap_builder", roadmap_builder_node)
-workflow.add_node("final_assignment_task", final_assignment_node)
+    workflow = StateGraph(AgentState)
+
+    workflow.add_node("reviewer", reviewer_node)
+    workflow.add_node("catalog", catalog_node)
+    workflow.add_node("to_smart_obj", to_smart_obj_node)
+    if tier == "fast":
+        workflow.add_node("roadmap_builder", compact_roadmap_builder_node)
+    else:
+        workflow.add_node("rag", rag_node)
+        workflow.add_node("roadmap_builder", roadmap_builder_node)
+    if tier == "full":
+        workflow.add_node("final_assignment_task", final_assignment_node)
+
+    workflow.add_edge(START, "reviewer")
+    workflow.add_conditional_edges(
+        "reviewer",
+        should_to_smart_obj,
+        {
+            "catalog": "catalog",
+            "end": END
+        }
+    )
+    workflow.add_conditional_edges(
+        "catalog",
+        should_generate,
+        {
+            "to_smart_obj": "to_smart_obj",
+            "end": END
+        }
+    )
+    if tier == "fast":
+        workflow.add_edge("to_smart_obj", "roadmap_builder")
+    else:
+        workflow.add_edge("to_smart_obj", "rag")
+        workflow.add_edge("rag", "roadmap_builder")
+    if tier == "full":
+        workflow.add_edge("roadmap_builder", "final_assignment_task")
+        workflow.add_edge("final_assignment_task", END)
+    else:
+        workflow.add_edge("roadmap_builder", END)
+
+    if checkpointed:
+        from .checkpoints import get_checkpointer
+        return workflow.compile(checkpointer=get_checkpointer())
+    return workflow.compile()
+
+
+async def _invoke_checkpointed(initial_state: AgentState, request_id: str) -> Dict[str, Any]:
+    """
+    Runs the graph on the thread `request_id`. A retry of the same request resumes
+    from the first node that did not complete; a retry of a finished request returns
+    the stored final state without running any node. Nodes that answered with a
+    fallback (state "degraded") do not count as completed: the retry runs again from
+    the earliest of them.
+    """
+    from .checkpoints import get_checkpointer, maybe_gc_checkpoints
+
+    # SQLite GC deletes rows: keep it off the event loop like every other saver call
+    await asyncio.to_thread(maybe_gc_checkpoints)
+    app = get_app(checkpointed=True, tier=initial_state["latency_tier"])
+    config = {"configurable": {"thread_id": request_id}}
+    snapshot = await app.aget_state(config)
+    saved = snapshot.values or {}
+    if saved:
+        same_request = (
+            saved.get("objective") == initial_state["objective"]
+            and saved.get("skills_fingerprint") == initial_state["skills_fingerprint"]
+            and saved.get("latency_tier", "full") == initial_state["latency_tier"]
+        )
+        if not same_request:
+            print(f"[CHECKPOINT] Request id {request_id!r} reused for a different request, starting over")
+            await get_checkpointer().adelete_thread(request_id)
+        elif saved.get("degraded"):
+            rerun = await _degraded_checkpoint(app, snapshot, saved["degraded"])
+            if rerun is None:
+                print(f"[CHECKPOINT] Request {request_id!r} degraded at {saved['degraded']}, starting over")
+                return await app.ainvoke(initial_state, config)
+            print(f"[CHECKPOINT] Request {request_id!r} degraded at {saved['degraded']}, "
+                  f"re-running from {list(rerun.next)}")
+            return await app.ainvoke(None, rerun.config)
+        elif not snapshot.next:
+            print(f"[CHECKPOINT] Request {request_id!r} already completed, returning stored result")
+            return saved
+        else:
+            print(f"[CHECKPOINT] Resuming request {request_id!r} at {list(snapshot.next)}")
+            return await app.ainvoke(None, config)
+    return await app.ainvoke(initial_state, config)
 
-workflow.add_edge(START, "reviewer")
-workflow.add_conditional_edges(
-    "reviewer",
-    should_to_smart_obj,
-    {
-        "to_smart_obj": "to_smart_obj",
-        "end": END
-    }
-)
-workflow.add_edge("to_smart_obj", "rag")
-workflow.add_edge("rag", "roadmap_builder")
-workflow.add_edge("roadmap_builder", "final_assignment_task")
-workflow.add_edge("final_assignment_task", END)
 
-app = workflow.compile()
+async def _degraded_checkpoint(app, snapshot, degraded: List[str]):
+    """
+    Walks the run back from `snapshot` to the checkpoint right before the earliest
+    degraded node ran; resuming from it re-runs that node and every later one.
+    """
+    found = None
+    while snapshot is not None and snapshot.values:
+        if any(node in degraded for node in snapshot.next):
+            found = snapshot
+        if snapshot.parent_config is None:
+            break
+        snapshot = await app.aget_state(snapshot.parent_config)
+    return found
 
 
 @traceable
 async def run_pipeline(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Executes the LangGraph workflow for reviewing, SMART-transforming, retrieving context, building roadmap, and final assignment.
+    A payload "request_id" (idempotency key) makes the run checkpointed, so retrying it resumes where it failed.
+    A payload "latency_tier" (fast/standard/full) picks the graph variant; its latency is recorded per tier.
     """
+    tier = resolve_latency_tier(payload.get("latency_tier"))
+    started = time.perf_counter()
+    result = await _run_graph(payload, tier)
+    get_pipeline_metrics().record(tier, time.perf_counter() - started, result.get("status", "ok"))
+    return {**result, "latency_tier": tier}
+
+
+async def _run_graph(payload: Dict[str, Any], tier: str) -> Dict[str, Any]:
     print("\n" + "🚀" + "="*58 + "🚀")
     print("           PIPELINE EXECUTION STARTED")
     print("🚀" + "="*58 + "🚀")
     
+    profile = get_profile_by_fingerprint(payload.get("skills_fingerprint") or "")
+    if profile is None:
+        profile = build_profile(payload.get("skills", []))
+
     initial_state: AgentState = {
         "objective": payload.get("objective", ""),
-        "skills": payload.get("skills", []),
+        "skills": profile.as_dicts(),
         "is_valid": False,
         "status": "",
-        "deadline": "1 mes",
+        "deadline": DEFAULT_DEADLINE.label,
+        "deadline_days": DEFAULT_DEADLINE.days,
         "smart_objective": "",
         "context": "",
         "roadmap": "",
         "final_assignment": "",
+        "query_embedding": payload.get("query_embedding"),
+        "catalog_hit": False,
+        "skills_fingerprint": profile.fingerprint,
+        "technologies": [],
+        "latency_tier": tier,
+        "degraded": [],
     }
     
     print(f"📊 Initial State:")
     print(f"   - Objective: {len(initial_state['objective'])} chars")
     print(f"   - Skills: {len(initial_state['skills'])} items")
+    print(f"   - Latency tier: {tier}")
     print("")
     
-    result = await app.ainvoke(initial_state)
+    from .checkpoints import get_checkpointer
+
+    request_id = payload.get("request_id") or ""
+    # LangGraph's own LangSmith runs would export whole states; nodes are traced by @traceable
+    with langchain_tracing(False):
+        if request_id and get_checkpointer() is not None:
+            result = await _invoke_checkpointed(initial_state, request_id)
+        else:
+            result = await get_app(tier=tier).ainvoke(initial_state)
     
     print("\n" + "="*60)
     print("📦 [FINAL] BUILDING RESPONSE")
@@ -0,0 +1,62 @@
+"""
+End-to-end pipeline latency per latency tier (fast/standard/full), exported by
+GET /pipeline/stats, so the saving of each tier can be checked in production.
+"""
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Tuple
+from .config import get_llm_latency_window_seconds
+
+MAX_SAMPLES = 1000
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class PipelineMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Counter = Counter()
+        self._statuses: Dict[str, Counter] = {}
+        # tier -> (monotonic timestamp, latency ms)
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+
+    def record(self, tier: str, seconds: float, status: str = "ok") -> None:
+        with self._lock:
+            self._requests[tier] += 1
+            self._statuses.setdefault(tier, Counter())[status or "ok"] += 1
+            self._samples.setdefault(tier, deque(maxlen=MAX_SAMPLES)).append((time.monotonic(), seconds * 1000))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per tier: request count, statuses and p50/p95/max over LLM_LATENCY_WINDOW_SECONDS."""
+        window = get_llm_latency_window_seconds()
+        cutoff = time.monotonic() - window if window > 0 else float("-inf")
+        tiers = {}
+        with self._lock:
+            for tier, samples in self._samples.items():
+                recent = [ms for ts, ms in samples if ts >= cutoff]
+                tiers[tier] = {
+                    "requests": self._requests[tier],
+                    "statuses": dict(self._statuses[tier]),
+                    "recent_requests": len(recent),
+                    "p50_ms": round(_percentile(recent, 50), 1) if recent else None,
+                    "p95_ms": round(_percentile(recent, 95), 1) if recent else None,
+                    "max_ms": round(max(recent), 1) if recent else None,
+                }
+        return {"window_seconds": window, "tiers": tiers}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._statuses.clear()
+            self._samples.clear()
+
+
+_metrics = PipelineMetrics()
+
+
+def get_pipeline_metrics() -> PipelineMetrics:
+    return _metrics
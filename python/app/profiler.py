@@ -0,0 +1,130 @@
+"""
+On-demand sampling profiler for a serving worker (GET /debug/profile).
+
+Two samplers run for the requested window, both at PROFILE_INTERVAL_MS:
+- threads: a daemon thread reads sys._current_frames(), so CPU-bound and blocking
+  code shows up, including code blocking the event loop itself and the
+  asyncio.to_thread workers (PGVector search, embeddings).
+- tasks: a coroutine on the serving loop walks the await chain of every task that
+  is inside run_pipeline, so wall time spent awaiting (LLM calls, gather, sleeps)
+  is attributed to the node and call that awaits it. If the loop is blocked these
+  samples pause, and the thread samples show the blocker.
+
+The result is a collapsed-stack file ("frame;frame;frame count" per line), readable
+by flamegraph.pl, speedscope or inferno. Overhead is bounded by the interval (10 ms
+minimum), the stack depth and the session length; one session runs at a time.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from .config import get_profile_interval_ms, get_profile_max_seconds
+
+# Frames kept per sample, innermost first
+MAX_DEPTH = 64
+MIN_INTERVAL_MS = 10.0
+
+_session_lock = threading.Lock()
+
+
+class ProfileBusy(RuntimeError):
+    """Another profiling session is running."""
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+def _frame_stack(frame) -> List[str]:
+    """Outermost-first labels of a thread's frames."""
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        stack.append(_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_chain(task: asyncio.Task) -> List[str]:
+    """Outermost-first labels of the coroutines a task is suspended in."""
+    stack = []
+    coro = task.get_coro()
+    while coro is not None and len(stack) < MAX_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_label(frame.f_code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return stack
+
+
+def _sample_threads(counts: Counter, stop: threading.Event, interval: float) -> None:
+    me = threading.get_ident()
+    while not stop.wait(interval):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = _frame_stack(frame)
+            if stack:
+                counts[";".join([f"thread:{names.get(ident, ident)}"] + stack)] += 1
+
+
+async def _sample_tasks(counts: Counter, deadline: float, interval: float) -> None:
+    me = asyncio.current_task()
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        for task in asyncio.all_tasks():
+            if task is me or task.done():
+                continue
+            stack = _await_chain(task)
+            if any(label.startswith("run_pipeline ") for label in stack):
+                counts[";".join(["task:run_pipeline"] + stack)] += 1
+
+
+async def profile(seconds: float, interval_ms: Optional[float] = None) -> Dict[str, object]:
+    """
+    Samples the worker for `seconds` (capped at PROFILE_MAX_SECONDS) and returns
+    {"collapsed": text, "samples": n, "seconds": s, "interval_ms": i}.
+    Raises ProfileBusy if a session is already running.
+    """
+    if not _session_lock.acquire(blocking=False):
+        raise ProfileBusy("a profiling session is already running")
+    try:
+        seconds = max(0.1, min(float(seconds), get_profile_max_seconds()))
+        interval_ms = max(MIN_INTERVAL_MS, interval_ms or get_profile_interval_ms())
+        interval = interval_ms / 1000
+        # One counter per sampler: they run on different threads
+        thread_counts: Counter = Counter()
+        task_counts: Counter = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=_sample_threads, args=(thread_counts, stop, interval), name="profiler", daemon=True
+        )
+        print(f"[PROFILE] Sampling for {seconds:.1f} s every {interval_ms:.0f} ms")
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await _sample_tasks(task_counts, time.monotonic() + seconds, interval)
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+        elapsed = time.perf_counter() - started
+        counts = thread_counts + task_counts
+        lines = [f"{stack} {n}" for stack, n in sorted(counts.items())]
+        print(f"[PROFILE] {sum(counts.values())} samples, {len(lines)} distinct stacks in {elapsed:.1f} s")
+        return {
+            "collapsed": "\n".join(lines) + ("\n" if lines else ""),
+            "samples": sum(counts.values()),
+            "seconds": round(elapsed, 2),
+            "interval_ms": interval_ms,
+        }
+    finally:
+        _session_lock.release()
+
+
+def is_running() -> bool:
+    return _session_lock.locked()
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .cache import get_shared_cache
+from .nodes.smart_obj import _format_skills_brief
+from .nodes.roadmap import _format_skills
+from .nodes.final_assignment import _format_skills_lines
+
+# Prompt snippet renderers, keyed by the node that consumes them
+SNIPPET_RENDERERS = {
+    "smart": _format_skills_brief,
+    "roadmap": _format_skills,
+    "final_assignment": _format_skills_lines,
+}
+
+MAX_PROFILES = 2048
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _field(skill: Any, name: str):
+    if isinstance(skill, dict):
+        return skill.get(name)
+    return getattr(skill, name, None)
+
+
+class SkillProfile:
+    """
+    Canonical, immutable view of a user's skills: names and categories interned,
+    duplicates dropped, sorted, and fingerprinted with a stable hash. Prompt
+    snippets for each node are rendered once per profile and reused.
+    """
+
+    __slots__ = ("skills", "fingerprint", "_snippets", "_dicts")
+
+    def __init__(self, skills: Tuple[Tuple[Optional[str], Optional[str], Tuple[str, ...]], ...]):
+        self.skills = skills
+        canonical = json.dumps(skills, ensure_ascii=False, separators=(",", ":"))
+        self.fingerprint = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+        self._snippets: Dict[str, str] = {}
+        self._dicts: Optional[List[Dict[str, Any]]] = None
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """Skills in the request payload shape. Shared between requests: do not mutate."""
+        if self._dicts is None:
+            self._dicts = [
+                {"name": name, "proficiency": proficiency, "categories": list(categories) or None}
+                for name, proficiency, categories in self.skills
+            ]
+        return self._dicts
+
+    def render(self, kind: str) -> str:
+        snippet = self._snippets.get(kind)
+        if snippet is None:
+            snippet = SNIPPET_RENDERERS[kind](self.as_dicts())
+            self._snippets[kind] = snippet
+        return snippet
+
+
+def canonicalize(skills: Iterable[Any]) -> Tuple[Tuple[Optional[str], Optional[str], Tuple[str, ...]], ...]:
+    """Accepts skill dicts or pydantic Skill models."""
+    entries = set()
+    for skill in skills or []:
+        name = _field(skill, "name")
+        proficiency = _field(skill, "proficiency")
+        categories = tuple(sorted(_intern(c) for c in (_field(skill, "categories") or []) if c))
+        entries.add((_intern(name), _intern(proficiency), categories))
+    return tuple(sorted(entries, key=lambda e: ((e[0] or "").lower(), e[1] or "", e[2])))
+
+
+# Process-local registries: fingerprint -> profile, and user_id -> (version, fingerprint)
+_lock = threading.Lock()
+_by_fingerprint: "OrderedDict[str, SkillProfile]" = OrderedDict()
+_by_user: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+
+
+def _remember(profile: SkillProfile) -> SkillProfile:
+    with _lock:
+        existing = _by_fingerprint.get(profile.fingerprint)
+        if existing is not None:
+            _by_fingerprint.move_to_end(profile.fingerprint)
+            return existing
+        _by_fingerprint[profile.fingerprint] = profile
+        while len(_by_fingerprint) > MAX_PROFILES:
+            _by_fingerprint.popitem(last=False)
+    return profile
+
+
+def build_profile(skills: Iterable[Any]) -> SkillProfile:
+    """Returns the shared SkillProfile for these skills (same skills -> same object)."""
+    return _remember(SkillProfile(canonicalize(skills)))
+
+
+def get_profile_by_fingerprint(fingerprint: str) -> Optional[SkillProfile]:
+    with _lock:
+        return _by_fingerprint.get(fingerprint)
+
+
+def _shared_key(user_id: str, version: str) -> str:
+    return f"profile:{user_id}:{version}"
+
+
+def store_user_profile(user_id: str, version: str, profile: SkillProfile) -> None:
+    with _lock:
+        _by_user[user_id] = (version, profile.fingerprint)
+        _by_user.move_to_end(user_id)
+        while len(_by_user) > MAX_PROFILES:
+            _by_user.popitem(last=False)
+    # Make the profile visible to the other workers as well
+    cache = get_shared_cache()
+    if cache is not None:
+        cache.set("profiles", _shared_key(user_id, version), json.dumps(profile.skills, ensure_ascii=False))
+
+
+def get_user_profile(user_id: str, version: str) -> Optional[SkillProfile]:
+    with _lock:
+        entry = _by_user.get(user_id)
+    if entry and entry[0] == version:
+        profile = get_profile_by_fingerprint(entry[1])
+        if profile is not None:
+            return profile
+    cache = get_shared_cache()
+    if cache is not None:
+        raw = cache.get("profiles", _shared_key(user_id, version))
+        if raw is not None:
+            skills = tuple((_intern(n), _intern(p), tuple(_intern(c) for c in cats)) for n, p, cats in json.loads(raw))
+            profile = _remember(SkillProfile(skills))
+            with _lock:
+                _by_user[user_id] = (version, profile.fingerprint)
+            return profile
+    return None
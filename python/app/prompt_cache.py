@@ -0,0 +1,158 @@
+"""
+Provider-side caching of the static system prompts (PROMPT_CONTEXT_CACHE).
+
+Every node keeps its system prompt byte-identical across requests and puts the
+variable content (objective, skills, context) last, in the human message. Gemini
+then reuses the prefix on its own (implicit caching). With PROMPT_CONTEXT_CACHE=1
+each system prompt is additionally stored once as a Gemini CachedContent resource
+per (model, prompt), created in a background thread and renewed before its TTL
+runs out. Requests reference it instead of resending the system prompt. Prompts
+under PROMPT_CACHE_MIN_TOKENS (the provider minimum) are sent inline: llm.py only
+builds GeminiChatModel for nodes whose system prompt qualifies, every other node
+uses the stock ChatGoogleGenerativeAI.
+
+GeminiChatModel also reports the cached prompt tokens of its responses
+(usage_metadata.input_token_details.cache_read).
+"""
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai.chat_models import _achat_with_retry, _response_to_result
+from .config import (
+    get_google_api_key,
+    get_prompt_cache_ttl_seconds,
+    get_prompt_cache_min_tokens,
+)
+
+# Renew a cached prefix when less than this share of its TTL is left
+_RENEW_FRACTION = 0.1
+# Do not retry a failed creation for this long
+_FAILURE_COOLDOWN_SECONDS = 300.0
+
+
+class GeminiChatModel(ChatGoogleGenerativeAI):
+    """
+    ChatGoogleGenerativeAI that reports cached prompt tokens and, with `context_cache`,
+    sends a text-only system prompt as a reference to its CachedContent once available.
+    """
+
+    context_cache: bool = False
+
+    def _prepare_request(self, messages, **kwargs):
+        request = super()._prepare_request(messages, **kwargs)
+        if self.context_cache and "system_instruction" in request:
+            parts = request.system_instruction.parts
+            if len(parts) == 1 and parts[0].text:
+                name = cached_prefix_name(self.model, parts[0].text)
+                if name:
+                    del request.system_instruction
+                    request.cached_content = name
+        return request
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        extras = ("tools", "functions", "safety_settings", "tool_config")
+        if not self.async_client or any(kwargs.get(key) for key in extras):
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        for key in extras:
+            kwargs.pop(key, None)
+        request = self._prepare_request(messages, stop=stop, generation_config=kwargs.pop("generation_config", None))
+        response = await _achat_with_retry(
+            request=request,
+            **kwargs,
+            generation_method=self.async_client.generate_content,
+            metadata=self.default_metadata,
+        )
+        result = _response_to_result(response)
+        cached = getattr(response.usage_metadata, "cached_content_token_count", 0) or 0
+        for generation in result.generations:
+            usage = getattr(generation.message, "usage_metadata", None)
+            if usage is not None:
+                usage["input_token_details"] = {"cache_read": cached}
+        return result
+
+
+class _Entry:
+    __slots__ = ("name", "expires_at", "failed_at", "creating")
+
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.expires_at = 0.0
+        self.failed_at = 0.0
+        self.creating = False
+
+
+_entries: Dict[str, _Entry] = {}
+_lock = threading.Lock()
+_stats = {"created": 0, "failed": 0, "inline_too_small": 0}
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def qualifies(prefix: str) -> bool:
+    """Whether `prefix` is big enough (PROMPT_CACHE_MIN_TOKENS) to be stored as a CachedContent."""
+    return _estimate_tokens(prefix) >= get_prompt_cache_min_tokens()
+
+
+def _create(key: str, model: str, prefix: str, ttl: float) -> None:
+    entry = _entries[key]
+    try:
+        import datetime
+        import google.generativeai as genai
+        from google.generativeai import caching
+
+        genai.configure(api_key=get_google_api_key())
+        model_name = model if model.startswith("models/") else f"models/{model}"
+        cached = caching.CachedContent.create(
+            model=model_name,
+            display_name=f"prefix-{key[:16]}",
+            system_instruction=prefix,
+            ttl=datetime.timedelta(seconds=ttl),
+        )
+        with _lock:
+            entry.name = cached.name
+            entry.expires_at = time.time() + ttl
+            _stats["created"] += 1
+        print(f"[PROMPT_CACHE] Cached prefix for {model} ({_estimate_tokens(prefix)} tokens est.): {cached.name}")
+    except Exception as e:
+        with _lock:
+            entry.failed_at = time.time()
+            _stats["failed"] += 1
+        print(f"[PROMPT_CACHE] Could not cache prefix for {model}: {e}")
+    finally:
+        with _lock:
+            entry.creating = False
+
+
+def cached_prefix_name(model: str, prefix: str) -> Optional[str]:
+    """
+    CachedContent name for (model, prefix), or None while it is not usable yet
+    (being created, too small, failed recently). Never blocks on the provider.
+    """
+    if not qualifies(prefix):
+        with _lock:
+            _stats["inline_too_small"] += 1
+        return None
+    key = hashlib.sha256(f"{model}\n{prefix}".encode("utf-8")).hexdigest()
+    ttl = get_prompt_cache_ttl_seconds()
+    now = time.time()
+    with _lock:
+        entry = _entries.setdefault(key, _Entry())
+        usable = entry.name is not None and entry.expires_at - now > ttl * _RENEW_FRACTION
+        if usable:
+            return entry.name
+        if entry.creating or now - entry.failed_at < _FAILURE_COOLDOWN_SECONDS:
+            return entry.name if entry.expires_at > now else None
+        entry.creating = True
+    threading.Thread(target=_create, args=(key, model, prefix, ttl), daemon=True).start()
+    return entry.name if entry.expires_at > now else None
+
+
+def stats() -> Dict[str, Any]:
+    now = time.time()
+    with _lock:
+        active = sum(1 for e in _entries.values() if e.name and e.expires_at > now)
+        return {**_stats, "active": active}
@@ -1,13 +1,57 @@
-from fastapi import APIRouter, Request
-from .schemas import AgentRequest, AgentResponse
+import asyncio
+import hmac
+import json
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from .schemas import AgentRequest, AgentResponse, BatchAgentRequest, BatchAgentItemResponse
 from .pipeline import run_pipeline
+from .batch import run_batch
+from .cache import get_shared_cache
+from .config import get_admin_token, get_llm_router_p95_ms, get_prompt_context_cache
+from .llm import NODE_TIERS, configured_model
+from .llm_metrics import get_llm_metrics
+from .profiles import SkillProfile, build_profile, get_user_profile, store_user_profile
 
 router = APIRouter()
 
 
+async def _resolve_profile(body: AgentRequest) -> SkillProfile:
+    """
+    Returns the canonical skill profile for a request: built from `skills` when sent
+    (and cached under user_id/profile_version), otherwise looked up from the cache.
+    The shared cache is SQLite (busy timeout): its reads and writes run off the event loop.
+    """
+    if body.skills is not None:
+        profile = build_profile(body.skills)
+        if body.user_id:
+            await asyncio.to_thread(
+                store_user_profile, body.user_id, body.profile_version or profile.fingerprint, profile
+            )
+        return profile
+    if body.user_id and body.profile_version:
+        profile = await asyncio.to_thread(get_user_profile, body.user_id, body.profile_version)
+        if profile is None:
+            # Client must resend the full skills list for this profile version
+            raise HTTPException(status_code=409, detail="profile_not_cached")
+        return profile
+    return build_profile([])
+
+
+def _build_payload(body: AgentRequest, profile: SkillProfile, request_id: Optional[str] = None) -> dict:
+    return {
+        "objective": body.objective,
+        "skills": profile.as_dicts(),
+        "skills_fingerprint": profile.fingerprint,
+        "request_id": body.request_id or request_id,
+        "latency_tier": body.latency_tier,
+    }
+
+
 @router.post("/agent", response_model=AgentResponse)
 async def agent_endpoint(body: AgentRequest, request: Request):
-    payload = {"objective": body.objective, "skills": [s.model_dump() for s in body.skills]}
+    profile = await _resolve_profile(body)
+    payload = _build_payload(body, profile, request.headers.get("Idempotency-Key"))
     result = await run_pipeline(payload)
 
     # Unify contract: always return 'response' to the Node client
@@ -18,7 +62,131 @@ async def agent_endpoint(body: AgentRequest, request: Request):
         pass
     return AgentResponse(
         status=result.get("status", "ok"),
-        response=resp_text
+        response=resp_text,
+        profile_version=(body.profile_version or profile.fingerprint) if body.user_id else profile.fingerprint,
+        latency_tier=result.get("latency_tier"),
     )
 
 
+@router.post("/agent/batch")
+async def agent_batch_endpoint(body: BatchAgentRequest):
+    """
+    Runs a cohort of requests and streams one NDJSON line per item
+    (BatchAgentItemResponse) as soon as that item completes. An item whose profile
+    cannot be resolved gets its own error line (status "profile_not_cached") first;
+    the rest of the batch still runs.
+    """
+    payloads, indices, failed = [], [], []
+    for index, item in enumerate(body.items):
+        try:
+            profile = await _resolve_profile(item)
+        except HTTPException as e:
+            failed.append(BatchAgentItemResponse(index=index, status=str(e.detail), response=""))
+            continue
+        payloads.append(_build_payload(item, profile))
+        indices.append(index)
+
+    async def stream():
+        for item in failed:
+            yield json.dumps(item.model_dump(), ensure_ascii=False) + "\n"
+        if not payloads:
+            return
+        async for position, result in run_batch(payloads, max_concurrency=body.max_concurrency):
+            item = BatchAgentItemResponse(
+                index=indices[position],
+                status=result.get("status", "ok"),
+                response=result.get("response") or "",
+            )
+            yield json.dumps(item.model_dump(), ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get("/cache/stats")
+async def cache_stats_endpoint():
+    cache = get_shared_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/llm/stats")
+async def llm_stats_endpoint():
+    """
+    Per-model call counts, outcomes, calling nodes and recent p50/p95 latency; per-node
+    token usage (cached vs. uncached input), truncation and prompt-cache resources.
+    """
+    context_cache = {"enabled": False}
+    if get_prompt_context_cache():
+        from .prompt_cache import stats as prompt_cache_stats
+        context_cache = {"enabled": True, **prompt_cache_stats()}
+    return {
+        "node_models": {node: configured_model(node) for node in NODE_TIERS},
+        "router_p95_ms": get_llm_router_p95_ms(),
+        "context_cache": context_cache,
+        **get_llm_metrics().snapshot(),
+    }
+
+
+@router.get("/pipeline/stats")
+async def pipeline_stats_endpoint():
+    """End-to-end pipeline latency (p50/p95) and request counts per latency tier."""
+    from .pipeline_metrics import get_pipeline_metrics
+
+    return get_pipeline_metrics().snapshot()
+
+
+@router.get("/breakers/stats")
+async def breakers_stats_endpoint():
+    """Circuit breaker state per dependency (llm:<model>, embeddings, vector_db) and its recent failure/slow rates."""
+    from .circuit_breaker import snapshot
+
+    return snapshot()
+
+
+@router.get("/loop/stats")
+async def loop_stats_endpoint():
+    """
+    Event-loop scheduling lag (histogram, recent p50/p99, max) and the call sites
+    that blocked the loop past LOOP_SLOW_CALLBACK_MS, with their captured stacks.
+    """
+    from .loop_monitor import get_loop_monitor
+
+    monitor = get_loop_monitor()
+    if monitor is None:
+        return {"enabled": False}
+    return monitor.snapshot()
+
+
+def _require_admin(token: Optional[str]) -> None:
+    """/debug endpoints answer 404 unless ADMIN_TOKEN is set and sent as X-Admin-Token."""
+    expected = get_admin_token()
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="forbidden")
+
+
+@router.get("/debug/profile")
+async def debug_profile_endpoint(
+    seconds: float = Query(30, gt=0),
+    interval_ms: Optional[float] = Query(None, gt=0),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    Samples the worker (threads and in-flight run_pipeline tasks) for `seconds` and
+    returns a collapsed-stack file for flamegraph.pl/speedscope. One session at a time (409 otherwise).
+    """
+    _require_admin(x_admin_token)
+    from .profiler import ProfileBusy, profile
+
+    try:
+        result = await profile(seconds, interval_ms)
+    except ProfileBusy:
+        raise HTTPException(status_code=409, detail="profile_in_progress")
+    return PlainTextResponse(result["collapsed"], headers={
+        "Content-Disposition": "attachment; filename=profile.collapsed",
+        "X-Profile-Samples": str(result["samples"]),
+        "X-Profile-Seconds": str(result["seconds"]),
+        "X-Profile-Interval-Ms": str(result["interval_ms"]),
+    })
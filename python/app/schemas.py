@@ -1,5 +1,8 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+# Upper bound of a batch's max_concurrency: each concurrent pipeline holds LLM calls in flight
+MAX_BATCH_CONCURRENCY = 32
 
 
 class Skill(BaseModel):
@@ -10,11 +13,33 @@ class Skill(BaseModel):
 
 class AgentRequest(BaseModel):
     objective: str
-    skills: List[Skill] = []
+    # Omit skills and send user_id + profile_version to reuse a profile cached by the service
+    skills: Optional[List[Skill]] = None
+    user_id: Optional[str] = None
+    profile_version: Optional[str] = None
+    # Idempotency key: a retry with the same id resumes from the last completed step
+    request_id: Optional[str] = None
+    # fast: SMART objective + compact roadmap, no RAG; standard: no final assignment; full: everything.
+    # Omitted: PIPELINE_LATENCY_TIER
+    latency_tier: Optional[Literal["fast", "standard", "full"]] = None
 
 
 class AgentResponse(BaseModel):
     status: str
     response: str
+    profile_version: Optional[str] = None
+    latency_tier: Optional[str] = None
+
+
+class BatchAgentRequest(BaseModel):
+    items: List[AgentRequest]
+    # Omitted: BATCH_MAX_CONCURRENCY
+    max_concurrency: Optional[int] = Field(None, ge=1, le=MAX_BATCH_CONCURRENCY)
+
+
+class BatchAgentItemResponse(BaseModel):
+    index: int
+    status: str
+    response: str
 
 
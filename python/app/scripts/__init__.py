@@ -1,5 +1,13 @@
 __all__ = [
     "build_index",
+    "build_catalog",
+    "bench_deadlines",
+    "profile_startup",
+    "bench_tracing",
+    "bench_ann",
+    "bench_quantization",
+    "bench_retrieval",
+    "replay_load",
 ]
 
 
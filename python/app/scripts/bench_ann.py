@@ -0,0 +1,119 @@
+"""
+Query latency vs. corpus size for the PGVector collection: exact scan vs. HNSW vs. IVFFlat.
+
+Inserts synthetic clustered vectors (same dimension as text-embedding-004) in steps,
+rebuilds each index at every size and reports p50/p95 latency and recall@k against
+exact cosine neighbours. It creates/drops ANN indexes on the shared embedding table,
+so point --url at a scratch database, not production.
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import Dict, List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from ..tools.vector_index import ensure_ann_index, install_search_settings, search_settings
+
+
+class _VectorsOnly(Embeddings):
+    """The benchmark only queries by vector; text embedding is never needed."""
+
+    def embed_documents(self, texts):
+        raise NotImplementedError("bench_ann queries by vector only")
+
+    def embed_query(self, text):
+        raise NotImplementedError("bench_ann queries by vector only")
+
+
+def _clustered_vectors(rng: np.random.Generator, count: int, dims: int, clusters: int) -> np.ndarray:
+    centers = rng.normal(size=(clusters, dims))
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(count, dims))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _run_queries(store, queries: np.ndarray, corpus: np.ndarray, ids: List[str], k: int, settings: Dict) -> Dict:
+    exact = np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+    latencies, hits = [], 0
+    with search_settings(**settings):
+        for query, truth in zip(queries, exact):
+            started = time.perf_counter()
+            results = store.similarity_search_with_score_by_vector(query.tolist(), k=k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found = {doc.id for doc, _ in results}
+            hits += len(found & {ids[i] for i in truth})
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": _percentile(latencies, 95),
+        "recall": hits / (len(queries) * k),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PGVector query latency vs. corpus size per index type.")
+    parser.add_argument("--url", default=os.getenv("VECTOR_DB_URL", ""), help="Scratch database URL")
+    parser.add_argument("--sizes", default="1000,5000,20000", help="Comma-separated corpus sizes")
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--ef-search", type=int, default=40)
+    parser.add_argument("--probes", type=int, default=10)
+    parser.add_argument("--collection", default="bench_ann")
+    args = parser.parse_args()
+    if not args.url:
+        raise SystemExit("Set --url or VECTOR_DB_URL (a scratch database).")
+
+    from langchain_postgres import PGVector
+
+    url = args.url.replace("postgresql://", "postgresql+psycopg://", 1)
+    store = PGVector(
+        embeddings=_VectorsOnly(),
+        collection_name=args.collection,
+        connection=url,
+        pre_delete_collection=True,
+    )
+    install_search_settings(store)
+
+    rng = np.random.default_rng(7)
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    corpus = _clustered_vectors(rng, sizes[-1], args.dims, clusters=max(8, sizes[-1] // 250))
+    queries = _clustered_vectors(rng, args.queries, args.dims, clusters=8)
+    ids = [f"bench-{i}" for i in range(len(corpus))]
+    methods = {
+        "exact": ("none", {"enable_indexscan": "off"}),
+        "hnsw": ("hnsw", {"ef_search": args.ef_search}),
+        "ivfflat": ("ivfflat", {"probes": args.probes}),
+    }
+
+    inserted = 0
+    print(f"{'rows':>8} {'method':>8} {'build_s':>8} {'p50_ms':>8} {'p95_ms':>8} {'recall@' + str(args.k):>9}")
+    try:
+        for size in sizes:
+            for start in range(inserted, size, 1000):
+                stop = min(size, start + 1000)
+                store.add_embeddings(
+                    texts=[f"chunk {i}" for i in range(start, stop)],
+                    embeddings=corpus[start:stop].tolist(),
+                    metadatas=[{"source": f"bench_{i % 4}.md", "section": f"s{i % 50}"} for i in range(start, stop)],
+                    ids=ids[start:stop],
+                )
+            inserted = size
+            for name, (method, settings) in methods.items():
+                report = ensure_ann_index(store, method=method, rebuild=True) if method != "none" else {}
+                stats = _run_queries(store, queries, corpus[:size], ids[:size], args.k, settings)
+                print(
+                    f"{size:>8} {name:>8} {report.get('build_seconds', 0):>8.2f} "
+                    f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['recall']:>9.3f}"
+                )
+    finally:
+        store.delete_collection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import argparse
+import re
+import timeit
+from typing import List, Optional, Tuple
+from ..deadlines import parse_deadline
+
+# (text, expected days, expected label); None = no deadline in the text
+CASES: List[Tuple[str, Optional[int], Optional[str]]] = [
+    ("Quiero aprender React en 2 semanas", 14, "2 semanas"),
+    ("quiero aprender react en dos semanas", 14, "2 semanas"),
+    ("Aprender Docker en una semana", 7, "1 semana"),
+    ("aprender docker en 1 semana", 7, "1 semana"),
+    ("Python en un mes", 30, "1 mes"),
+    ("python en 1 mes", 30, "1 mes"),
+    ("Kubernetes en 3 meses", 90, "3 meses"),
+    ("kubernetes en tres meses", 90, "3 meses"),
+    ("Go en seis meses", 180, "6 meses"),
+    ("Rust en 6 meses", 180, "6 meses"),
+    ("Java en un año", 365, "1 año"),
+    ("java en 1 año", 365, "1 año"),
+    ("Java en 2 años", 730, "2 años"),
+    ("AWS en 10 días", 10, "10 días"),
+    ("aws en diez dias", 10, "10 días"),
+    ("SQL en 5 días", 5, "5 días"),
+    ("sql en un día", 1, "1 día"),
+    ("Aprender Vue 4 semanas", 28, "4 semanas"),
+    ("aprender vue cuatro semanas", 28, "4 semanas"),
+    ("Aprender Angular 12 meses", 360, "12 meses"),
+    ("aprender angular doce meses", 360, "12 meses"),
+    ("Typescript, 2 meses", 60, "2 meses"),
+    ("typescript en dos meses", 60, "2 meses"),
+    ("Terraform en ocho semanas", 56, "8 semanas"),
+    ("terraform en 8 semanas", 56, "8 semanas"),
+    ("Docker en 3 semanas y luego Kubernetes", 21, "3 semanas"),
+    ("Tengo 2 años de experiencia, quiero Kubernetes en 3 meses", 90, "3 meses"),
+    ("Hace 5 años uso Java; ahora React en 2 semanas", 14, "2 semanas"),
+    ("En 2 semanas quiero saber Git", 14, "2 semanas"),
+    ("EN 3 MESES QUIERO DOMINAR PYTHON", 90, "3 meses"),
+    ("Django en 1 mes", 30, "1 mes"),
+    ("django en 1mes", 30, "1 mes"),
+    ("flask en 2semanas", 14, "2 semanas"),
+    ("FastAPI en 15 días", 15, "15 días"),
+    ("fastapi en quince dias", 15, "15 días"),
+    ("MongoDB en cinco semanas", 35, "5 semanas"),
+    ("mongodb en 5 semanas", 35, "5 semanas"),
+    ("Node.js en nueve meses", 270, "9 meses"),
+    ("node.js en 9 meses", 270, "9 meses"),
+    ("Learn React in 2 weeks", 14, "2 semanas"),
+    ("learn python in a month", 30, "1 mes"),
+    ("learn go in one year", 365, "1 año"),
+    ("learn docker in 10 days", 10, "10 días"),
+    ("GCP en 7 dias", 7, "7 días"),
+    ("gcp en siete días", 7, "7 días"),
+    ("Azure en 3 anos", 1095, "3 años"),
+    ("azure en tres años", 1095, "3 años"),
+    ("Aprender Redis en 20 días", 20, "20 días"),
+    ("aprender redis en veinte días", 20, "20 días"),
+    ("Machine learning en 4 meses", 120, "4 meses"),
+    ("Quiero aprender React", None, None),
+    ("Necesito dominar Python", None, None),
+    ("Aprender Docker y Kubernetes", None, None),
+    ("hola", None, None),
+    ("", None, None),
+    ("Mejorar mi comunicación", None, None),
+    ("Quiero aprender Java para mañana", None, None),
+    ("Aprender 0 meses", None, None),
+    ("Quiero aprender Go", None, None),
+    ("Para las semanas que vienen, Rust", None, None),
+    ("Quiero usar Python en el día a día", None, None),
+    ("Mejorar en Java mes a mes", None, None),
+    ("Avanzar con React semana a semana", None, None),
+    ("Practicar Go día a día durante 2 meses", 60, "2 meses"),
+]
+
+
+def _legacy_extract(text: str) -> str:
+    """Previous reviewer implementation (word-replacement loop + six regexes), kept for comparison."""
+    text_lower = text.lower()
+    word_to_num = {
+        'una': '1', 'un': '1', 'uno': '1',
+        'dos': '2', 'tres': '3', 'cuatro': '4', 'cinco': '5',
+        'seis': '6', 'siete': '7', 'ocho': '8', 'nueve': '9',
+        'diez': '10', 'doce': '12'
+    }
+    for word, num in word_to_num.items():
+        text_lower = text_lower.replace(f'en {word} ', f'en {num} ')
+        text_lower = text_lower.replace(f'{word} ', f'{num} ')
+    patterns = [
+        (r'en (\d+)\s*(semana|semanas)', lambda m: f"{m.group(1)} {'semana' if m.group(1) == '1' else 'semanas'}"),
+        (r'en (\d+)\s*(mes|meses)', lambda m: f"{m.group(1)} {'mes' if m.group(1) == '1' else 'meses'}"),
+        (r'en (\d+)\s*(año|años)', lambda m: f"{m.group(1)} {'año' if m.group(1) == '1' else 'años'}"),
+        (r'(\d+)\s*(semana|semanas)', lambda m: f"{m.group(1)} {'semana' if m.group(1) == '1' else 'semanas'}"),
+        (r'(\d+)\s*(mes|meses)', lambda m: f"{m.group(1)} {'mes' if m.group(1) == '1' else 'meses'}"),
+        (r'(\d+)\s*(año|años)', lambda m: f"{m.group(1)} {'año' if m.group(1) == '1' else 'años'}"),
+    ]
+    for pattern, formatter in patterns:
+        match = re.search(pattern, text_lower)
+        if match:
+            return formatter(match)
+    return "1 mes"
+
+
+def check_cases() -> int:
+    failures = 0
+    for text, days, label in CASES:
+        parsed = parse_deadline(text)
+        got = (parsed.days, parsed.label) if parsed else (None, None)
+        if got != (days, label):
+            failures += 1
+            print(f"FAIL {text!r}: expected {(days, label)}, got {got}")
+    print(f"{len(CASES) - failures}/{len(CASES)} cases OK")
+    return failures
+
+
+def bench(rounds: int) -> None:
+    texts = [text for text, _, _ in CASES]
+
+    def run_new():
+        for text in texts:
+            parse_deadline(text)
+
+    def run_legacy():
+        for text in texts:
+            _legacy_extract(text)
+
+    for name, fn in (("parse_deadline", run_new), ("legacy", run_legacy)):
+        seconds = min(timeit.repeat(fn, number=rounds, repeat=5))
+        per_call_us = seconds / (rounds * len(texts)) * 1e6
+        print(f"{name:>15}: {per_call_us:7.2f} µs/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and micro-benchmark the deadline parser.")
+    parser.add_argument("--rounds", type=int, default=200, help="Passes over the case table per timing run")
+    parser.add_argument("--check-only", action="store_true", help="Only validate the case table")
+    args = parser.parse_args()
+
+    failures = check_cases()
+    if not args.check_only:
+        bench(args.rounds)
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
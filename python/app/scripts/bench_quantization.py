@@ -0,0 +1,188 @@
+"""
+Recall vs. latency vs. memory for the compact-vector options (RAG_QUANTIZATION,
+RAG_TRUNCATE_DIMS, RAG_RESCORE_FACTOR).
+
+Offline part (always runs): brute-force search in numpy over float32, halfvec,
+truncated and binary codes, with and without full-precision rescoring; recall@k is
+measured against exact float32 cosine neighbours.
+  --source corpus     embeds the RAG corpus sections (queries: section titles); needs GOOGLE_API_KEY
+  --source synthetic  clustered random vectors; truncation is pessimistic there because
+                      real text-embedding-004 vectors are Matryoshka-trained
+
+With --url (a scratch database), every configuration is also indexed in PGVector and
+searched through quantized_search to report real p50/p95 latency and index size.
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+
+# (label, quantization, truncate dims, rescore)
+CONFIGS: List[Tuple[str, str, int, bool]] = [
+    ("float32", "none", 0, False),
+    ("halfvec", "halfvec", 0, False),
+    ("float32/256", "none", 256, False),
+    ("float32/256+rescore", "none", 256, True),
+    ("halfvec/256+rescore", "halfvec", 256, True),
+    ("binary", "binary", 0, False),
+    ("binary+rescore", "binary", 0, True),
+    ("binary/256+rescore", "binary", 256, True),
+]
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def _corpus_vectors() -> Tuple[np.ndarray, np.ndarray]:
+    from ..offline_roadmap import load_corpus_sections
+    from ..tools.embeddings import get_embeddings, embed_queries
+
+    sections = load_corpus_sections()
+    if not sections:
+        raise SystemExit("The RAG corpus is empty (RAG_CORPUS_PATHS).")
+    embeddings = get_embeddings()
+    docs = np.array(embeddings.embed_documents([f"{s.title}\n{s.text}" for s in sections]), dtype=np.float32)
+    queries = np.array(embed_queries([s.title for s in sections]), dtype=np.float32)
+    return _normalize(docs), _normalize(queries)
+
+
+def _synthetic_vectors(count: int, queries: int, dims: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(11)
+    centers = rng.normal(size=(max(8, count // 100), dims))
+    docs = centers[rng.integers(0, len(centers), count)] + 0.4 * rng.normal(size=(count, dims))
+    picks = rng.integers(0, count, queries)
+    return _normalize(docs).astype(np.float32), _normalize(docs[picks] + 0.3 * rng.normal(size=(queries, dims))).astype(np.float32)
+
+
+def _encode(x: np.ndarray, quantization: str, dims: int) -> np.ndarray:
+    if dims:
+        x = x[:, :dims]
+    if quantization == "binary":
+        return np.packbits(x > 0, axis=1)
+    x = _normalize(x)
+    return x.astype(np.float16) if quantization == "halfvec" else x
+
+
+def _bytes_per_vector(quantization: str, dims: int, full_dims: int) -> float:
+    size = dims or full_dims
+    return float({"none": 4 * size, "halfvec": 2 * size, "binary": size / 8}[quantization])
+
+
+def _search(codes: np.ndarray, query_code: np.ndarray, quantization: str, limit: int) -> np.ndarray:
+    if quantization == "binary":
+        distances = np.unpackbits(codes ^ query_code, axis=1).sum(axis=1)
+    else:
+        distances = -(codes.astype(np.float32) @ query_code.astype(np.float32))
+    limit = min(limit, len(codes))
+    top = np.argpartition(distances, limit - 1)[:limit]
+    return top[np.argsort(distances[top])]
+
+
+def offline_report(docs: np.ndarray, queries: np.ndarray, k: int, rescore_factor: int) -> List[Dict]:
+    exact = np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+    full_dims = docs.shape[1]
+    rows = []
+    for label, quantization, dims, rescore in CONFIGS:
+        codes = _encode(docs, quantization, dims)
+        query_codes = _encode(queries, quantization, dims)
+        latencies, hits = [], 0
+        for query, query_code, truth in zip(queries, query_codes, exact):
+            started = time.perf_counter()
+            candidates = _search(codes, query_code, quantization, k * rescore_factor if rescore else k)
+            if rescore:
+                candidates = candidates[np.argsort(-(docs[candidates] @ query))][:k]
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += len(set(candidates.tolist()) & set(truth.tolist()))
+        rows.append({
+            "config": label,
+            "recall": hits / (len(queries) * min(k, len(docs))),
+            "p50_ms": statistics.median(latencies),
+            "bytes_per_vector": _bytes_per_vector(quantization, dims, full_dims),
+            "vs_float32": _bytes_per_vector(quantization, dims, full_dims) / (4 * full_dims),
+        })
+    return rows
+
+
+def database_report(url: str, docs: np.ndarray, queries: np.ndarray, k: int) -> List[Dict]:
+    from langchain_postgres import PGVector
+    from .bench_ann import _VectorsOnly, _percentile
+    from ..tools.vector_index import install_search_settings
+    from ..tools.quantized_search import ensure_quantized_index, quantized_search
+
+    store = PGVector(
+        embeddings=_VectorsOnly(),
+        collection_name="bench_quantization",
+        connection=url.replace("postgresql://", "postgresql+psycopg://", 1),
+        pre_delete_collection=True,
+    )
+    install_search_settings(store)
+    ids = [f"q-{i}" for i in range(len(docs))]
+    for start in range(0, len(docs), 1000):
+        store.add_embeddings(
+            texts=[f"chunk {i}" for i in range(start, min(len(docs), start + 1000))],
+            embeddings=docs[start:start + 1000].tolist(),
+            ids=ids[start:start + 1000],
+        )
+    exact = np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+    rows = []
+    try:
+        for label, quantization, dims, rescore in CONFIGS:
+            report = ensure_quantized_index(store, quantization=quantization, dims=dims)
+            latencies, hits = [], 0
+            for query, truth in zip(queries, exact):
+                started = time.perf_counter()
+                results = quantized_search(store, query.tolist(), k=k, quantization=quantization, dims=dims, rescore=rescore)
+                latencies.append((time.perf_counter() - started) * 1000)
+                hits += len({doc.id for doc, _ in results} & {ids[i] for i in truth})
+            rows.append({
+                "config": label,
+                "recall": hits / (len(queries) * k),
+                "p50_ms": statistics.median(latencies),
+                "p95_ms": _percentile(latencies, 95),
+                "index_kib": (report["index_bytes"] or 0) / 1024,
+            })
+    finally:
+        store.delete_collection()
+    return rows
+
+
+def _print(rows: List[Dict], columns: List[str]) -> None:
+    print("  ".join(f"{c:>20}" if i == 0 else f"{c:>12}" for i, c in enumerate(columns)))
+    for row in rows:
+        cells = []
+        for i, c in enumerate(columns):
+            value = row[c]
+            text = f"{value:.3f}" if isinstance(value, float) else str(value)
+            cells.append(f"{text:>20}" if i == 0 else f"{text:>12}")
+        print("  ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency/memory report for compressed vector search.")
+    parser.add_argument("--source", choices=["corpus", "synthetic"], default="synthetic")
+    parser.add_argument("--count", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=200, help="Synthetic query count")
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--url", default="", help="Scratch database URL for the PGVector measurements")
+    args = parser.parse_args()
+
+    if args.source == "corpus":
+        docs, queries = _corpus_vectors()
+    else:
+        docs, queries = _synthetic_vectors(args.count, args.queries, args.dims)
+    k = min(args.k, len(docs))
+    print(f"{len(docs)} vectors x {docs.shape[1]} dims, {len(queries)} queries, k={k} ({args.source})\n")
+    print("Offline (numpy brute force; p50 is numpy scan time, not PGVector's):")
+    _print(offline_report(docs, queries, k, args.rescore_factor),
+           ["config", "recall", "p50_ms", "bytes_per_vector", "vs_float32"])
+    if args.url:
+        print("\nPGVector (HNSW expression indexes):")
+        _print(database_report(args.url, docs, queries, k), ["config", "recall", "p50_ms", "p95_ms", "index_kib"])
+
+
+if __name__ == "__main__":
+    main()
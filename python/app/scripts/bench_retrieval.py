@@ -0,0 +1,182 @@
+"""
+Offline retrieval quality/latency benchmark for the RAG settings (chunking, k,
+RAG_MAX_DISTANCE, backend).
+
+Each labeled query (retrieval_queries.json: objective -> a phrase of the section that
+should be retrieved) is searched against the corpus chunked with every strategy.
+A chunk is relevant when it contains the expected phrase. Reports recall@k, MRR,
+average context tokens passed to the roadmap prompt and p95 search latency.
+
+Runs fully offline: vectors come from HashingEmbeddings, a deterministic lexical
+stand-in for text-embedding-004, and the default backend is langchain's in-memory
+store. Its distances are on a different scale than Gemini's, so compare thresholds
+relative to each other rather than copying values into RAG_MAX_DISTANCE.
+--backend pgvector --url <scratch db> runs the same sweep through PGVector.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import MarkdownHeaderTextSplitter
+from ..config import get_corpus_paths
+from .build_index import load_and_split_markdown, estimate_tokens
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), "retrieval_queries.json")
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddings(Embeddings):
+    """Feature-hashed word unigrams and character trigrams, L2-normalized. Deterministic and offline."""
+
+    def __init__(self, dims: int = 768):
+        self.dims = dims
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dims, 1.0 if (value >> 63) & 1 else -1.0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dims
+        for word in WORD_RE.findall(text.lower()):
+            features = [f"w:{word}"] + [f"c:{word[i:i + 3]}" for i in range(max(1, len(word) - 2))]
+            for feature in features:
+                index, sign = self._bucket(feature)
+                vector[index] += sign
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def _split_on(headers: List[Tuple[str, str]]) -> Callable[[str], List[Document]]:
+    def split(path: str) -> List[Document]:
+        with open(path, "r", encoding="utf-8") as f:
+            docs = MarkdownHeaderTextSplitter(headers_to_split_on=headers).split_text(f.read())
+        return [Document(page_content=d.page_content, metadata={**d.metadata, "source": path}) for d in docs]
+    return split
+
+
+# Chunking strategies under comparison; "hierarchical" is what build_index uses
+CHUNKERS: Dict[str, Callable[[str], List[Document]]] = {
+    "h1": _split_on([("#", "section")]),
+    "h1-h2": _split_on([("#", "section"), ("##", "subsection")]),
+    "h1-h3": _split_on([("#", "section"), ("##", "subsection"), ("###", "subsubsection")]),
+    "hierarchical": load_and_split_markdown,
+}
+
+
+def _memory_backend(embeddings: Embeddings, name: str, docs: List[Document], url: str):
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    store = InMemoryVectorStore(embeddings)
+    store.add_documents(docs)
+
+    def search(vector: List[float], k: int) -> List[Tuple[Document, float]]:
+        # Cosine similarity -> cosine distance, like PGVector returns
+        return [(doc, 1.0 - score) for doc, score in store.similarity_search_with_score_by_vector(vector, k=k)]
+    return search, lambda: None
+
+
+def _pgvector_backend(embeddings: Embeddings, name: str, docs: List[Document], url: str):
+    from langchain_postgres import PGVector
+
+    store = PGVector(
+        embeddings=embeddings,
+        collection_name=f"bench_retrieval_{name}",
+        connection=url.replace("postgresql://", "postgresql+psycopg://", 1),
+        pre_delete_collection=True,
+    )
+    store.add_documents(docs)
+
+    def search(vector: List[float], k: int) -> List[Tuple[Document, float]]:
+        return store.similarity_search_with_score_by_vector(vector, k=k)
+    return search, store.delete_collection
+
+
+BACKENDS = {"memory": _memory_backend, "pgvector": _pgvector_backend}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def evaluate(
+    search: Callable,
+    embeddings: Embeddings,
+    queries: List[Dict[str, str]],
+    k: int,
+    threshold: float,
+) -> Dict[str, float]:
+    reciprocal_ranks, found, tokens, latencies = [], 0, [], []
+    for item in queries:
+        vector = embeddings.embed_query(item["query"])
+        started = time.perf_counter()
+        results = search(vector, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        kept = [doc for doc, distance in results if distance is not None and distance <= threshold]
+        rank = next((i for i, doc in enumerate(kept, 1) if item["expected"] in doc.page_content), None)
+        found += rank is not None
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        tokens.append(sum(estimate_tokens(doc.page_content) for doc in kept))
+    return {
+        "recall": found / len(queries),
+        "mrr": statistics.mean(reciprocal_ranks),
+        "tokens": statistics.mean(tokens),
+        "p95_ms": _percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep chunking, k, distance threshold and backend for RAG retrieval.")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="Labeled query set (JSON list of {query, expected})")
+    parser.add_argument("--paths", default=",".join(get_corpus_paths()), help="Comma-separated markdown corpus files")
+    parser.add_argument("--chunkers", default=",".join(CHUNKERS), help=f"Subset of {list(CHUNKERS)}")
+    parser.add_argument("--k", default="1,3,5", help="Comma-separated k values")
+    parser.add_argument("--thresholds", default="0.5,0.7,0.9,1.0", help="Comma-separated max distances")
+    parser.add_argument("--backend", choices=list(BACKENDS), default="memory")
+    parser.add_argument("--url", default=os.getenv("VECTOR_DB_URL", ""), help="Scratch database for --backend pgvector")
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    ks = [int(v) for v in args.k.split(",") if v.strip()]
+    thresholds = [float(v) for v in args.thresholds.split(",") if v.strip()]
+    if args.backend == "pgvector" and not args.url:
+        raise SystemExit("--backend pgvector needs --url or VECTOR_DB_URL (a scratch database).")
+
+    embeddings = HashingEmbeddings()
+    print(f"{len(queries)} queries, corpus: {', '.join(paths)}, backend={args.backend}\n")
+    print(f"{'chunking':>12} {'chunks':>6} {'avg_tok':>7} {'k':>3} {'max_dist':>8} "
+          f"{'recall@k':>8} {'MRR':>6} {'ctx_tok':>7} {'p95_ms':>7}")
+    for name in [c.strip() for c in args.chunkers.split(",") if c.strip()]:
+        docs = [doc for path in paths for doc in CHUNKERS[name](path)]
+        avg_chunk = statistics.mean(estimate_tokens(d.page_content) for d in docs) if docs else 0
+        search, cleanup = BACKENDS[args.backend](embeddings, name.replace("-", "_"), docs, args.url)
+        try:
+            for k in ks:
+                for threshold in thresholds:
+                    stats = evaluate(search, embeddings, queries, k, threshold)
+                    print(
+                        f"{name:>12} {len(docs):>6} {avg_chunk:>7.0f} {k:>3} {threshold:>8.2f} "
+                        f"{stats['recall']:>8.2f} {stats['mrr']:>6.2f} {stats['tokens']:>7.0f} {stats['p95_ms']:>7.3f}"
+                    )
+        finally:
+            cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from ..tracing import flush, traceable
+
+# A state shaped like the pipeline's, with the large fields tracing has to cap/redact
+STATE = {
+    "objective": "Quiero aprender Docker en 2 semanas",
+    "skills": [{"name": f"Skill {i}", "proficiency": "Intermedio", "categories": ["web"]} for i in range(20)],
+    "context": "x" * 20000,
+    "roadmap": "y" * 4000,
+    "smart_objective": "z" * 600,
+    "final_assignment": "w" * 1000,
+    "query_embedding": [0.1] * 768,
+}
+NODES_PER_REQUEST = 8
+
+
+async def _node(state):
+    return {**state, "status": "ok"}
+
+
+_traced_node = traceable(_node)
+
+
+async def _request_plain():
+    state = STATE
+    for _ in range(NODES_PER_REQUEST):
+        state = await _node(state)
+    return state
+
+
+@traceable
+async def _request_traced():
+    state = STATE
+    for _ in range(NODES_PER_REQUEST):
+        state = await _traced_node(state)
+    return state
+
+
+async def _time(fn, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await fn()
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-request tracing overhead by exporter and sample rate.")
+    parser.add_argument("--requests", type=int, default=2000, help="Simulated requests per configuration")
+    parser.add_argument("--rates", default="0,0.01,0.1,1", help="Comma-separated sample rates")
+    parser.add_argument("--exporters", default="none,jsonl", help="Comma-separated exporters to compare")
+    args = parser.parse_args()
+
+    jsonl_path = os.path.join(tempfile.mkdtemp(prefix="trace-bench-"), "spans.jsonl")
+    os.environ["TRACE_JSONL_PATH"] = jsonl_path
+
+    baseline = asyncio.run(_time(_request_plain, args.requests))
+    print(f"baseline (no decorator): {baseline:8.2f} µs/request ({NODES_PER_REQUEST} nodes)")
+    for exporter in [e.strip() for e in args.exporters.split(",") if e.strip()]:
+        os.environ["TRACE_EXPORTER"] = exporter
+        for rate in [r.strip() for r in args.rates.split(",") if r.strip()]:
+            os.environ["TRACE_SAMPLE_RATE"] = rate
+            per_request = asyncio.run(_time(_request_traced, args.requests))
+            print(
+                f"exporter={exporter:<6} rate={float(rate):<5}: {per_request:8.2f} µs/request "
+                f"(overhead {per_request - baseline:+8.2f} µs)"
+            )
+    flush()
+    if os.path.exists(jsonl_path):
+        print(f"JSONL spans written to '{jsonl_path}' ({os.path.getsize(jsonl_path) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import itertools
+from typing import List, Optional
+from ..catalog import (
+    TIER_BEGINNER,
+    TIER_RELATED,
+    bundle_key,
+    invalidate_catalog,
+    load_catalog,
+    new_catalog,
+    save_catalog,
+    tier_sample_skills,
+)
+from ..config import get_catalog_path, get_rag_top_k
+from ..fallbacks import track_fallbacks
+from ..llm import build_chat_llm
+from ..nodes.smart_obj import to_smart_objective
+from ..nodes.rag import route_collections, retrieve_context_sharded
+from ..nodes.roadmap import build_roadmap
+from ..nodes.final_assignment import build_final_assignment
+from ..technologies import detect_technologies, display_name
+
+DEFAULT_TECHNOLOGIES = "docker,react,python,kubernetes"
+DEFAULT_DEADLINES = "2 semanas,1 mes,3 meses"
+DEFAULT_TIERS = f"{TIER_BEGINNER},{TIER_RELATED}"
+
+
+def _split(raw: str) -> List[str]:
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+
+async def build_bundle(technology: str, deadline: str, tier: str, collection_name: str = "docs") -> Optional[dict]:
+    """
+    Generates one bundle with the same node code and retrieval (shard routing, RAG_TOP_K)
+    used at request time. Returns None if any stage answered with a fallback: bundles
+    are served as-is, so template fallbacks must never be stored.
+    """
+    objective = f"Quiero aprender {display_name(technology)} en {deadline}"
+    skills = tier_sample_skills(technology, tier)
+    with track_fallbacks() as fallbacks:
+        smart = await to_smart_objective(objective, skills, deadline)
+        collections = await asyncio.to_thread(route_collections, detect_technologies(objective), collection_name)
+        context = await retrieve_context_sharded(objective, collections, k=get_rag_top_k())
+        roadmap = await build_roadmap(smart, context, skills, deadline)
+        final_assignment = await build_final_assignment(roadmap, skills)
+    if fallbacks:
+        print(f"[CATALOG] Skipping {bundle_key(technology, deadline, tier)}: degraded at {sorted(set(fallbacks))}")
+        return None
+    return {
+        "technology": technology,
+        "deadline": deadline,
+        "skill_tier": tier,
+        "smart_objective": smart,
+        "roadmap": roadmap,
+        "final_assignment": final_assignment,
+    }
+
+
+async def build_catalog(
+    technologies: List[str],
+    deadlines: List[str],
+    tiers: List[str],
+    top_n: int,
+    path: str,
+    collection_name: str = "docs",
+    concurrency: int = 2,
+) -> int:
+    combos = list(itertools.product(technologies, deadlines, tiers))[:top_n]
+    catalog = new_catalog(load_catalog(path))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(combo):
+        async with semaphore:
+            bundle = await build_bundle(*combo, collection_name=collection_name)
+            if bundle is not None:
+                print(f"[CATALOG] Built {bundle_key(*combo)}")
+            return bundle
+
+    bundles = await asyncio.gather(*(run(c) for c in combos))
+    for bundle in bundles:
+        if bundle is not None:
+            catalog["bundles"][bundle_key(bundle["technology"], bundle["deadline"], bundle["skill_tier"])] = bundle
+    skipped = sum(1 for bundle in bundles if bundle is None)
+    if skipped:
+        print(f"[CATALOG] {skipped} of {len(combos)} bundle(s) degraded and not stored; re-run to retry them")
+    save_catalog(catalog, path)
+    return len(catalog["bundles"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute roadmap bundles for common technology/deadline pairs.")
+    parser.add_argument("--path", default=get_catalog_path(), help="Catalog file (defaults to ROADMAP_CATALOG_PATH)")
+    parser.add_argument("--technologies", default=DEFAULT_TECHNOLOGIES, help="Comma-separated technology ids")
+    parser.add_argument("--deadlines", default=DEFAULT_DEADLINES, help="Comma-separated deadlines")
+    parser.add_argument("--tiers", default=DEFAULT_TIERS, help="Comma-separated skill tiers")
+    parser.add_argument("--top-n", type=int, default=24, help="Maximum number of combinations to build")
+    parser.add_argument("--collection", default="docs", help="Base collection for RAG context (shards are routed as at request time)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Bundles generated in parallel")
+    parser.add_argument("--invalidate", action="store_true", help="Only drop existing bundles (e.g. after re-indexing)")
+    args = parser.parse_args()
+
+    if not args.path:
+        raise SystemExit("Set ROADMAP_CATALOG_PATH or pass --path.")
+
+    if args.invalidate:
+        if not invalidate_catalog(args.path):
+            print(f"No catalog found at '{args.path}'.")
+        return
+
+    # Bundles are served as-is, so never store the template fallbacks
+    if build_chat_llm() is None:
+        raise SystemExit("LLM is not configured (GOOGLE_API_KEY). Refusing to store fallback bundles.")
+
+    count = asyncio.run(build_catalog(
+        _split(args.technologies),
+        _split(args.deadlines),
+        _split(args.tiers),
+        args.top_n,
+        args.path,
+        collection_name=args.collection,
+        concurrency=max(1, args.concurrency),
+    ))
+    print(f"Stored {count} bundles in '{args.path}'.")
+
+
+if __name__ == "__main__":
+    main()
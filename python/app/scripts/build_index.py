@@ -1,34 +1,131 @@
 import argparse
-from typing import List
+from typing import Dict, List
 from langchain_text_splitters import MarkdownHeaderTextSplitter
 from langchain_core.documents import Document
 from ..tools.db_vector_store import get_vector_store
+from ..tools.vector_index import ensure_ann_index
+from ..config import (
+    get_vector_index_method,
+    get_rag_quantization,
+    get_rag_truncate_dims,
+    get_chunk_max_tokens,
+    get_chunk_overlap_tokens,
+)
+from ..catalog import invalidate_catalog
+from ..technologies import detect_technologies
+from ..nodes.rag import GENERAL_SHARD, shard_name
 
 
-def load_and_split_markdown(path: str) -> List[Document]:
+# Header levels that delimit chunks, outermost first
+HEADERS = [("#", "section"), ("##", "subsection"), ("###", "subsubsection")]
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for the mixed English/Spanish/code corpus
+    return max(1, len(text) // 4) if text else 0
+
+
+def load_and_split_markdown(path: str, max_tokens: int = None, overlap_tokens: int = None) -> List[Document]:
+    """
+    Hierarchical chunking: splits on #/##/### headers (a subsection is its own chunk,
+    not part of its parent's), then cuts sections longer than `max_tokens` into
+    overlapping pieces. Every chunk starts with its header path ("A > B") so it is
+    self-describing when embedded or pasted into a prompt, and keeps the header
+    titles (section/subsection/subsubsection), its parent section and its path as metadata.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     with open(path, "r") as f:
         markdown_text = f.read()
+    max_tokens = max_tokens or get_chunk_max_tokens()
+    overlap_tokens = get_chunk_overlap_tokens() if overlap_tokens is None else overlap_tokens
+
+    sections = MarkdownHeaderTextSplitter(headers_to_split_on=HEADERS).split_text(markdown_text)
+    # Prefer breaking between paragraphs, then lines (list items), then code fences and words
+    sizer = RecursiveCharacterTextSplitter(
+        chunk_size=max_tokens,
+        chunk_overlap=min(overlap_tokens, max_tokens // 2),
+        length_function=estimate_tokens,
+        separators=["\n\n", "\n```", "\n", " ", ""],
+    )
+    docs = []
+    for d in sections:
+        titles = [d.metadata[key] for _, key in HEADERS if d.metadata.get(key)]
+        header_path = " > ".join(titles)
+        pieces = sizer.split_text(d.page_content)
+        for i, piece in enumerate(pieces):
+            docs.append(Document(
+                page_content=f"{header_path}\n{piece}" if header_path else piece,
+                metadata={
+                    **(d.metadata or {}),
+                    "source": path,
+                    "path": header_path,
+                    "parent_section": titles[-2] if len(titles) > 1 else "",
+                    "part": i,
+                    "parts": len(pieces),
+                },
+            ))
+    return docs
+
 
-    # Split by headings so each chunk represents a topic/section
-    splitter = MarkdownHeaderTextSplitter(headers_to_split_on=[
-        ("#", "section"),
-    ])
-    docs = splitter.split_text(markdown_text)
-    return [
-        Document(
-            page_content=d.page_content,
-            metadata={**(d.metadata or {}), "source": path},
+def shard_documents(docs: List[Document], base: str = "docs") -> Dict[str, List[Document]]:
+    """
+    Groups chunks into per-technology collections ("docs_docker", ...). Chunks take
+    the technologies of the document's first section title, like the offline roadmap
+    corpus, so incidental mentions do not spread them; chunks about several
+    technologies go to each shard and chunks about none to the general shard.
+    """
+    doc_technologies = detect_technologies(next((d.metadata.get("section", "") for d in docs), ""))
+    shards: Dict[str, List[Document]] = {}
+    for doc in docs:
+        technologies = doc_technologies or detect_technologies(
+            f"{doc.metadata.get('section', '')}\n{doc.page_content}"
         )
-        for d in docs
-    ]
+        for shard in technologies or [GENERAL_SHARD]:
+            shards.setdefault(shard_name(base, shard), []).append(
+                Document(page_content=doc.page_content, metadata={**doc.metadata, "shard": shard})
+            )
+    return shards
 
 
-def build_index(markdown_path: str, collection_name: str = "docs") -> int:
+def build_index(
+    markdown_path: str,
+    collection_name: str = "docs",
+    index_method: str = None,
+    rebuild_index: bool = False,
+    shard_by: str = "none",
+    quantization: str = None,
+    truncate_dims: int = None,
+) -> int:
     docs = load_and_split_markdown(markdown_path)
-    vector_store = get_vector_store(collection_name=collection_name)
-    if vector_store is None:
-        raise RuntimeError("VECTOR_DB_URL is not set. Cannot connect to PGVector.")
-    vector_store.add_documents(docs)
+    if shard_by == "technology":
+        collections = shard_documents(docs, base=collection_name)
+    else:
+        collections = {collection_name: docs}
+    index_method = (index_method or get_vector_index_method()).lower()
+    quantization = quantization or get_rag_quantization()
+    truncate_dims = get_rag_truncate_dims() if truncate_dims is None else truncate_dims
+    for name, chunks in collections.items():
+        vector_store = get_vector_store(collection_name=name)
+        if vector_store is None:
+            raise RuntimeError("VECTOR_DB_URL is not set. Cannot connect to PGVector.")
+        vector_store.add_documents(chunks)
+        print(f"Indexed {len(chunks)} chunk(s) into collection '{name}'.")
+        # Without an ANN index every search is a sequential scan over all collections;
+        # shards get a partial index each so a search only walks its own shard
+        if index_method != "none":
+            ensure_ann_index(
+                vector_store,
+                method=index_method,
+                rebuild=rebuild_index,
+                per_collection=shard_by != "none",
+            )
+        # Compressed index searched when RAG_QUANTIZATION / RAG_TRUNCATE_DIMS are set
+        if quantization != "none" or truncate_dims:
+            from ..tools.quantized_search import ensure_quantized_index
+            ensure_quantized_index(vector_store, quantization=quantization, dims=truncate_dims)
+    # Precomputed roadmaps were built from the previous corpus
+    invalidate_catalog()
     return len(docs)
 
 
@@ -36,9 +133,27 @@ def main():
     parser = argparse.ArgumentParser(description="Build vector index from a markdown file.")
     parser.add_argument("--path", required=True, help="Path to the markdown file")
     parser.add_argument("--collection", default="docs", help="Collection name")
+    parser.add_argument("--index", choices=["hnsw", "ivfflat", "none"], default=None,
+                        help="ANN index on the embedding column (default: VECTOR_INDEX_METHOD)")
+    parser.add_argument("--rebuild-index", action="store_true",
+                        help="Drop and recreate the ANN index (e.g. IVFFlat after the corpus grew)")
+    parser.add_argument("--shard-by", choices=["none", "technology"], default="none",
+                        help="Split chunks into per-technology collections named <collection>_<technology>")
+    parser.add_argument("--quantization", choices=["none", "halfvec", "binary"], default=None,
+                        help="Also build a compressed index (default: RAG_QUANTIZATION)")
+    parser.add_argument("--truncate-dims", type=int, default=None,
+                        help="Index only the first N dimensions (default: RAG_TRUNCATE_DIMS)")
     args = parser.parse_args()
 
-    count = build_index(args.path, collection_name=args.collection)
+    count = build_index(
+        args.path,
+        collection_name=args.collection,
+        index_method=args.index,
+        rebuild_index=args.rebuild_index,
+        shard_by=args.shard_by,
+        quantization=args.quantization,
+        truncate_dims=args.truncate_dims,
+    )
     print(f"Indexed {count} chunks into collection '{args.collection}'.")
 
 
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Repository root, so `python.server` is importable the same way uvicorn loads it
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+BOOT_PROBE = """
+import asyncio, json, resource, time
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except Exception:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+t0 = time.perf_counter()
+import python.server as server
+t1 = time.perf_counter()
+rss_import = rss_kb()
+
+async def boot():
+    # The lifespan hook only starts the warm-up task; wait for /readyz-level readiness inside it
+    from python.app.warmup import is_ready, status
+    async with server.app.router.lifespan_context(server.app):
+        t2 = time.perf_counter()
+        while not is_ready():
+            await asyncio.sleep(0.01)
+        t3 = time.perf_counter()
+        return t2, t3, status()["steps"]
+
+t2, t3, steps = asyncio.run(boot())
+print(json.dumps({
+    "import_s": t1 - t0,
+    "lifespan_startup_s": t2 - t1,
+    "warmup_s": t3 - t2,
+    "warmup_steps_ms": {name: step["ms"] for name, step in steps.items()},
+    "rss_after_import_kb": rss_import,
+    "rss_after_warmup_kb": rss_kb(),
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """
+    Parses `python -X importtime` output into (self_us, cumulative_us, module) rows.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            _, values = line.split(":", 1)
+            self_us, cumulative_us, module = values.split("|", 2)
+            rows.append((int(self_us), int(cumulative_us), module.rstrip()))
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_imports(module: str) -> List[Tuple[int, int, str]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def profile_boot() -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", BOOT_PROBE],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    lines = [ln for ln in proc.stdout.splitlines() if ln.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"Boot probe failed: {proc.stderr.strip()[-500:]}")
+    return json.loads(lines[-1])
+
+
+def render_report(module: str, rows: List[Tuple[int, int, str]], boot: dict, top: int) -> str:
+    out = [
+        f"Startup profile for '{module}'",
+        "",
+        f"import time:           {boot['import_s'] * 1000:8.1f} ms",
+        f"lifespan startup:      {boot['lifespan_startup_s'] * 1000:8.1f} ms",
+        f"warm-up (to ready):    {boot['warmup_s'] * 1000:8.1f} ms",
+    ]
+    for name, ms in boot["warmup_steps_ms"].items():
+        out.append(f"  {name + ':':<20} {ms:8.1f} ms")
+    out += [
+        f"RSS after import:      {boot['rss_after_import_kb'] / 1024:8.1f} MB",
+        f"RSS after warm-up:     {boot['rss_after_warmup_kb'] / 1024:8.1f} MB",
+        "",
+        f"Top {top} imports by cumulative time (importtime, microseconds):",
+        f"{'self':>10} | {'cumulative':>10} | module",
+    ]
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        out.append(f"{self_us:>10} | {cumulative_us:>10} | {name}")
+    return "\n".join(out) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile server import time, lifespan warm-up and idle RSS.")
+    parser.add_argument("--module", default="python.server", help="Module to profile with -X importtime (relative to the repo root)")
+    parser.add_argument("--top", type=int, default=30, help="Number of slowest imports to list")
+    parser.add_argument("--output", default="startup_profile.txt", help="Where to write the report artifact")
+    args = parser.parse_args()
+
+    rows = profile_imports(args.module)
+    boot = profile_boot()
+    report = render_report(args.module, rows, boot, args.top)
+    with open(args.output, "w") as f:
+        f.write(report)
+    print(report)
+    print(f"Saved startup profile to '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
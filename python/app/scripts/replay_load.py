@@ -0,0 +1,120 @@
+"""
+Load test / regression check of the full pipeline against a recorded cassette.
+
+  1. Record (needs GOOGLE_API_KEY):
+       python -m python.app.scripts.replay_load --mode record --requests 5 --concurrency 1
+  2. Replay offline, with recorded latencies (--latency-scale 0 for max throughput):
+       python -m python.app.scripts.replay_load --mode replay --requests 200 --concurrency 16
+       python -m python.app.scripts.replay_load --mode replay --baseline responses.json
+
+Reports end-to-end p50/p95/max latency, throughput and the per-model/per-node LLM
+metrics. --baseline writes the response digest per objective on the first run and
+compares later runs against it (exit code 1 on differences).
+Leave AGENT_CACHE_PATH unset: shared-cache hits would hide the replayed latencies.
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List
+
+OBJECTIVES = [
+    "Quiero aprender Docker en 2 semanas",
+    "Necesito dominar Python en 3 meses",
+    "Aprender React y TypeScript en 1 mes",
+    "Kubernetes para desplegar microservicios en 6 meses",
+    "Quiero mejorar mi comunicación",
+]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+async def _run(payloads: List[Dict[str, Any]], concurrency: int, verbose: bool):
+    from ..pipeline import run_pipeline
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    responses: Dict[str, str] = {}
+
+    async def one(payload):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await run_pipeline(payload)
+            latencies.append((time.perf_counter() - started) * 1000)
+            responses.setdefault(payload["objective"], result.get("response") or "")
+
+    started = time.perf_counter()
+    # The pipeline logs every step; keep the report readable unless asked
+    with contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(one(p) for p in payloads))
+    return latencies, responses, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded LLM/embedding calls through the full pipeline.")
+    parser.add_argument("--mode", choices=["record", "replay"], default=os.getenv("LLM_CASSETTE_MODE") or "replay")
+    parser.add_argument("--cassette", default="", help="Cassette path (default LLM_CASSETTE_PATH)")
+    parser.add_argument("--latency-scale", type=float, default=None, help="Replay latency multiplier (default LLM_CASSETTE_LATENCY_SCALE)")
+    parser.add_argument("--objectives", default="", help="JSON list of objectives (default: built-in set)")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--baseline", default="", help="Response digests to write (first run) or compare against")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline logs")
+    args = parser.parse_args()
+
+    os.environ["LLM_CASSETTE_MODE"] = args.mode
+    if args.cassette:
+        os.environ["LLM_CASSETTE_PATH"] = args.cassette
+    if args.latency_scale is not None:
+        os.environ["LLM_CASSETTE_LATENCY_SCALE"] = str(args.latency_scale)
+    if os.getenv("AGENT_CACHE_PATH"):
+        print("[REPLAY] AGENT_CACHE_PATH is set: shared-cache hits skip the cassette latencies")
+
+    objectives = OBJECTIVES
+    if args.objectives:
+        with open(args.objectives, "r", encoding="utf-8") as f:
+            objectives = json.load(f)
+    payloads = [{"objective": objectives[i % len(objectives)], "skills": []} for i in range(args.requests)]
+
+    from ..config import get_cassette_path, get_cassette_latency_scale
+    from ..llm_metrics import get_llm_metrics
+
+    print(f"mode={args.mode} cassette={get_cassette_path()} latency_scale={get_cassette_latency_scale()} "
+          f"requests={args.requests} concurrency={args.concurrency}")
+    latencies, responses, elapsed = asyncio.run(_run(payloads, max(1, args.concurrency), args.verbose))
+    print(f"p50={statistics.median(latencies):.0f} ms  p95={_percentile(latencies, 95):.0f} ms  "
+          f"max={max(latencies):.0f} ms  throughput={len(latencies) / elapsed:.1f} req/s")
+    print(json.dumps(get_llm_metrics().snapshot(), indent=2, ensure_ascii=False))
+
+    if not args.baseline:
+        return
+    digests = {objective: _digest(text) for objective, text in responses.items()}
+    if not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(digests, f, indent=2, ensure_ascii=False)
+        print(f"Baseline written to {args.baseline} ({len(digests)} objectives)")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    changed = [o for o, d in digests.items() if o in baseline and baseline[o] != d]
+    for objective in changed:
+        print(f"CHANGED: {objective}")
+    print(f"{len(digests) - len(changed)}/{len(digests)} responses match {args.baseline}")
+    if changed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import re
+from typing import Dict, List
+
+# Canonical technology id -> (display name, aliases as they appear in objectives/docs)
+TECHNOLOGIES: Dict[str, tuple] = {
+    "docker": ("Docker", ["docker", "dockerfile", "docker compose", "docker-compose"]),
+    "kubernetes": ("Kubernetes", ["kubernetes", "k8s", "kubectl", "helm"]),
+    "react": ("React", ["react", "reactjs", "react.js"]),
+    "python": ("Python", ["python"]),
+    "javascript": ("JavaScript", ["javascript", "js", "ecmascript"]),
+    "typescript": ("TypeScript", ["typescript", "ts"]),
+    "nodejs": ("Node.js", ["node.js", "nodejs", "node", "express"]),
+    "java": ("Java", ["java", "spring", "spring boot"]),
+    "go": ("Go", ["golang"]),
+    "rust": ("Rust", ["rust"]),
+    "django": ("Django", ["django"]),
+    "flask": ("Flask", ["flask"]),
+    "fastapi": ("FastAPI", ["fastapi"]),
+    "angular": ("Angular", ["angular"]),
+    "vue": ("Vue", ["vue", "vue.js", "vuejs", "nuxt"]),
+    "sql": ("SQL", ["sql", "mysql", "postgresql", "postgres", "sqlite"]),
+    "mongodb": ("MongoDB", ["mongodb", "mongo"]),
+    "aws": ("AWS", ["aws", "amazon web services", "lambda", "ec2", "s3"]),
+    "azure": ("Azure", ["azure"]),
+    "gcp": ("GCP", ["gcp", "google cloud"]),
+    "git": ("Git", ["git", "github", "gitlab"]),
+    "terraform": ("Terraform", ["terraform"]),
+}
+
+
+def _build_pattern() -> tuple:
+    alias_to_id = {}
+    for tech_id, (_, aliases) in TECHNOLOGIES.items():
+        for alias in aliases:
+            alias_to_id[alias] = tech_id
+    # Longest aliases first so "docker compose" wins over "docker", "node.js" over "node"
+    alternatives = sorted(alias_to_id, key=len, reverse=True)
+    pattern = re.compile(
+        r"(?<![\w.+#])(" + "|".join(re.escape(a) for a in alternatives) + r")(?![\w+#])",
+        re.IGNORECASE,
+    )
+    return pattern, alias_to_id
+
+
+_PATTERN, _ALIAS_TO_ID = _build_pattern()
+
+
+def detect_technologies(text: str) -> List[str]:
+    """
+    Returns canonical technology ids mentioned in `text`, in order of first appearance.
+    """
+    if not text:
+        return []
+    found: List[str] = []
+    for match in _PATTERN.finditer(text):
+        tech_id = _ALIAS_TO_ID[match.group(1).lower()]
+        if tech_id not in found:
+            found.append(tech_id)
+    return found
+
+
+def display_name(tech_id: str) -> str:
+    entry = TECHNOLOGIES.get(tech_id)
+    return entry[0] if entry else tech_id
@@ -2,6 +2,8 @@ __all__ = [
     "embeddings",
     "db_vector_store",
     "semantic_search",
+    "vector_index",
+    "quantized_search",
 ]
 
 
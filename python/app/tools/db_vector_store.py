@@ -1,14 +1,15 @@
 import os
-from typing import Optional
-from langchain_postgres import PGVector
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
 from .embeddings import get_embeddings
+from ..config import get_vector_db_pool_size, get_vector_db_max_overflow
 
+if TYPE_CHECKING:
+    from langchain_postgres import PGVector
 
-def get_vector_store(collection_name: str = "docker_docs") -> Optional[PGVector]:
-    """
-    Returns a PGVector store using VECTOR_DB_URL (psycopg driver).
-    If VECTOR_DB_URL is not set, returns None.
-    """
+
+def _connection_url() -> Optional[str]:
     connection = os.getenv("VECTOR_DB_URL")
     if not connection:
         return None
@@ -16,11 +17,94 @@ def get_vector_store(collection_name: str = "docker_docs") -> Optional[PGVector]
     # Accept both postgresql:// and postgresql+psycopg://
     if connection.startswith("postgresql://"):
         connection = connection.replace("postgresql://", "postgresql+psycopg://", 1)
+    return connection
+
+
+# (connection url, collection) -> PGVector; all stores of one URL share one engine (connection pool)
+_stores: Dict[Tuple[str, str], "PGVector"] = {}
+_engines: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_engine(connection: str):
+    """Process-wide SQLAlchemy engine (pooled, pre-pinged connections) for `connection`."""
+    engine = _engines.get(connection)
+    if engine is None:
+        from sqlalchemy import create_engine
+
+        with _lock:
+            engine = _engines.get(connection)
+            if engine is None:
+                engine = _engines[connection] = create_engine(
+                    connection,
+                    pool_size=get_vector_db_pool_size(),
+                    max_overflow=get_vector_db_max_overflow(),
+                    pool_pre_ping=True,
+                )
+    return engine
+
+
+def get_vector_store(collection_name: str = "docker_docs") -> Optional["PGVector"]:
+    """
+    Returns a PGVector store using VECTOR_DB_URL (psycopg driver).
+    If VECTOR_DB_URL is not set, returns None.
+    Stores are built once per collection (PGVector's constructor creates the extension,
+    tables and collection row) and share the pooled engine of get_engine().
+    """
+    connection = _connection_url()
+    if not connection:
+        return None
+    key = (connection, collection_name)
+    vector_store = _stores.get(key)
+    if vector_store is not None:
+        return vector_store
+    # Imported lazily: langchain_postgres pulls in SQLAlchemy and psycopg
+    from langchain_postgres import PGVector
+    from .vector_index import install_search_settings
+
     embeddings = get_embeddings()
-    return PGVector(
+    vector_store = PGVector(
         embeddings=embeddings,
         collection_name=collection_name,
-        connection=connection,
+        connection=get_engine(connection),
     )
+    # SET LOCAL hnsw.ef_search / ivfflat.probes on each search transaction
+    install_search_settings(vector_store)
+    with _lock:
+        return _stores.setdefault(key, vector_store)
+
+
+_collections: Dict[str, Any] = {}
+
 
+def list_collections(ttl_seconds: float = 60.0) -> Optional[List[str]]:
+    """
+    Names of the PGVector collections in the database, cached for `ttl_seconds`.
+    None if VECTOR_DB_URL is not set, the database cannot be reached or its breaker is open.
+    """
+    connection = _connection_url()
+    if not connection:
+        return None
+    now = time.time()
+    if _collections.get("url") == connection and now - _collections.get("at", 0.0) < ttl_seconds:
+        return _collections["names"]
+    from ..circuit_breaker import CircuitOpenError, get_breaker
 
+    breaker = get_breaker("vector_db")
+    started = time.perf_counter()
+    try:
+        breaker.check()
+        from sqlalchemy import text
+
+        with get_engine(connection).connect() as conn:
+            names = [row[0] for row in conn.execute(text("SELECT name FROM langchain_pg_collection"))]
+    except CircuitOpenError as e:
+        print(f"[RAG] Could not list collections: {e}")
+        return None
+    except Exception as e:
+        breaker.record(time.perf_counter() - started, e)
+        print(f"[RAG] Could not list collections: {e}")
+        return None
+    breaker.record(time.perf_counter() - started)
+    _collections.update({"url": connection, "at": now, "names": names})
+    return names
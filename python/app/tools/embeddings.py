@@ -1,19 +1,75 @@
 import os
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from ..config import get_google_api_key
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+from ..config import get_google_api_key, get_cassette_mode, get_cache_path
+from ..cache import get_shared_cache, CachedEmbeddings
 
+if TYPE_CHECKING:
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
-def get_embeddings() -> GoogleGenerativeAIEmbeddings:
+
+# (model, cassette mode, shared cache path) -> embeddings; the client (and its connection) is reused
+_instances: Dict[Tuple[str, str, str], Any] = {}
+
+
+def get_embeddings() -> "GoogleGenerativeAIEmbeddings":
     """
     Returns Gemini (Google) embeddings instance.
     Reads API key from GOOGLE_API_KEY.
+    With LLM_CASSETTE_MODE=record/replay the calls go through the cassette (see cassette.py).
+    Built once per configuration and reused.
     """
     # Default Gemini embeddings model; override with GOOGLE_EMBEDDINGS_MODEL if needed
     # Google API expects the "models/..." prefix
     model = os.getenv("GOOGLE_EMBEDDINGS_MODEL", "models/text-embedding-004")
     if not model.startswith("models/"):
         model = f"models/{model}"
-    api_key = get_google_api_key()
-    return GoogleGenerativeAIEmbeddings(model=model, google_api_key=api_key)
+    mode = get_cassette_mode()
+    key = (model, mode, get_cache_path())
+    if key not in _instances:
+        _instances[key] = _build_embeddings(model, mode)
+    return _instances[key]
+
+
+def _build_embeddings(model: str, mode: str):
+    if mode == "replay":
+        from ..cassette import CassetteEmbeddings
+        embeddings = CassetteEmbeddings(model)
+    else:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        api_key = get_google_api_key()
+        embeddings = GoogleGenerativeAIEmbeddings(model=model, google_api_key=api_key)
+        if mode == "record":
+            from ..cassette import CassetteEmbeddings
+            embeddings = CassetteEmbeddings(model, inner=embeddings)
+
+    # Fail fast while the embeddings API is failing; cache hits below do not count as calls
+    from ..circuit_breaker import BreakerEmbeddings
+    embeddings = BreakerEmbeddings(embeddings)
+
+    # Share computed vectors across workers when the shared cache is enabled
+    cache = get_shared_cache()
+    if cache is not None:
+        return CachedEmbeddings(embeddings, cache, model)
+    return embeddings
+
+
+def embed_queries(texts: List[str]) -> List[List[float]]:
+    """
+    Embeds several search queries with a single batched request.
+    Vectors match what `embed_query` would return for each text.
+    """
+    embeddings = get_embeddings()
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.embed_queries(texts)
+    return embed_queries_batched(embeddings, texts)
 
 
+def embed_queries_batched(embeddings, texts: List[str]) -> List[List[float]]:
+    if not texts:
+        return []
+    try:
+        # Same task type embed_query uses, but one batchEmbedContents call
+        return embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    except TypeError:
+        return [embeddings.embed_query(text) for text in texts]
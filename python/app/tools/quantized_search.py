@@ -0,0 +1,174 @@
+"""
+Compact-vector search for the PGVector collection.
+
+PGVector keeps full-precision `vector` rows (and its queries need that column type),
+so compression lives in the ANN index: an expression index over the embedding
+truncated to its first N dimensions (text-embedding-004 is Matryoshka-trained) and/or
+cast to `halfvec` (2 bytes/dim) or `bit` via binary_quantize (1 bit/dim). Searches
+order by the same expression to use that index, then optionally rescore the
+candidates with the full-precision column.
+pgvector has no int8 vector type; binary quantization plus rescoring is the
+equivalent low-memory option.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from ..config import get_rag_quantization, get_rag_truncate_dims, get_rag_rescore_factor, get_hnsw_ef_search
+from .vector_index import EMBEDDING_TABLE, FILTERABLE_METADATA, search_settings, _fix_dimensions
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+    from langchain_postgres import PGVector
+
+QUANTIZATIONS = ("none", "halfvec", "binary")
+# (operator, HNSW/IVFFlat opclass) per quantization
+_OPERATORS = {
+    "none": ("<=>", "vector_cosine_ops"),
+    "halfvec": ("<=>", "halfvec_cosine_ops"),
+    "binary": ("<~>", "bit_hamming_ops"),
+}
+
+# collection name -> (uuid, full dimension), resolved once per process
+_collections: Dict[str, Tuple[str, int]] = {}
+
+
+def compact_expression(source_sql: str, quantization: str, dims: int, full_dims: int) -> str:
+    """SQL for the compressed form of a vector expression (index and query must use the same one)."""
+    size = dims if dims and dims < full_dims else full_dims
+    expr = f"subvector({source_sql}, 1, {size})" if size < full_dims else source_sql
+    if quantization == "halfvec":
+        return f"(({expr})::halfvec({size}))"
+    if quantization == "binary":
+        return f"(binary_quantize({expr})::bit({size}))"
+    return f"(({expr})::vector({size}))"
+
+
+def _index_name(quantization: str, dims: int, collection: str) -> str:
+    scope = "".join(c if c.isalnum() else "_" for c in collection.lower())
+    return f"ix_{EMBEDDING_TABLE}_{quantization}{dims or ''}_{scope}"[:63]
+
+
+def _resolve_collection(conn, collection_name: str) -> Tuple[str, int]:
+    from sqlalchemy import text
+
+    if collection_name not in _collections:
+        uuid = conn.execute(
+            text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"), {"name": collection_name}
+        ).scalar()
+        if uuid is None:
+            raise ValueError(f"Collection {collection_name!r} not found")
+        dims = conn.execute(
+            text(f"SELECT vector_dims(embedding) FROM {EMBEDDING_TABLE} WHERE collection_id = :uuid LIMIT 1"),
+            {"uuid": uuid},
+        ).scalar()
+        _collections[collection_name] = (str(uuid), int(dims or 0))
+    return _collections[collection_name]
+
+
+def ensure_quantized_index(
+    vector_store: "PGVector",
+    quantization: Optional[str] = None,
+    dims: Optional[int] = None,
+    m: int = 16,
+    ef_construction: int = 64,
+) -> Dict[str, Any]:
+    """
+    Creates the HNSW expression index on the compressed embeddings of this collection
+    (partial on collection_id) and reports its size next to the full-precision data.
+    """
+    from sqlalchemy import text
+
+    quantization = quantization or get_rag_quantization()
+    dims = get_rag_truncate_dims() if dims is None else dims
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization {quantization!r}; expected one of {QUANTIZATIONS}")
+    collection = vector_store.collection_name
+    with vector_store._engine.begin() as conn:
+        _fix_dimensions(conn)
+        uuid, full_dims = _resolve_collection(conn, collection)
+        name = _index_name(quantization, dims, collection)
+        expression = compact_expression("embedding", quantization, dims, full_dims)
+        started = time.perf_counter()
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {EMBEDDING_TABLE} "
+            f"USING hnsw ({expression} {_OPERATORS[quantization][1]}) "
+            f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)}) "
+            f"WHERE collection_id = '{uuid}'"
+        ))
+        build_seconds = time.perf_counter() - started
+        conn.execute(text(f"ANALYZE {EMBEDDING_TABLE}"))
+        index_bytes = conn.execute(text("SELECT pg_relation_size(CAST(:name AS regclass))"), {"name": name}).scalar()
+        rows = conn.execute(
+            text(f"SELECT COUNT(*) FROM {EMBEDDING_TABLE} WHERE collection_id = :uuid"), {"uuid": uuid}
+        ).scalar()
+    report = {
+        "collection": collection,
+        "quantization": quantization,
+        "dims": dims or full_dims,
+        "index": name,
+        "index_bytes": index_bytes,
+        "rows": rows,
+        "full_precision_bytes": rows * (full_dims * 4 + 8),
+        "build_seconds": round(build_seconds, 3),
+    }
+    print(f"[INDEX] {report}")
+    return report
+
+
+def _vector_literal(values: List[float]) -> str:
+    return "[" + ",".join(repr(float(v)) for v in values) + "]"
+
+
+def quantized_search(
+    vector_store: "PGVector",
+    embedding: List[float],
+    k: int = 1,
+    filter: Optional[Dict[str, Any]] = None,
+    quantization: Optional[str] = None,
+    dims: Optional[int] = None,
+    rescore: Optional[bool] = None,
+    ef_search: Optional[int] = None,
+) -> List[Tuple["Document", float]]:
+    """
+    Nearest neighbours through the compressed index. With `rescore` (default on for
+    binary and truncated vectors), k * RAG_RESCORE_FACTOR candidates are fetched and
+    re-ranked by full-precision cosine distance; returned distances are always cosine.
+    Only equality filters on source/section are supported here.
+    """
+    from sqlalchemy import text
+    from langchain_core.documents import Document
+
+    quantization = quantization or get_rag_quantization()
+    dims = get_rag_truncate_dims() if dims is None else dims
+    if rescore is None:
+        rescore = quantization == "binary" or bool(dims)
+    params: Dict[str, Any] = {"query": _vector_literal(embedding)}
+    clauses = []
+    for i, (key, value) in enumerate((filter or {}).items()):
+        if key not in FILTERABLE_METADATA or not isinstance(value, str):
+            raise ValueError(f"Unsupported filter for quantized search: {key}={value!r}")
+        clauses.append(f"cmetadata ->> '{key}' = :filter_{i}")
+        params[f"filter_{i}"] = value
+
+    with vector_store._engine.connect() as conn:
+        uuid, full_dims = _resolve_collection(conn, vector_store.collection_name)
+    operator = _OPERATORS[quantization][0]
+    query_sql = f"CAST(:query AS vector({full_dims}))"
+    order = f"{compact_expression('embedding', quantization, dims, full_dims)} {operator} " \
+            f"{compact_expression(query_sql, quantization, dims, full_dims)}"
+    where = " AND ".join([f"collection_id = '{uuid}'"] + clauses)
+    limit = k * max(1, get_rag_rescore_factor()) if rescore else k
+    sql = (
+        f"SELECT id, document, cmetadata, embedding <=> {query_sql} AS distance "
+        f"FROM {EMBEDDING_TABLE} WHERE {where} ORDER BY {order} LIMIT {int(limit)}"
+    )
+    if rescore:
+        sql = f"SELECT * FROM ({sql}) AS candidates ORDER BY distance LIMIT {int(k)}"
+
+    # The candidate list of the HNSW scan must cover the rescoring pool
+    with search_settings(ef_search=max(ef_search or get_hnsw_ef_search(), limit)):
+        with vector_store._engine.begin() as conn:
+            rows = conn.execute(text(sql), params).fetchall()
+    return [
+        (Document(id=str(row[0]), page_content=row[1] or "", metadata=row[2] or {}), float(row[3]))
+        for row in rows
+    ]
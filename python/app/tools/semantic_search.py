@@ -1,16 +1,73 @@
-from typing import List, Tuple
-from langchain_core.documents import Document
+import time
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
 from .db_vector_store import get_vector_store
+from ..circuit_breaker import CircuitOpenError, get_breaker
+from .vector_index import pushdown_filter, search_settings
+from ..config import get_rag_quantization, get_rag_truncate_dims
 
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
-def search_docs(query: str, collection_name: str = "docs", k: int = 1) -> List[Tuple[Document, float]]:
+
+def search_docs(
+    query: str,
+    collection_name: str = "docs",
+    k: int = 1,
+    embedding: Optional[List[float]] = None,
+    filter: Optional[Dict[str, Any]] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+) -> List[Tuple["Document", float]]:
     """
     Performs semantic similarity search returning (Document, distance) pairs.
     Lower distance == more similar.
+    If `embedding` is given (e.g. precomputed in a batch), the query is not embedded again.
+    `filter` restricts by chunk metadata (e.g. {"source": path, "section": title}) inside
+    the SQL query; `ef_search`/`probes` override the ANN recall/speed knobs for this query.
+    With RAG_QUANTIZATION / RAG_TRUNCATE_DIMS set, the compressed index is searched
+    instead (see quantized_search).
+    Raises CircuitOpenError without touching the database while the "vector_db" breaker is open.
     """
+    breaker = get_breaker("vector_db")
+    breaker.check()
+    started = time.perf_counter()
+    try:
+        results = _search(query, collection_name, k, embedding, filter, ef_search, probes)
+    except CircuitOpenError:
+        # The query embedding was rejected: no verdict on the database
+        breaker.release()
+        raise
+    except Exception as e:
+        breaker.record(time.perf_counter() - started, e)
+        raise
+    breaker.record(time.perf_counter() - started)
+    return results
+
+
+def _search(
+    query: str,
+    collection_name: str,
+    k: int,
+    embedding: Optional[List[float]],
+    filter: Optional[Dict[str, Any]],
+    ef_search: Optional[int],
+    probes: Optional[int],
+) -> List[Tuple["Document", float]]:
     vector_store = get_vector_store(collection_name=collection_name)
     if vector_store is None:
         return []
-    return vector_store.similarity_search_with_score(query, k=k)
+    if get_rag_quantization() != "none" or get_rag_truncate_dims():
+        from .quantized_search import quantized_search
+        try:
+            if embedding is None:
+                embedding = vector_store.embeddings.embed_query(query)
+            return quantized_search(vector_store, embedding, k=k, filter=filter, ef_search=ef_search)
+        except ValueError as e:
+            print(f"[RAG] Compressed search unavailable ({e}), using the full-precision index")
+    filter = pushdown_filter(filter)
+    with search_settings(ef_search=ef_search, probes=probes):
+        if embedding is not None:
+            return vector_store.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)
+        return vector_store.similarity_search_with_score(query, k=k, filter=filter)
 
 
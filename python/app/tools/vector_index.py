@@ -0,0 +1,201 @@
+import contextlib
+import contextvars
+import math
+import time
+from typing import Any, Dict, Iterator, Optional, TYPE_CHECKING
+from ..config import (
+    get_vector_index_method,
+    get_hnsw_m,
+    get_hnsw_ef_construction,
+    get_ivfflat_lists,
+    get_hnsw_ef_search,
+    get_ivfflat_probes,
+    get_hnsw_iterative_scan,
+)
+
+if TYPE_CHECKING:
+    from langchain_postgres import PGVector
+
+# PGVector (langchain_postgres) keeps every collection in this table
+EMBEDDING_TABLE = "langchain_pg_embedding"
+INDEX_METHODS = ("hnsw", "ivfflat")
+# Plain equality filters on these keys are served by expression indexes (see ensure_metadata_indexes)
+FILTERABLE_METADATA = ("source", "section")
+
+# Planner settings applied (SET LOCAL) to the transaction of each search on this context
+_search_settings: contextvars.ContextVar = contextvars.ContextVar("vector_search_settings", default=None)
+
+
+def _index_name(method: str, scope: str = "") -> str:
+    suffix = "_" + "".join(c if c.isalnum() else "_" for c in scope.lower()) if scope else ""
+    return f"ix_{EMBEDDING_TABLE}_{method}_cosine{suffix}"[:63]
+
+
+def default_search_settings() -> Dict[str, Any]:
+    settings: Dict[str, Any] = {
+        "hnsw.ef_search": get_hnsw_ef_search(),
+        "ivfflat.probes": get_ivfflat_probes(),
+    }
+    iterative_scan = get_hnsw_iterative_scan()
+    if iterative_scan:
+        # pgvector >= 0.8: keep scanning when filters discard candidates
+        settings["hnsw.iterative_scan"] = iterative_scan
+    return settings
+
+
+@contextlib.contextmanager
+def search_settings(ef_search: Optional[int] = None, probes: Optional[int] = None, **extra: Any) -> Iterator[None]:
+    """
+    Overrides the ANN search parameters for the searches run inside the block
+    (e.g. a wider ef_search for a recall-sensitive query). Unset values use the defaults.
+    """
+    settings = default_search_settings()
+    if ef_search is not None:
+        settings["hnsw.ef_search"] = int(ef_search)
+    if probes is not None:
+        settings["ivfflat.probes"] = int(probes)
+    settings.update(extra)
+    token = _search_settings.set(settings)
+    try:
+        yield
+    finally:
+        _search_settings.reset(token)
+
+
+def _apply_search_settings(conn) -> None:
+    settings = _search_settings.get() or default_search_settings()
+    for name, value in settings.items():
+        # SET does not take bind parameters; values come from config/ints, never from users
+        conn.exec_driver_sql(f"SET LOCAL {name} = {value if isinstance(value, (int, float)) else repr(str(value))}")
+
+
+def install_search_settings(vector_store: "PGVector") -> None:
+    """Applies the per-query ANN settings at the start of every transaction on the store's engine."""
+    from sqlalchemy import event
+
+    engine = getattr(vector_store, "_engine", None)
+    if engine is None or event.contains(engine, "begin", _apply_search_settings):
+        return
+    event.listen(engine, "begin", _apply_search_settings)
+
+
+def _auto_lists(rows: int) -> int:
+    # pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) above
+    if rows <= 1_000_000:
+        return max(1, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def _fix_dimensions(conn) -> int:
+    """ANN indexes need a fixed-size column; PGVector creates `vector` without one."""
+    from sqlalchemy import text
+
+    declared = conn.execute(text(
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = CAST(:table AS regclass) AND attname = 'embedding'"
+    ), {"table": EMBEDDING_TABLE}).scalar()
+    row = conn.execute(text(f"SELECT vector_dims(embedding) FROM {EMBEDDING_TABLE} LIMIT 1")).fetchone()
+    if row is None:
+        return 0
+    dims = int(row[0])
+    if declared == "vector":
+        print(f"[INDEX] Setting {EMBEDDING_TABLE}.embedding to vector({dims})")
+        conn.execute(text(f"ALTER TABLE {EMBEDDING_TABLE} ALTER COLUMN embedding TYPE vector({dims})"))
+    return dims
+
+
+def ensure_metadata_indexes(conn) -> None:
+    from sqlalchemy import text
+
+    for key in FILTERABLE_METADATA:
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{EMBEDDING_TABLE}_meta_{key} "
+            f"ON {EMBEDDING_TABLE} ((cmetadata ->> '{key}'))"
+        ))
+
+
+def ensure_ann_index(
+    vector_store: "PGVector",
+    method: Optional[str] = None,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    lists: Optional[int] = None,
+    rebuild: bool = False,
+    per_collection: bool = False,
+) -> Dict[str, Any]:
+    """
+    Creates (if missing) the ANN index on the embedding column with cosine ops, the
+    metadata expression indexes, and refreshes planner statistics with ANALYZE.
+    Switching `method` drops the other index; `rebuild` recreates it (IVFFlat
+    centroids are computed from the rows present at build time).
+    With `per_collection`, the index is partial (WHERE collection_id = this
+    collection), so searches on a shard walk a graph the size of that shard.
+    """
+    from sqlalchemy import text
+
+    method = (method or get_vector_index_method()).lower()
+    engine = vector_store._engine
+    report: Dict[str, Any] = {"method": method}
+    scope, where, params = "", "", {}
+    with engine.begin() as conn:
+        if per_collection:
+            scope = vector_store.collection_name
+            collection_id = conn.execute(
+                text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"), {"name": scope}
+            ).scalar()
+            if collection_id is None:
+                raise ValueError(f"Collection {scope!r} not found")
+            # Literal (not bound) so the planner can match it against the query's collection_id
+            where = f" WHERE collection_id = '{collection_id}'"
+            params = {"collection_id": collection_id}
+            report["collection"] = scope
+        report["dimensions"] = _fix_dimensions(conn)
+        rows = conn.execute(
+            text(f"SELECT COUNT(*) FROM {EMBEDDING_TABLE}" + (" WHERE collection_id = :collection_id" if where else "")),
+            params,
+        ).scalar() or 0
+        report["rows"] = rows
+        for other in INDEX_METHODS:
+            if other != method or rebuild:
+                conn.execute(text(f"DROP INDEX IF EXISTS {_index_name(other, scope)}"))
+        started = time.perf_counter()
+        if method == "hnsw":
+            m = m or get_hnsw_m()
+            ef_construction = ef_construction or get_hnsw_ef_construction()
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {_index_name('hnsw', scope)} ON {EMBEDDING_TABLE} "
+                f"USING hnsw (embedding vector_cosine_ops) WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+                f"{where}"
+            ))
+            report.update({"m": m, "ef_construction": ef_construction})
+        elif method == "ivfflat":
+            lists = lists or get_ivfflat_lists() or _auto_lists(rows)
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {_index_name('ivfflat', scope)} ON {EMBEDDING_TABLE} "
+                f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(lists)}){where}"
+            ))
+            report["lists"] = lists
+        report["build_seconds"] = round(time.perf_counter() - started, 3)
+        ensure_metadata_indexes(conn)
+        conn.execute(text(f"ANALYZE {EMBEDDING_TABLE}"))
+    print(f"[INDEX] {report}")
+    return report
+
+
+def pushdown_filter(filter: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Rewrites plain equality filters on FILTERABLE_METADATA ({"source": "a.md"}) to
+    `$in`, which PGVector compiles to `cmetadata ->> key` (served by the expression
+    indexes) instead of jsonb_path_match (not indexable). Other filters pass through.
+    """
+    if not filter:
+        return None
+    rewritten = {}
+    for key, value in filter.items():
+        if key in FILTERABLE_METADATA and isinstance(value, str):
+            rewritten[key] = {"$in": [value]}
+        elif key in FILTERABLE_METADATA and isinstance(value, dict) and set(value) == {"$eq"}:
+            rewritten[key] = {"$in": [value["$eq"]]}
+        else:
+            rewritten[key] = value
+    return rewritten
@@ -0,0 +1,257 @@
+"""
+Low-overhead tracing for pipeline nodes.
+
+- Head-based sampling: the outermost traced call (root span) decides once, with
+  TRACE_SAMPLE_RATE, whether the whole request is traced; nested spans follow it.
+  Unsampled requests call the undecorated function (one context-variable lookup).
+- Payload caps and redaction: inputs/outputs are summarized before export. Fields
+  in TRACE_REDACT_FIELDS (RAG context, roadmap, embeddings...) are replaced by their
+  size and other strings are cut at TRACE_MAX_FIELD_CHARS.
+- Exporters (TRACE_EXPORTER): "langsmith" (imported lazily on the first sampled
+  call), "jsonl" (one span per line in TRACE_JSONL_PATH, no network, written by a
+  background thread) or "none".
+- LangChain/LangGraph add their own LangSmith tracer to every chain and graph run
+  when LANGCHAIN_TRACING_V2 is set. Those runs carry whole prompts and states past the
+  sampling and redaction above, so the pipeline runs them with it turned off
+  (langchain_tracing(False)); only the spans of this module reach LangSmith.
+"""
+import atexit
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from .config import (
+    get_trace_exporter,
+    get_trace_sample_rate,
+    get_trace_max_field_chars,
+    get_trace_redact_fields,
+    get_trace_jsonl_path,
+)
+
+MAX_LIST_ITEMS = 10
+MAX_DEPTH = 3
+
+
+class _Trace:
+    __slots__ = ("trace_id", "sampled", "exporter", "max_chars", "redact", "spans", "parent_id")
+
+    def __init__(self, sampled: bool):
+        self.sampled = sampled
+        self.trace_id = uuid.uuid4().hex if sampled else ""
+        self.exporter = get_trace_exporter() if sampled else "none"
+        self.max_chars = get_trace_max_field_chars() if sampled else 0
+        self.redact = frozenset(get_trace_redact_fields()) if sampled else frozenset()
+        self.spans: List[Dict[str, Any]] = []
+        self.parent_id: Optional[str] = None
+
+
+# Shared by every unsampled request: nothing is recorded on it
+_UNSAMPLED = _Trace(sampled=False)
+
+_current: contextvars.ContextVar = contextvars.ContextVar("agent_trace", default=None)
+_jsonl_queue: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+_jsonl_writer: Optional[threading.Thread] = None
+_jsonl_lock = threading.Lock()
+
+# Environment switches of LangChain's built-in LangSmith tracing (see langsmith.utils.tracing_is_enabled)
+_BUILTIN_TRACING_VARS = ("LANGSMITH_TRACING_V2", "LANGCHAIN_TRACING_V2", "LANGSMITH_TRACING", "LANGCHAIN_TRACING")
+
+
+def langchain_tracing(enabled: bool):
+    """
+    Context turning LangSmith tracing off (or back on, for the spans of this module)
+    while LANGCHAIN_TRACING_V2 is set; a no-op otherwise, without importing langsmith.
+    """
+    if not any(os.getenv(name, "").strip().lower() == "true" for name in _BUILTIN_TRACING_VARS):
+        return contextlib.nullcontext()
+    try:
+        from langsmith.run_helpers import tracing_context
+    except Exception:
+        return contextlib.nullcontext()
+    return tracing_context(enabled=enabled)
+
+
+def summarize(value: Any, max_chars: int, redact: frozenset, depth: int = 0) -> Any:
+    """Bounded, JSON-friendly copy of a payload with large fields redacted."""
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + f"…(+{len(value) - max_chars} chars)"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if depth >= MAX_DEPTH:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            if key in redact:
+                size = len(item) if hasattr(item, "__len__") else 0
+                out[key] = f"<redacted {type(item).__name__} len={size}>"
+            else:
+                out[key] = summarize(item, max_chars, redact, depth + 1)
+        return out
+    if isinstance(value, (list, tuple)):
+        items = [summarize(v, max_chars, redact, depth + 1) for v in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"…(+{len(value) - MAX_LIST_ITEMS} items)")
+        return items
+    return summarize(str(value), max_chars, redact, depth + 1)
+
+
+def _write_jsonl() -> None:
+    while True:
+        path, lines = _jsonl_queue.get()
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except Exception as e:
+            print(f"[TRACE] Could not write spans to {path!r}: {e}")
+        finally:
+            _jsonl_queue.task_done()
+
+
+def _export_jsonl(spans: List[Dict[str, Any]]) -> None:
+    """Queues a finished trace; file writes happen on the writer thread, not on the event loop."""
+    global _jsonl_writer
+    lines = "".join(json.dumps(span, ensure_ascii=False, default=str) + "\n" for span in spans)
+    if _jsonl_writer is None:
+        with _jsonl_lock:
+            if _jsonl_writer is None:
+                _jsonl_writer = threading.Thread(target=_write_jsonl, name="trace-jsonl", daemon=True)
+                _jsonl_writer.start()
+                atexit.register(flush)
+    _jsonl_queue.put((get_trace_jsonl_path(), lines))
+
+
+def flush() -> None:
+    """Waits until every queued span is written (tests, benchmarks, process exit)."""
+    if _jsonl_writer is not None:
+        _jsonl_queue.join()
+
+
+def _langsmith_wrapped(func, trace: "_Trace"):
+    """langsmith.traceable(func) with our caps/redaction; None if langsmith is unavailable."""
+    cache = func.__dict__.setdefault("_langsmith_wrapped", {})
+    max_chars, redact = trace.max_chars, trace.redact
+    key = (max_chars, redact)
+    if key not in cache:
+        try:
+            from langsmith import traceable as langsmith_traceable
+            cache[key] = langsmith_traceable(
+                process_inputs=lambda inputs: summarize(inputs, max_chars, redact),
+                process_outputs=lambda outputs: summarize(outputs, max_chars, redact),
+            )(func)
+        except Exception:
+            cache[key] = None
+    return cache[key]
+
+
+class _Span:
+    """Bookkeeping for one call of a traced function on the "jsonl" exporter."""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "started", "inputs", "overhead")
+
+    def __init__(self, trace: _Trace, name: str, args: tuple, kwargs: dict):
+        t0 = time.perf_counter()
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = trace.parent_id
+        trace.parent_id = self.span_id
+        self.inputs = summarize({"args": list(args), "kwargs": kwargs}, trace.max_chars, trace.redact)
+        self.started = time.time()
+        self.overhead = time.perf_counter() - t0
+
+    def finish(self, output: Any = None, error: Optional[BaseException] = None) -> None:
+        t0 = time.perf_counter()
+        trace = self.trace
+        trace.parent_id = self.parent_id
+        trace.spans.append({
+            "trace_id": trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.started,
+            "duration_ms": round((time.time() - self.started) * 1000, 3),
+            "status": "error" if error else "ok",
+            "error": repr(error) if error else None,
+            "inputs": self.inputs,
+            "outputs": summarize(output, trace.max_chars, trace.redact) if error is None else None,
+        })
+        self.overhead += time.perf_counter() - t0
+        trace.spans[-1]["overhead_us"] = round(self.overhead * 1e6, 1)
+        if self.parent_id is None:
+            _export_jsonl(trace.spans)
+            trace.spans = []
+
+
+def traceable(func):
+    """
+    Decorator for pipeline nodes/edges; see module docstring. Keeps async
+    functions async (LangGraph inspects nodes to decide how to run them).
+    """
+    name = func.__name__
+
+    def _enter():
+        trace = _current.get()
+        if trace is None:
+            trace = _Trace(sampled=True) if random.random() < get_trace_sample_rate() else _UNSAMPLED
+            return trace, _current.set(trace)
+        return trace, None
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            trace, token = _enter()
+            try:
+                if not trace.sampled or trace.exporter == "none":
+                    return await func(*args, **kwargs)
+                if trace.exporter == "langsmith":
+                    wrapped = _langsmith_wrapped(func, trace)
+                    if wrapped is None:
+                        return await func(*args, **kwargs)
+                    with langchain_tracing(True):
+                        return await wrapped(*args, **kwargs)
+                span = _Span(trace, name, args, kwargs)
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    span.finish(error=e)
+                    raise
+                span.finish(output=result)
+                return result
+            finally:
+                if token is not None:
+                    _current.reset(token)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        trace, token = _enter()
+        try:
+            if not trace.sampled or trace.exporter == "none":
+                return func(*args, **kwargs)
+            if trace.exporter == "langsmith":
+                wrapped = _langsmith_wrapped(func, trace)
+                if wrapped is None:
+                    return func(*args, **kwargs)
+                with langchain_tracing(True):
+                    return wrapped(*args, **kwargs)
+            span = _Span(trace, name, args, kwargs)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                span.finish(error=e)
+                raise
+            span.finish(output=result)
+            return result
+        finally:
+            if token is not None:
+                _current.reset(token)
+    return wrapper
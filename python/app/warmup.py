@@ -0,0 +1,166 @@
+"""
+Startup warm-up for a serving worker.
+
+Pays the first-request costs before the worker is reported ready (/readyz): lazy
+imports, graph compilation, prompt templates, Gemini chat clients per node, the
+embeddings client and the pooled vector-store connections per collection. With
+WARMUP_PING=1 it also sends one tiny request to each chat model, the embeddings
+API and Postgres, so TLS handshakes and the first collection lookup are done too.
+A failing step is reported but does not block readiness: nodes have fallbacks.
+The steps that reach the network are bounded by LLM_TIMEOUT_SECONDS, so a hung
+provider or database marks its step failed instead of keeping /readyz at 503.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+from .config import get_warmup_ping, get_google_api_key, get_cassette_mode, get_llm_timeout_seconds
+
+_state: Dict[str, Any] = {"ready": False, "started_at": None, "finished_at": None, "steps": {}}
+
+
+def _import_modules() -> None:
+    import langchain_core.prompts  # noqa: F401
+    import langchain_core.output_parsers  # noqa: F401
+    import langgraph.graph  # noqa: F401
+    # Gemini client classes: imported here, in a thread, not on the loop by the next step
+    import langchain_google_genai  # noqa: F401
+
+
+def _compile_graphs() -> None:
+    from .pipeline import LATENCY_TIERS, get_app
+    from .checkpoints import get_checkpointer
+
+    for tier in LATENCY_TIERS:
+        get_app(tier=tier)
+        if get_checkpointer() is not None:
+            get_app(checkpointed=True, tier=tier)
+
+
+def _build_prompts() -> None:
+    from .nodes import reviewer, smart_obj, roadmap, final_assignment
+
+    for module in (reviewer, smart_obj, roadmap, final_assignment):
+        module.build_prompt()
+    roadmap.build_outline_prompt()
+    roadmap.build_step_prompt()
+
+
+def _build_chat_clients() -> Dict[str, str]:
+    """Clients are cached per event loop, so this runs on the serving loop (not in a thread)."""
+    from .llm import NODE_TIERS, build_chat_llm, select_model, roadmap_max_output_tokens
+    from .deadlines import DEFAULT_DEADLINE
+
+    built = {}
+    for node in NODE_TIERS:
+        model = select_model(node)
+        if node == "roadmap":
+            llm = build_chat_llm(model, node=node, max_output_tokens=roadmap_max_output_tokens(DEFAULT_DEADLINE.days))
+        else:
+            llm = build_chat_llm(model, node=node)
+        built[node] = model if llm is not None else "unavailable"
+    return built
+
+
+def _open_vector_stores(ping: bool) -> Any:
+    from .tools.db_vector_store import get_vector_store, list_collections
+
+    names = list_collections(ttl_seconds=0)
+    if names is None:
+        return "VECTOR_DB_URL unset or unreachable"
+    for name in names:
+        store = get_vector_store(collection_name=name)
+        if ping and store is not None:
+            from sqlalchemy import text
+            with store._engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+    return names
+
+
+def _embeddings_configured() -> bool:
+    # Without a key the client would first probe for application default credentials
+    return bool(get_google_api_key()) or get_cassette_mode() == "replay"
+
+
+def _build_embeddings() -> str:
+    from .tools.embeddings import get_embeddings
+
+    if not _embeddings_configured():
+        return "GOOGLE_API_KEY unset"
+    return type(get_embeddings()).__name__
+
+
+def _ping_embeddings() -> Any:
+    from .tools.embeddings import get_embeddings
+
+    if not _embeddings_configured():
+        return "GOOGLE_API_KEY unset"
+    return len(get_embeddings().embed_query("ping"))
+
+
+async def _ping_chat_models() -> Dict[str, str]:
+    from .llm import NODE_TIERS, build_chat_llm, select_model
+
+    results = {}
+    for node in NODE_TIERS:
+        model = select_model(node)
+        if model in results:
+            continue
+        llm = build_chat_llm(model, node=node)
+        if llm is None:
+            results[model] = "unavailable"
+            continue
+        await llm.ainvoke("Responde solo: ok")
+        results[model] = "ok"
+    return results
+
+
+async def _step(name: str, fn: Callable, *args, in_thread: bool = True, network: bool = False) -> None:
+    started = time.perf_counter()
+    timeout = get_llm_timeout_seconds() if network else 0
+    try:
+        if asyncio.iscoroutinefunction(fn) or in_thread:
+            work = fn(*args) if asyncio.iscoroutinefunction(fn) else asyncio.to_thread(fn, *args)
+            # A timed-out thread keeps running in the background; readiness does not wait for it
+            detail = await asyncio.wait_for(work, timeout=timeout) if timeout and timeout > 0 else await work
+        else:
+            detail = fn(*args)
+        _state["steps"][name] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1), "detail": detail}
+    except asyncio.TimeoutError:
+        _state["steps"][name] = {
+            "ok": False, "ms": round((time.perf_counter() - started) * 1000, 1), "error": f"timed out after {timeout:g} s",
+        }
+        print(f"[WARMUP] {name} timed out after {timeout:g} s")
+    except Exception as e:
+        _state["steps"][name] = {"ok": False, "ms": round((time.perf_counter() - started) * 1000, 1), "error": str(e)}
+        print(f"[WARMUP] {name} failed: {e}")
+
+
+async def warm_up(ping: Optional[bool] = None) -> Dict[str, Any]:
+    """Runs every warm-up step once and marks the worker ready."""
+    ping = get_warmup_ping() if ping is None else ping
+    _state.update({"ready": False, "started_at": time.time(), "steps": {}})
+    started = time.perf_counter()
+    await _step("imports", _import_modules)
+    await _step("graphs", _compile_graphs)
+    await _step("prompts", _build_prompts)
+    await _step("chat_clients", _build_chat_clients, in_thread=False)
+    await _step("embeddings", _ping_embeddings if ping else _build_embeddings, network=ping)
+    await _step("vector_stores", _open_vector_stores, ping, network=True)
+    if ping:
+        await _step("chat_ping", _ping_chat_models, network=True)
+    _state.update({"ready": True, "finished_at": time.time()})
+    print(f"[WARMUP] Ready in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return status()
+
+
+def is_ready() -> bool:
+    return _state["ready"]
+
+
+def status() -> Dict[str, Any]:
+    return {
+        "ready": _state["ready"],
+        "started_at": _state["started_at"],
+        "finished_at": _state["finished_at"],
+        "steps": dict(_state["steps"]),
+    }
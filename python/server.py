@@ -1,11 +1,40 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from .app.router import router  # modular router with endpoint(s)
 from dotenv import load_dotenv
 
 # Ensure .env is loaded for GOOGLE_API_KEY and other settings
 load_dotenv()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the worker (graphs, clients, pools) in the background; /readyz reports when it is done
+    from .app.warmup import warm_up
+    from .app.config import get_loop_monitor
+    from .app.loop_monitor import start_loop_monitor, stop_loop_monitor
+    if get_loop_monitor():
+        start_loop_monitor()
+    task = asyncio.create_task(warm_up())
+    yield
+    task.cancel()
+    stop_loop_monitor()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(router)
 
- 
\ No newline at end of file
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving its event loop."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 only once the startup warm-up finished, so no traffic reaches a cold worker."""
+    from .app.warmup import is_ready, status
+    return JSONResponse(status(), status_code=200 if is_ready() else 503)
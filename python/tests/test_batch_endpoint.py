@@ -0,0 +1,43 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from python.app import router as router_module
+from python.app.schemas import MAX_BATCH_CONCURRENCY
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def run_batch(payloads, max_concurrency=None):
+        for position, payload in enumerate(payloads):
+            yield position, {"status": "ok", "response": payload["objective"]}
+
+    monkeypatch.setattr(router_module, "run_batch", run_batch)
+    app = FastAPI()
+    app.include_router(router_module.router)
+    return TestClient(app)
+
+
+def _lines(response):
+    return sorted((json.loads(line) for line in response.text.splitlines()), key=lambda item: item["index"])
+
+
+def test_uncached_profile_fails_only_its_item(client, monkeypatch):
+    monkeypatch.setattr(router_module, "get_user_profile", lambda user_id, version: None)
+    response = client.post("/agent/batch", json={"items": [
+        {"objective": "Aprender Go", "skills": []},
+        {"objective": "Aprender Rust", "user_id": "u1", "profile_version": "v9"},
+        {"objective": "Aprender Java"},
+    ]})
+    assert response.status_code == 200
+    assert _lines(response) == [
+        {"index": 0, "status": "ok", "response": "Aprender Go"},
+        {"index": 1, "status": "profile_not_cached", "response": ""},
+        {"index": 2, "status": "ok", "response": "Aprender Java"},
+    ]
+
+
+@pytest.mark.parametrize("value", [0, MAX_BATCH_CONCURRENCY + 1])
+def test_max_concurrency_is_bounded(client, value):
+    response = client.post("/agent/batch", json={"items": [{"objective": "x"}], "max_concurrency": value})
+    assert response.status_code == 422
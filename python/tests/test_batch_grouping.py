@@ -0,0 +1,16 @@
+from python.app.batch import group_payloads
+
+
+def test_identical_payloads_share_one_run():
+    payload = {"objective": "Docker", "skills": [], "latency_tier": "fast"}
+    assert group_payloads([payload, dict(payload)]) == [(payload, [0, 1])]
+
+
+def test_distinct_request_ids_are_not_grouped():
+    payloads = [
+        {"objective": "Docker", "skills": [], "request_id": "a"},
+        {"objective": "Docker", "skills": [], "request_id": "b"},
+        {"objective": "Docker", "skills": [], "request_id": "a"},
+    ]
+    groups = group_payloads(payloads)
+    assert [(payload["request_id"], indices) for payload, indices in groups] == [("a", [0, 2]), ("b", [1])]
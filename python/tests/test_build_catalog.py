@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from python.app.fallbacks import note_fallback
+from python.app.scripts import build_catalog
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    seen = {}
+
+    async def smart(objective, skills, deadline):
+        return "objetivo SMART"
+
+    async def retrieve(objective, collections, k):
+        seen["retrieval"] = (collections, k)
+        return "contexto"
+
+    async def roadmap(smart, context, skills, deadline):
+        return "roadmap"
+
+    async def assignment(roadmap, skills):
+        return "trabajo final"
+
+    monkeypatch.setenv("RAG_TOP_K", "7")
+    monkeypatch.setattr(build_catalog, "to_smart_objective", smart)
+    monkeypatch.setattr(build_catalog, "route_collections", lambda technologies, base: [f"{base}_{t}" for t in technologies])
+    monkeypatch.setattr(build_catalog, "retrieve_context_sharded", retrieve)
+    monkeypatch.setattr(build_catalog, "build_roadmap", roadmap)
+    monkeypatch.setattr(build_catalog, "build_final_assignment", assignment)
+    return seen
+
+
+def test_bundle_uses_request_time_retrieval(stages):
+    bundle = asyncio.run(build_catalog.build_bundle("python", "1 mes", "beginner"))
+    assert bundle["roadmap"] == "roadmap"
+    assert stages["retrieval"] == (["docs_python"], 7)
+
+
+def test_degraded_bundle_is_not_stored(stages, monkeypatch, tmp_path):
+    async def fallback_roadmap(*args):
+        note_fallback("roadmap")
+        return "plantilla"
+
+    monkeypatch.setattr(build_catalog, "build_roadmap", fallback_roadmap)
+    path = str(tmp_path / "catalog.json")
+    assert asyncio.run(build_catalog.build_bundle("python", "1 mes", "beginner")) is None
+    assert asyncio.run(build_catalog.build_catalog(["python"], ["1 mes"], ["beginner"], 5, path)) == 0
@@ -0,0 +1,62 @@
+import pytest
+from python.app import catalog
+from python.app.catalog import (
+    TIER_BEGINNER,
+    TIER_RELATED,
+    bundle_key,
+    invalidate_catalog,
+    lookup_bundle,
+    new_catalog,
+    save_catalog,
+)
+
+
+@pytest.fixture
+def catalog_path(monkeypatch, tmp_path):
+    corpus = tmp_path / "corpus.md"
+    corpus.write_text("# Python\n", encoding="utf-8")
+    path = tmp_path / "catalog.json"
+    monkeypatch.setenv("RAG_CORPUS_PATHS", str(corpus))
+    monkeypatch.setenv("ROADMAP_CATALOG_PATH", str(path))
+    catalog._loaded.clear()
+    built = new_catalog()
+    built["bundles"] = {
+        bundle_key("python", "1 mes", TIER_BEGINNER): {"technology": "python", "roadmap": "principiante"},
+        bundle_key("python", "1 mes", TIER_RELATED): {"technology": "python", "roadmap": "con base"},
+    }
+    save_catalog(built, str(path))
+    yield path
+    catalog._loaded.clear()
+
+
+def test_hit_by_technology_deadline_and_tier(catalog_path):
+    assert lookup_bundle("Quiero aprender Python", " 1  MES", [])["roadmap"] == "principiante"
+    skills = [{"name": "Python", "categories": []}]
+    assert lookup_bundle("Quiero aprender Python", "1 mes", skills)["roadmap"] == "con base"
+
+
+def test_miss(catalog_path):
+    assert lookup_bundle("Quiero aprender Python", "2 semanas", []) is None
+    # Only objectives about exactly one catalogued technology
+    assert lookup_bundle("Quiero aprender Python y Docker", "1 mes", []) is None
+    assert lookup_bundle("Quiero aprender cocina", "1 mes", []) is None
+
+
+def test_catalog_of_another_corpus_is_ignored(catalog_path, tmp_path, monkeypatch):
+    other = tmp_path / "other.md"
+    other.write_text("# Otro corpus\n", encoding="utf-8")
+    monkeypatch.setenv("RAG_CORPUS_PATHS", str(other))
+    catalog._loaded.clear()
+    assert lookup_bundle("Quiero aprender Python", "1 mes", []) is None
+
+
+def test_disabled_without_path(catalog_path, monkeypatch):
+    monkeypatch.setenv("ROADMAP_CATALOG_PATH", "")
+    assert lookup_bundle("Quiero aprender Python", "1 mes", []) is None
+
+
+def test_invalidate_drops_bundles(catalog_path):
+    assert lookup_bundle("Quiero aprender Python", "1 mes", []) is not None
+    assert invalidate_catalog(str(catalog_path))
+    assert lookup_bundle("Quiero aprender Python", "1 mes", []) is None
+    assert catalog.load_catalog(str(catalog_path))["version"] == 2
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from python.app import pipeline
+from python.app.checkpoints import get_checkpointer
+from python.app.deadlines import DEFAULT_DEADLINE
+from python.app.fallbacks import note_fallback
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def stages(request, monkeypatch, tmp_path):
+    """Stub stages of the fast tier; the roadmap falls back on its first call only."""
+    monkeypatch.setenv("CHECKPOINT_BACKEND", request.param)
+    monkeypatch.setenv("CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite"))
+    # Checkpointed graphs are compiled once with the checkpointer of that moment
+    pipeline.get_app.cache_clear()
+    calls = {"reviewer": 0, "smart": 0, "roadmap": 0}
+
+    async def review(objective):
+        calls["reviewer"] += 1
+        return True, DEFAULT_DEADLINE
+
+    async def smart(*args, **kwargs):
+        calls["smart"] += 1
+        return "objetivo SMART"
+
+    async def roadmap(*args, **kwargs):
+        calls["roadmap"] += 1
+        if calls["roadmap"] == 1:
+            note_fallback("roadmap")
+            return "roadmap de respaldo"
+        return "roadmap real"
+
+    monkeypatch.setattr(pipeline, "review_objective", review)
+    monkeypatch.setattr(pipeline, "lookup_bundle", lambda *a, **k: None)
+    monkeypatch.setattr(pipeline, "to_smart_objective", smart)
+    monkeypatch.setattr(pipeline, "build_roadmap", roadmap)
+    yield calls
+    get_checkpointer().delete_thread("retry-1")
+    pipeline.get_app.cache_clear()
+
+
+def _run(request_id="retry-1"):
+    payload = {"objective": "Aprender Python", "request_id": request_id, "latency_tier": "fast"}
+    return asyncio.run(pipeline.run_pipeline(payload))
+
+
+def test_retry_reruns_the_degraded_node_only(stages):
+    first = _run()
+    assert "roadmap de respaldo" in first["response"]
+
+    second = _run()
+    assert "roadmap real" in second["response"]
+    assert stages == {"reviewer": 1, "smart": 1, "roadmap": 2}
+
+
+def test_completed_run_is_replayed_without_running_nodes(stages):
+    _run()
+    _run()
+    third = _run()
+    assert "roadmap real" in third["response"]
+    assert stages["roadmap"] == 2
@@ -0,0 +1,116 @@
+import pytest
+from python.app import circuit_breaker
+from python.app.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    for name, value in {
+        "BREAKER_ENABLED": "1",
+        "BREAKER_WINDOW_SECONDS": "60",
+        "BREAKER_MIN_CALLS": "4",
+        "BREAKER_FAILURE_RATE": "0.5",
+        "BREAKER_SLOW_CALL_MS": "1000",
+        "BREAKER_SLOW_CALL_RATE": "0.75",
+        "BREAKER_OPEN_SECONDS": "30",
+    }.items():
+        monkeypatch.setenv(name, value)
+    return clock
+
+
+def _fail(breaker, n=1):
+    for _ in range(n):
+        breaker.check()
+        breaker.record(0.1, RuntimeError("boom"))
+
+
+def _ok(breaker, n=1, seconds=0.1):
+    for _ in range(n):
+        breaker.check()
+        breaker.record(seconds)
+
+
+def test_stays_closed_under_min_calls(clock):
+    breaker = CircuitBreaker("test")
+    _fail(breaker, 3)
+    assert breaker.state == CLOSED
+    breaker.check()
+
+
+def test_opens_on_failure_rate_and_rejects(clock):
+    breaker = CircuitBreaker("test")
+    _ok(breaker, 2)
+    _fail(breaker, 2)
+    assert breaker.state == OPEN and breaker.is_open()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.rejected == 1
+    assert breaker.snapshot()["last_error"] == "RuntimeError: boom"
+
+
+def test_opens_on_slow_call_rate(clock):
+    breaker = CircuitBreaker("test")
+    _ok(breaker, 1)
+    _ok(breaker, 3, seconds=2.0)
+    assert breaker.state == OPEN
+
+
+def test_old_calls_leave_the_window(clock):
+    breaker = CircuitBreaker("test")
+    _fail(breaker, 3)
+    clock.now += 61
+    _fail(breaker, 1)
+    _ok(breaker, 3)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_on_success(clock):
+    breaker = CircuitBreaker("test")
+    _fail(breaker, 4)
+    clock.now += 30
+    assert not breaker.is_open()
+    breaker.check()
+    assert breaker.state == HALF_OPEN
+    # One probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record(0.1)
+    assert breaker.state == CLOSED
+    breaker.check()
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker("test")
+    _fail(breaker, 4)
+    clock.now += 30
+    _fail(breaker, 1)
+    assert breaker.state == OPEN and breaker.opened == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_released_probe_frees_the_slot(clock):
+    breaker = CircuitBreaker("test")
+    _fail(breaker, 4)
+    clock.now += 30
+    breaker.check()
+    breaker.release()
+    breaker.check()
+    assert breaker.state == HALF_OPEN
+
+
+def test_disabled_never_rejects(clock, monkeypatch):
+    monkeypatch.setenv("BREAKER_ENABLED", "0")
+    breaker = CircuitBreaker("test")
+    _fail(breaker, 10)
+    assert breaker.state == CLOSED and not breaker.is_open()
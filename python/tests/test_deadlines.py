@@ -0,0 +1,39 @@
+import pytest
+from python.app.deadlines import DEFAULT_DEADLINE, Duration, as_duration, format_days, parse_deadline
+from python.app.scripts.bench_deadlines import CASES
+
+
+@pytest.mark.parametrize("text,days,label", CASES)
+def test_bench_table(text, days, label):
+    parsed = parse_deadline(text)
+    assert ((parsed.days, parsed.label) if parsed else (None, None)) == (days, label)
+
+
+@pytest.mark.parametrize("text", [
+    "Quiero usar Python en el día a día",
+    "mes a mes",
+    "semana a semana",
+    "year after year, an hour a day",
+])
+def test_bare_articles_are_not_numbers(text):
+    assert parse_deadline(text) is None
+
+
+def test_articles_after_prefix():
+    assert parse_deadline("learn python in a month") == Duration(30, "1 mes")
+    assert parse_deadline("learn rust in an year") == Duration(365, "1 año")
+
+
+def test_prefixed_expression_wins():
+    assert parse_deadline("Tengo 2 años de experiencia, quiero Go en 3 meses") == Duration(90, "3 meses")
+
+
+def test_as_duration_defaults():
+    assert as_duration(None) == DEFAULT_DEADLINE
+    assert as_duration("sin plazo") == DEFAULT_DEADLINE
+    assert as_duration(Duration(7, "1 semana")) == Duration(7, "1 semana")
+
+
+@pytest.mark.parametrize("days,label", [(0, "1 día"), (3, "3 días"), (14, "2 semanas"), (90, "3 meses"), (730, "2 años")])
+def test_format_days(days, label):
+    assert format_days(days) == label
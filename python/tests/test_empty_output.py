@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from langchain_core.runnables import RunnableLambda
+from python.app.llm import output_token_headroom
+from python.app.nodes import final_assignment, roadmap, smart_obj
+
+
+@pytest.fixture
+def empty_llm(monkeypatch):
+    """Every node gets an LLM that answers "" (an output cap spent on thinking)."""
+    monkeypatch.setenv("ROADMAP_MODE", "single")
+    llm = RunnableLambda(lambda _: "")
+    for module in (roadmap, final_assignment, smart_obj):
+        monkeypatch.setattr(module, "build_chat_llm", lambda *a, **k: llm)
+
+        async def _empty(*a, **k):
+            return ""
+        monkeypatch.setattr(module, "cached_ainvoke", _empty)
+
+
+def test_headroom_defaults_to_thinking_room_on_thinking_models(monkeypatch):
+    monkeypatch.delenv("LLM_OUTPUT_TOKEN_HEADROOM", raising=False)
+    assert output_token_headroom("gemini-2.5-flash") > 0
+    assert output_token_headroom("models/gemini-2.5-pro") > 0
+    assert output_token_headroom("gemini-2.5-flash-lite") == 0
+    assert output_token_headroom("gemini-2.0-flash") == 0
+
+
+def test_headroom_env_wins(monkeypatch):
+    monkeypatch.setenv("LLM_OUTPUT_TOKEN_HEADROOM", "0")
+    assert output_token_headroom("gemini-2.5-flash") == 0
+    monkeypatch.setenv("LLM_OUTPUT_TOKEN_HEADROOM", "512")
+    assert output_token_headroom("gemini-2.0-flash") == 512
+
+
+def test_empty_roadmap_falls_back(empty_llm):
+    text = asyncio.run(roadmap.build_roadmap("Aprender Python", "", [], "1 mes"))
+    assert text == roadmap._fallback_roadmap("Aprender Python", "", [], "1 mes")
+    assert text
+
+
+def test_empty_final_assignment_falls_back(empty_llm):
+    text = asyncio.run(final_assignment.build_final_assignment("1. Bases", []))
+    assert text == final_assignment._fallback_assignment("1. Bases", [])
+    assert text
+
+
+def test_empty_smart_objective_falls_back(empty_llm):
+    text = asyncio.run(smart_obj.to_smart_objective("Aprender Python", [], "1 mes"))
+    assert text == smart_obj._fallback_smart("Aprender Python", "1 mes")
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from python.app import batch
+from python.app.catalog import personalize_bundle
+from python.app.nodes.roadmap import _COMPACT_HINT, build_prompt
+from python.app.pipeline import get_app, resolve_latency_tier
+
+BUNDLE = {
+    "technology": "python",
+    "smart_objective": "Dominar Python",
+    "roadmap": "1. Bases",
+    "final_assignment": "Construye una CLI",
+}
+
+
+def _nodes(tier):
+    return set(get_app(tier=tier).get_graph().nodes) - {"__start__", "__end__"}
+
+
+def test_graph_nodes_per_tier():
+    common = {"reviewer", "catalog", "to_smart_obj", "roadmap_builder"}
+    assert _nodes("fast") == common
+    assert _nodes("standard") == common | {"rag"}
+    assert _nodes("full") == common | {"rag", "final_assignment_task"}
+
+
+def test_tier_resolution(monkeypatch):
+    monkeypatch.delenv("PIPELINE_LATENCY_TIER", raising=False)
+    assert resolve_latency_tier("fast") == "fast"
+    assert resolve_latency_tier(None) == "full"
+    assert resolve_latency_tier("bogus") == "full"
+    monkeypatch.setenv("PIPELINE_LATENCY_TIER", "standard")
+    assert resolve_latency_tier(None) == "standard"
+
+
+@pytest.mark.parametrize("tier,has_assignment", [("fast", False), ("standard", False), ("full", True)])
+def test_catalog_bundle_follows_the_tier(tier, has_assignment):
+    state = personalize_bundle(BUNDLE, "Aprender Python", [], tier)
+    assert state["roadmap"] == "1. Bases"
+    assert bool(state["final_assignment"]) is has_assignment
+
+
+def test_compact_hint_has_its_own_slot():
+    prompt = build_prompt()
+    assert "format_hint" in prompt.input_variables
+    variables = {"deadline": "2 semanas", "skills": "-", "context": "-", "smart": "x"}
+    compact = prompt.format_messages(**variables, format_hint=_COMPACT_HINT)[-1].content
+    full = prompt.format_messages(**variables, format_hint="")[-1].content
+    assert "PLAZO DISPONIBLE: 2 semanas\n📏 VERSIÓN COMPACTA" in compact
+    assert "PLAZO DISPONIBLE: 2 semanas\n\n" in full
+
+
+def test_batch_embeds_only_tiers_with_rag(monkeypatch):
+    monkeypatch.setenv("VECTOR_DB_URL", "postgresql://unused")
+    embedded = []
+
+    def embed_queries(texts):
+        embedded.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    async def run_pipeline(payload):
+        return {"status": "ok", "response": "", "embedding": payload.get("query_embedding")}
+
+    import python.app.tools.embeddings as embeddings
+    monkeypatch.setattr(embeddings, "embed_queries", embed_queries)
+    monkeypatch.setattr(batch, "run_pipeline", run_pipeline)
+    payloads = [
+        {"objective": "Aprender Go", "latency_tier": "fast"},
+        {"objective": "Aprender Rust", "latency_tier": "full"},
+    ]
+
+    async def collect():
+        return dict([item async for item in batch.run_batch(payloads)])
+
+    results = asyncio.run(collect())
+    assert embedded == [["Aprender Rust"]]
+    assert results[0]["embedding"] is None
+    assert results[1]["embedding"] == [13.0]
@@ -0,0 +1,51 @@
+import pytest
+from python.app.llm import configured_model, select_model
+from python.app.llm_metrics import get_llm_metrics
+
+
+@pytest.fixture(autouse=True)
+def _models(monkeypatch):
+    monkeypatch.setenv("GOOGLE_MODEL", "standard-model")
+    monkeypatch.setenv("GOOGLE_MODEL_LITE", "lite-model")
+    monkeypatch.delenv("LLM_LITE_NODES", raising=False)
+    monkeypatch.delenv("LLM_ROUTER_P95_MS", raising=False)
+    get_llm_metrics().reset()
+    yield
+    get_llm_metrics().reset()
+
+
+def test_every_node_defaults_to_the_standard_model():
+    for node in ("reviewer", "smart_obj", "roadmap", "final_assignment"):
+        assert configured_model(node) == "standard-model"
+
+
+def test_lite_tier_is_opt_in(monkeypatch):
+    monkeypatch.setenv("LLM_LITE_NODES", "reviewer, smart_obj")
+    assert configured_model("reviewer") == "lite-model"
+    assert configured_model("smart_obj") == "lite-model"
+    assert configured_model("roadmap") == "standard-model"
+
+
+def test_node_override_wins(monkeypatch):
+    monkeypatch.setenv("LLM_LITE_NODES", "reviewer")
+    monkeypatch.setenv("GOOGLE_MODEL_REVIEWER", "pinned-model")
+    assert configured_model("reviewer") == "pinned-model"
+
+
+def test_router_moves_to_the_faster_tier_only_when_slow(monkeypatch):
+    monkeypatch.setenv("LLM_ROUTER_P95_MS", "1000")
+    monkeypatch.setenv("LLM_ROUTER_MIN_SAMPLES", "3")
+    metrics = get_llm_metrics()
+    for _ in range(3):
+        metrics.record("standard-model", "roadmap", 0.5)
+    assert select_model("roadmap") == "standard-model"
+    for _ in range(3):
+        metrics.record("standard-model", "roadmap", 5.0)
+    assert select_model("roadmap") == "lite-model"
+
+
+def test_router_off_by_default():
+    metrics = get_llm_metrics()
+    for _ in range(50):
+        metrics.record("standard-model", "roadmap", 60.0)
+    assert select_model("roadmap") == "standard-model"
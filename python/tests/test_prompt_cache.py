@@ -0,0 +1,35 @@
+import pytest
+from langchain_google_genai import ChatGoogleGenerativeAI
+from python.app.llm import NODE_PROMPTS, _new_chat_llm, context_cache_applies
+from python.app.prompt_cache import GeminiChatModel, qualifies
+
+
+@pytest.fixture(autouse=True)
+def _cache_env(monkeypatch):
+    monkeypatch.delenv("PROMPT_CACHE_MIN_TOKENS", raising=False)
+    monkeypatch.delenv("PROMPT_CONTEXT_CACHE", raising=False)
+
+
+def test_off_by_default():
+    assert not any(context_cache_applies(node) for node in NODE_PROMPTS)
+
+
+def test_small_prompts_do_not_qualify(monkeypatch):
+    monkeypatch.setenv("PROMPT_CONTEXT_CACHE", "1")
+    assert not qualifies("x" * 100)
+    # No node prompt reaches the provider minimum of 1024 tokens today
+    assert not any(context_cache_applies(node) for node in NODE_PROMPTS)
+
+
+def test_qualifying_prompt_uses_the_caching_client(monkeypatch):
+    monkeypatch.setenv("PROMPT_CONTEXT_CACHE", "1")
+    monkeypatch.setenv("PROMPT_CACHE_MIN_TOKENS", "10")
+    assert context_cache_applies("roadmap")
+    assert not context_cache_applies(None)
+
+
+def test_client_class_follows_the_decision():
+    stock = _new_chat_llm("gemini-2.5-flash", 100, "", False, "test-key")
+    assert type(stock) is ChatGoogleGenerativeAI
+    caching = _new_chat_llm("gemini-2.5-flash", 100, "", True, "test-key")
+    assert isinstance(caching, GeminiChatModel) and caching.context_cache
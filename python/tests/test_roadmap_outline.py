@@ -0,0 +1,50 @@
+from python.app.deadlines import Duration
+from python.app.nodes.roadmap import _parse_outline, _parse_step
+
+MONTH = Duration(30, "1 mes")
+
+
+def test_outline_json_in_prose():
+    text = 'Aquí está:\n```json\n[{"titulo": "bases", "dias": 10}, {"titulo": "**Proyecto**", "dias": 20}]\n```'
+    assert _parse_outline(text, MONTH) == [("Bases", 10), ("Proyecto", 20)]
+
+
+def test_outline_capped_at_the_steps_the_deadline_allows():
+    items = ", ".join(f'{{"titulo": "Paso {i}", "dias": 1}}' for i in range(10))
+    assert len(_parse_outline(f"[{items}]", MONTH)) == 4
+
+
+def test_outline_days_scaled_down_to_the_deadline():
+    steps = _parse_outline('[{"titulo": "A", "dias": 30}, {"titulo": "B", "dias": 30}]', MONTH)
+    assert steps == [("A", 15), ("B", 15)]
+
+
+def test_missing_days_share_the_rest():
+    steps = _parse_outline('[{"titulo": "A", "dias": 10}, {"titulo": "B"}, {"title": "C", "days": "0"}]', MONTH)
+    assert steps == [("A", 10), ("B", 10), ("C", 10)]
+
+
+def test_unparseable_outline_is_empty():
+    assert _parse_outline("no hay lista", MONTH) == []
+    assert _parse_outline("[{roto", MONTH) == []
+    assert _parse_outline('[{"dias": 3}, "texto"]', MONTH) == []
+
+
+def test_step_expansion():
+    text = (
+        "*📚 2. Bases*\n"
+        "Aprende la sintaxis y los tipos.\n"
+        "Practica con ejercicios cortos.\n"
+        "Y algo más.\n"
+        "⏱️ _Tiempo:_ 1 semana\n"
+        "🔗 _Links:_ https://docs.python.org"
+    )
+    assert _parse_step(text) == (
+        "Aprende la sintaxis y los tipos. Practica con ejercicios cortos.",
+        "https://docs.python.org",
+    )
+
+
+def test_step_links_from_urls_when_no_links_line():
+    description, links = _parse_step("Lee https://a.dev y https://b.dev y https://a.dev")
+    assert links == "https://a.dev, https://b.dev"
@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_server_import_stays_free_of_langchain():
+    probe = (
+        "import sys, python.server; "
+        "print(','.join(m for m in sys.modules if m.split('.')[0] in ('langchain_core', 'langsmith', 'langgraph')))"
+    )
+    proc = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert proc.stdout.strip() == ""
@@ -0,0 +1,43 @@
+import asyncio
+import json
+
+from python.app import tracing
+
+
+def test_jsonl_spans_are_written_off_the_caller_and_redacted(tmp_path, monkeypatch):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setenv("TRACE_EXPORTER", "jsonl")
+    monkeypatch.setenv("TRACE_SAMPLE_RATE", "1")
+    monkeypatch.setenv("TRACE_JSONL_PATH", str(path))
+
+    @tracing.traceable
+    async def node(state):
+        return {**state, "status": "ok"}
+
+    asyncio.run(node({"objective": "Docker", "context": "x" * 5000}))
+    tracing.flush()
+
+    spans = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(spans) == 1
+    assert "x" * 100 not in json.dumps(spans[0])
+
+
+def test_langchain_tracing_is_a_noop_without_the_env_switch(monkeypatch):
+    for name in tracing._BUILTIN_TRACING_VARS:
+        monkeypatch.delenv(name, raising=False)
+    with tracing.langchain_tracing(False) as ctx:
+        assert ctx is None
+
+
+def test_langchain_tracing_turns_builtin_runs_off(monkeypatch):
+    from langsmith.utils import get_env_var, tracing_is_enabled
+
+    monkeypatch.setenv("LANGCHAIN_TRACING_V2", "true")
+    # langsmith caches its env lookups; earlier tests may have read the switch unset
+    get_env_var.cache_clear()
+    assert tracing_is_enabled()
+    with tracing.langchain_tracing(False):
+        assert not tracing_is_enabled()
+    assert tracing_is_enabled()
+    monkeypatch.delenv("LANGCHAIN_TRACING_V2")
+    get_env_var.cache_clear()
@@ -0,0 +1,24 @@
+import asyncio
+import time
+from python.app import warmup
+
+
+def test_hung_steps_time_out_and_the_worker_still_gets_ready(monkeypatch):
+    monkeypatch.setenv("LLM_TIMEOUT_SECONDS", "0.2")
+
+    async def hung_ping():
+        await asyncio.sleep(60)
+
+    def hung_postgres(ping):
+        time.sleep(1)
+
+    monkeypatch.setattr(warmup, "_ping_chat_models", hung_ping)
+    monkeypatch.setattr(warmup, "_open_vector_stores", hung_postgres)
+    started = time.perf_counter()
+    status = asyncio.run(warmup.warm_up(ping=True))
+    assert time.perf_counter() - started < 5
+    assert status["ready"]
+    assert status["steps"]["chat_ping"]["ok"] is False
+    assert "timed out" in status["steps"]["chat_ping"]["error"]
+    assert status["steps"]["vector_stores"]["ok"] is False
+    assert status["steps"]["graphs"]["ok"] is True
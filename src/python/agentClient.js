@@ -71,6 +71,105 @@ function extractResponseFromAgentOutput(output) {
   return null;
 }
 
+function getAgentScriptPath() {
+  return path.join(__dirname, '../../python', 'agent.py');
+}
+
+function resolvePythonExec() {
+  const projectRoot = path.join(__dirname, '..', '..');
+  const venvPython = process.env.PYTHON_BIN || path.join(projectRoot, '.venv', 'bin', 'python');
+  return fs.existsSync(venvPython) ? venvPython : 'python3';
+}
+
+// Long-lived `agent.py --worker` process: NDJSON requests on stdin, one JSON line per response on stdout.
+// Keeps imports and the compiled graph warm so the HTTP fallback does not pay a cold start per request.
+let worker = null;
+let workerSeq = 0;
+
+// A request the worker has not answered by then is rejected and the worker restarted:
+// a hung process would otherwise keep every later request waiting too
+function workerTimeoutMs() {
+  const value = parseInt(process.env.PY_AGENT_WORKER_TIMEOUT_MS || '', 10);
+  return Number.isFinite(value) && value > 0 ? value : 120000;
+}
+
+function getPersistentWorker() {
+  if (worker) return worker;
+  const scriptPath = getAgentScriptPath();
+  const pythonExec = resolvePythonExec();
+  console.log(`[Agent] Starting persistent Python worker: ${pythonExec} ${scriptPath} --worker`);
+  const py = spawn(pythonExec, [scriptPath, '--worker'], { stdio: ['pipe', 'pipe', 'pipe'] });
+  const current = { py, pending: new Map(), buffer: '' };
+
+  py.stdout.on('data', (data) => {
+    current.buffer += data.toString();
+    let newlineIdx;
+    while ((newlineIdx = current.buffer.indexOf('\n')) !== -1) {
+      const line = current.buffer.slice(0, newlineIdx).trim();
+      current.buffer = current.buffer.slice(newlineIdx + 1);
+      if (!line) continue;
+      const data = safeParseJson(line);
+      const entry = data && current.pending.get(data.id);
+      if (!entry) continue;
+      current.pending.delete(data.id);
+      clearTimeout(entry.timer);
+      delete data.id;
+      entry.resolve(JSON.stringify(data));
+    }
+  });
+
+  py.stderr.on('data', (data) => {
+    process.stderr.write(data);
+  });
+
+  const failAll = (err) => {
+    if (worker === current) worker = null;
+    for (const entry of current.pending.values()) {
+      clearTimeout(entry.timer);
+      entry.reject(err);
+    }
+    current.pending.clear();
+  };
+  current.fail = failAll;
+  py.on('error', failAll);
+  // A write to a worker that died between requests fails asynchronously (EPIPE); unhandled,
+  // that 'error' event would crash the Node process. Fail its requests and let the next one respawn it.
+  py.stdin.on('error', (err) => {
+    console.error('[Agent] Persistent worker stdin failed, restarting it:', err.message);
+    failAll(err);
+    py.kill();
+  });
+  py.on('close', (code) => failAll(new Error(`Python worker exited with code ${code}`)));
+
+  worker = current;
+  return worker;
+}
+
+function sendToPersistentWorker(payload) {
+  return new Promise((resolve, reject) => {
+    const current = getPersistentWorker();
+    const id = `req-${++workerSeq}`;
+    const timeoutMs = workerTimeoutMs();
+    const timer = setTimeout(() => {
+      if (!current.pending.has(id)) return;
+      console.error(`[Agent] Persistent worker did not answer ${id} in ${timeoutMs} ms, restarting it`);
+      current.pending.delete(id);
+      reject(new Error(`Python worker timed out after ${timeoutMs} ms`));
+      // The next request starts a fresh worker; requests still pending on this one fail now
+      current.fail(new Error('Python worker restarted after a timeout'));
+      current.py.kill();
+    }, timeoutMs);
+    current.pending.set(id, { resolve, reject, timer });
+    try {
+      current.py.stdin.write(JSON.stringify({ ...payload, id }) + '\n');
+    } catch (err) {
+      clearTimeout(timer);
+      current.pending.delete(id);
+      reject(err);
+    }
+  });
+}
+
 async function sendToPythonAgent(payload, progressCallback = null) {
   const agentUrl = process.env.PY_AGENT_URL || 'http://127.0.0.1:8000/agent';
   
@@ -109,11 +208,18 @@ async function sendToPythonAgent(payload, progressCallback = null) {
     if (progressInterval) clearInterval(progressInterval);
     return JSON.stringify(res && res.data);
   } catch (httpErr) {
+    if (process.env.PY_AGENT_WORKER !== '0') {
+      try {
+        const output = await sendToPersistentWorker(payload);
+        if (progressInterval) clearInterval(progressInterval);
+        return output;
+      } catch (workerErr) {
+        console.error('[Agent] Persistent worker failed, spawning one-shot process:', workerErr.message);
+      }
+    }
     return new Promise((resolve, reject) => {
-      const scriptPath = path.join(__dirname, '../../python', 'agent.py');
-      const projectRoot = path.join(__dirname, '..', '..');
-      const venvPython = process.env.PYTHON_BIN || path.join(projectRoot, '.venv', 'bin', 'python');
-      const pythonExec = fs.existsSync(venvPython) ? venvPython : 'python3';
+      const scriptPath = getAgentScriptPath();
+      const pythonExec = resolvePythonExec();
       console.log(`[Agent] Spawning Python: ${pythonExec} ${scriptPath}`);
       const py = spawn(pythonExec, [scriptPath], { stdio: ['pipe', 'pipe', 'pipe'] });
 